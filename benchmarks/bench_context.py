@@ -0,0 +1,60 @@
+# coding=utf-8
+
+"""
+引擎构建至执行第一条语句的耗时对比（无缓存 / 仅翻译缓存 / 翻译缓存+上下文模板）
+
+    python benchmarks/bench_context.py [-n 50] [-o result.json]
+"""
+
+import argparse
+
+from bench_utils import get_null_logger, measure, summarize, write_json
+
+from pyjse import PyJsEngine, PyJsEngineBase
+from pyjse.TranslationCache import TranslationCache
+from pyjse.tools.RequestsJsEngine import RequestsJsEngine
+
+FIRST_STATEMENT = 'var a = 1;'
+
+MODES = [
+    ("baseline", dict(translation_cache=False, use_context_template=False)),
+    ("translation_cache", dict(use_context_template=False)),
+    ("context_template", dict()),
+]
+
+
+def bench_engine_class(engine_class, repeat):
+    logger = get_null_logger()
+    results = {}
+    for mode, kwargs in MODES:
+        PyJsEngineBase.clear_context_templates()
+        kwargs = dict(kwargs)
+        if kwargs.get("translation_cache") is None:
+            kwargs["translation_cache"] = TranslationCache()
+
+        def run():
+            engine = engine_class(logger=logger, **kwargs)
+            engine.run(temp_script=FIRST_STATEMENT)
+
+        # 首次构建（含翻译）单独记录，其余为稳态耗时
+        first = measure(run, repeat=1)[0]
+        result = summarize(measure(run, repeat=repeat))
+        result["first"] = first
+        results[mode] = result
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--repeat", type=int, default=50)
+    parser.add_argument("-o", "--output", default=None)
+    args = parser.parse_args()
+
+    results = {}
+    for engine_class in (PyJsEngine, RequestsJsEngine):
+        results[engine_class.__name__] = bench_engine_class(engine_class, args.repeat)
+    write_json(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+# coding=utf-8
+
+"""
+引擎核心路径基准（结果输出为JSON，便于不同版本间对比）
+
+    python benchmarks/bench_core.py [-n 2000] [--sizes 100,1000,10000] [--vars 1,10,100] [-o result.json]
+
+用例：
+    builtin  空操作经wrapped_method/do_before调用的单次耗时（与直接调用Python函数对比，差值记为overhead）
+    set_str  Set_str一次设置N个变量的单次耗时
+    load_data  Load_data + Next_循环的行/秒（不同文件大小，整体加载与流式加载）
+    output  Output逐行写入的行/秒
+    template  Template（内联模板，结果存入变量）渲染次/秒
+    construct  引擎构建耗时（稳态）
+    first_construct  进程内首次构建引擎的耗时（在其他用例之前测量）
+"""
+
+import os
+import csv
+import shutil
+import argparse
+import tempfile
+from time import perf_counter
+
+from bench_utils import get_null_logger, measure, summarize, write_json
+
+from pyjse import PyJsEngine
+
+
+class BenchJsEngine(PyJsEngine):
+    """
+    增加空操作Nop（经wrapped_method调用）及Python函数Raw_nop（js2py直接调用），用于测量内置操作的调用开销
+    """
+
+    funcn_nop = "nop"
+
+    def __init__(self, logger=None, msg_handler=None, **kwargs):
+        super().__init__(logger=logger, msg_handler=msg_handler, **kwargs)
+        self.register_context({
+            self.funcn_nop: self.run_nop,
+            "raw_nop": lambda *args: None,
+        })
+
+    # 操作：空操作
+    def run_nop(self, jskwargs, *args):
+        return None
+
+
+SCRIPT_LOAD_DATA = r"""
+    var n = 0;
+    var it = Load_data({name: "%s", stream: %s});
+    for (var i = Next_(it); i; ){
+        n++;
+        i = Next_(it);
+    }
+"""
+
+SCRIPT_OUTPUT = r"""
+    var it = Load_data({name: "%s", stream: true});
+    for (var i = Next_(it); i; ){
+        Set_str(i);
+        Output({name: "output.csv", cols: "id,name,value"});
+        i = Next_(it);
+    }
+"""
+
+TEMPLATE_CONTENT = "{% for i in range(10) %}{{ name }}-{{ i }};{% endfor %}{{ value }}"
+
+
+def make_loop_script(statement, count):
+    return "for (var i = 0; i < {}; i++) {{ {} }}".format(count, statement)
+
+
+def make_input_file(file_name, rows):
+    with open(file_name, 'w', newline='', encoding='utf-8') as fp:
+        cw = csv.writer(fp)
+        cw.writerow(["id", "name", "value"])
+        for i in range(rows):
+            cw.writerow([i, "name_{}".format(i), i * 3])
+
+
+def make_engine(work_dir=None):
+    engine = BenchJsEngine(logger=get_null_logger())
+    if work_dir is not None:
+        engine.add_to_path(work_dir)
+    engine.run(temp_script="var _ = 0;")
+    return engine
+
+
+# 脚本内循环执行count次，返回次/秒（循环脚本先经翻译缓存翻译，计时不含js2py翻译耗时）
+def loop_rate(engine, statement, count):
+    script = make_loop_script(statement, count)
+    if engine.translation_cache is not None:
+        engine.translation_cache.get_compiled(script)
+    else:
+        engine.run(temp_script=script)
+    t = perf_counter()
+    engine.run(temp_script=script)
+    elapsed = perf_counter() - t
+    return count / elapsed if elapsed > 0 else None, elapsed
+
+
+def bench_builtin(count):
+    engine = make_engine()
+    results = {}
+    for name, statement in (("nop", "Nop({});"), ("nop_kwargs", "Nop({a: 1, b: 'x'});"), ("raw", "Raw_nop({});")):
+        rate, elapsed = loop_rate(engine, statement, count)
+        results[name] = {
+            "calls": count,
+            "seconds": elapsed,
+            "calls_per_sec": rate,
+            "per_call": elapsed / count,
+        }
+    results["overhead"] = results["nop"]["per_call"] - results["raw"]["per_call"]
+    return results
+
+
+def bench_set_str(count, var_counts):
+    engine = make_engine()
+    results = {}
+    for n in var_counts:
+        statement = "Set_str({{{}}});".format(", ".join('v{}: "value_{}"'.format(i, i) for i in range(n)))
+        rate, elapsed = loop_rate(engine, statement, count)
+        results["vars_{}".format(n)] = {
+            "calls": count,
+            "seconds": elapsed,
+            "calls_per_sec": rate,
+            "per_call": elapsed / count,
+        }
+    return results
+
+
+def bench_load_data(work_dir, sizes):
+    engine = make_engine(work_dir)
+    results = {}
+    for rows in sizes:
+        file_name = "input_{}.csv".format(rows)
+        for mode, stream in (("list", "false"), ("stream", "true")):
+            t = perf_counter()
+            engine.run(temp_script=SCRIPT_LOAD_DATA % (file_name, stream))
+            elapsed = perf_counter() - t
+            results["{}_{}".format(mode, rows)] = {
+                "rows": rows,
+                "seconds": elapsed,
+                "rows_per_sec": rows / elapsed if elapsed > 0 else None,
+            }
+    return results
+
+
+def bench_output(work_dir, rows):
+    engine = make_engine(work_dir)
+    t = perf_counter()
+    engine.run(temp_script=SCRIPT_OUTPUT % "input_{}.csv".format(rows))
+    elapsed = perf_counter() - t
+    return {
+        "rows": rows,
+        "seconds": elapsed,
+        "rows_per_sec": rows / elapsed if elapsed > 0 else None,
+    }
+
+
+def bench_template(count):
+    engine = make_engine()
+    engine.run(temp_script='Set_str({name: "bench", value: "1"});')
+    statement = "Template({{content: {!r}, _to_key: 'out'}});".format(TEMPLATE_CONTENT)
+    rate, elapsed = loop_rate(engine, statement, count)
+    return {
+        "renders": count,
+        "seconds": elapsed,
+        "renders_per_sec": rate,
+        "per_render": elapsed / count,
+    }
+
+
+# 进程内首次构建引擎并执行第一条语句的耗时（含预备脚本翻译；须在其他用例之前执行）
+def bench_first_construct():
+    logger = get_null_logger()
+    t = perf_counter()
+    engine = BenchJsEngine(logger=logger)
+    t1 = perf_counter()
+    engine.run(temp_script="var a = 1;")
+    return {
+        "init": t1 - t,
+        "init_and_run": perf_counter() - t,
+    }
+
+
+def bench_construct(repeat):
+    logger = get_null_logger()
+    return {
+        "init": summarize(measure(lambda: BenchJsEngine(logger=logger), repeat=repeat)),
+        "init_and_run": summarize(
+            measure(lambda: BenchJsEngine(logger=logger).run(temp_script="var a = 1;"), repeat=repeat)),
+    }
+
+
+def parse_int_list(s):
+    return [int(i) for i in s.split(",") if i.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--count", type=int, default=2000, help="calls per loop case")
+    parser.add_argument("--sizes", default="100,1000,10000", help="Load_data file sizes (rows)")
+    parser.add_argument("--vars", default="1,10,100", help="Set_str variable counts")
+    parser.add_argument("--construct", type=int, default=20, help="engine construction repeats")
+    parser.add_argument("-o", "--output", default=None)
+    args = parser.parse_args()
+
+    sizes = parse_int_list(args.sizes)
+    work_dir = tempfile.mkdtemp(prefix="pyjse_bench_")
+    try:
+        for rows in sizes:
+            make_input_file(os.path.join(work_dir, "input_{}.csv".format(rows)), rows)
+        first_construct = bench_first_construct()
+        results = {
+            "builtin": bench_builtin(args.count),
+            "set_str": bench_set_str(args.count, parse_int_list(args.vars)),
+            "load_data": bench_load_data(work_dir, sizes),
+            "output": bench_output(work_dir, max(sizes)),
+            "template": bench_template(args.count),
+            "construct": bench_construct(args.construct),
+            "first_construct": first_construct,
+            "config": {
+                "count": args.count,
+                "sizes": sizes,
+                "vars": parse_int_list(args.vars),
+                "construct": args.construct,
+            },
+        }
+        write_json(results, args.output)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
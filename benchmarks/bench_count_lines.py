@@ -0,0 +1,91 @@
+# coding=utf-8
+
+"""
+CSV行数统计基准（结果输出为JSON，便于不同版本间对比）
+
+    python benchmarks/bench_count_lines.py [--rows 500000] [-r 5] [-o result.json]
+
+用例（每种换行/引号形式各一个文件）：
+    lf  \\n换行，无引号
+    crlf  \\r\\n换行（Windows导出）
+    quoted  \\r\\n换行，每行含带引号的字段（部分字段内含逗号）
+    quoted_newline  引号内含换行符
+    cr  \\r换行
+各用例对比count_bytes_lines（不经结果缓存）与逐行文本读取（baseline）的耗时
+"""
+
+import os
+import csv
+import shutil
+import argparse
+import tempfile
+
+from bench_utils import measure, summarize, write_json
+
+from pyjse import PyJsEngine
+
+
+CASES = (
+    ("lf", "\n", False, False),
+    ("crlf", "\r\n", False, False),
+    ("quoted", "\r\n", True, False),
+    ("quoted_newline", "\r\n", True, True),
+    ("cr", "\r", False, False),
+)
+
+
+def make_input_file(file_name, rows, lineterminator, quoted, quoted_newline):
+    with open(file_name, 'w', newline='', encoding='utf-8') as fp:
+        cw = csv.writer(fp, lineterminator=lineterminator,
+                        quoting=csv.QUOTE_NONNUMERIC if quoted else csv.QUOTE_MINIMAL)
+        cw.writerow(["id", "name", "value"])
+        for i in range(rows):
+            name = "name_{}, {}".format(i, i % 7) if quoted else "name_{}".format(i)
+            if quoted_newline and i % 10 == 0:
+                name += "\nline2"
+            cw.writerow([i, name, i * 3])
+
+
+def count_bytes(file_name):
+    with open(file_name, 'rb') as fp:
+        return PyJsEngine.count_bytes_lines(fp)
+
+
+def count_baseline(file_name):
+    count = 0
+    with open(file_name, 'r', encoding='utf-8') as fp:
+        for count, line in enumerate(fp, 1):
+            pass
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    parser.add_argument("-o", "--output", default=None)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="pyjse_bench_")
+    try:
+        results = {}
+        for name, lineterminator, quoted, quoted_newline in CASES:
+            file_name = os.path.join(work_dir, "{}.csv".format(name))
+            make_input_file(file_name, args.rows, lineterminator, quoted, quoted_newline)
+            results[name] = {
+                "lines": count_bytes(file_name),
+                "bytes": os.path.getsize(file_name),
+                "count_bytes_lines": summarize(measure(lambda: count_bytes(file_name), repeat=args.repeat)),
+                "baseline": summarize(measure(lambda: count_baseline(file_name), repeat=args.repeat)),
+            }
+        results["config"] = {
+            "rows": args.rows,
+            "repeat": args.repeat,
+        }
+        write_json(results, args.output)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# coding=utf-8
+
+"""
+Output逐行调用与Output_rows批量写入的行/秒对比
+
+    python benchmarks/bench_output.py [-n 2000] [-o result.json]
+"""
+
+import os
+import csv
+import shutil
+import argparse
+import tempfile
+from time import perf_counter
+
+from bench_utils import get_null_logger, write_json
+
+from pyjse import PyJsEngine
+
+SCRIPT_OUTPUT = r"""
+    var it = Load_data({name: "input.csv", stream: true});
+    for (var i = Next_(it); i; ){
+        Set_str(i);
+        Output({name: "output_row.csv", cols: "id,name,value"});
+        i = Next_(it);
+    }
+"""
+
+SCRIPT_OUTPUT_ROWS_ARRAY = r"""
+    var rows = [];
+    var it = Load_data({name: "input.csv", stream: true});
+    for (var i = Next_(it); i; ){
+        rows.push({id: i.id, name: i.name, value: i.value});
+        i = Next_(it);
+    }
+    Output_rows({name: "output_rows_array.csv", cols: "id,name,value"}, rows);
+"""
+
+SCRIPT_OUTPUT_ROWS_ITERATOR = r"""
+    var it = Load_data({name: "input.csv", stream: true});
+    Output_rows({name: "output_rows_iterator.csv", cols: "id,name,value"}, it);
+"""
+
+CASES = [
+    ("output", SCRIPT_OUTPUT),
+    ("output_rows_array", SCRIPT_OUTPUT_ROWS_ARRAY),
+    ("output_rows_iterator", SCRIPT_OUTPUT_ROWS_ITERATOR),
+]
+
+
+def make_input_file(file_name, rows):
+    with open(file_name, 'w', newline='', encoding='utf-8') as fp:
+        cw = csv.writer(fp)
+        cw.writerow(["id", "name", "value"])
+        for i in range(rows):
+            cw.writerow([i, "name_{}".format(i), i * 3])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--rows", type=int, default=2000)
+    parser.add_argument("-o", "--output", default=None)
+    args = parser.parse_args()
+
+    logger = get_null_logger()
+    work_dir = tempfile.mkdtemp(prefix="pyjse_bench_")
+    try:
+        make_input_file(os.path.join(work_dir, "input.csv"), args.rows)
+        results = {}
+        for name, script in CASES:
+            engine = PyJsEngine(logger=logger)
+            engine.add_to_path(work_dir)
+            t = perf_counter()
+            engine.run(temp_script=script)
+            elapsed = perf_counter() - t
+            results[name] = {
+                "rows": args.rows,
+                "seconds": elapsed,
+                "rows_per_sec": args.rows / elapsed if elapsed > 0 else None,
+            }
+        write_json(results, args.output)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+# coding=utf-8
+
+"""
+RequestsJsEngine请求路径基准（本地HTTP服务，无需外网）：Rget/Rpost/Get_/Post_与直接使用requests对比
+
+    python benchmarks/bench_requests.py [-n 200] [--latency 0] [--size 1024] [--status 200] [--replay] [-o result.json]
+
+每个用例报告：
+    latency  单次请求（一次engine.run()执行一个请求）的耗时分布
+    req_per_sec  脚本内循环发出n个请求的吞吐量
+    overhead  引擎单次请求平均耗时与requests直接请求平均耗时之差
+    replay  （--replay）先录制各用例的请求，再以回放模式（不访问网络）测量引擎自身的耗时
+"""
+
+import os
+import json
+import argparse
+import tempfile
+import threading
+from time import sleep, perf_counter
+from urllib.parse import urlsplit, parse_qs
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from socketserver import ThreadingMixIn
+
+import requests
+
+from bench_utils import get_null_logger, measure, summarize, write_json
+
+from pyjse.tools.RequestsJsEngine import RequestsJsEngine
+
+
+class BenchHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class BenchHandler(BaseHTTPRequestHandler):
+    """
+    按查询参数响应：latency（毫秒）、size（响应字节数）、status（状态码）
+    """
+
+    protocol_version = "HTTP/1.1"
+    # 响应头与内容合并写出（避免分段发送触发Nagle/延迟确认，使每个请求多出数十毫秒）
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _respond(self):
+        query = parse_qs(urlsplit(self.path).query)
+        latency = float(query.get("latency", ["0"])[0])
+        size = int(query.get("size", ["0"])[0])
+        status = int(query.get("status", ["200"])[0])
+
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > 0:
+            self.rfile.read(length)
+        if latency > 0:
+            sleep(latency / 1000.0)
+
+        body = b"x" * size
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._respond()
+
+    def do_POST(self):
+        self._respond()
+
+
+def start_server():
+    server = BenchHTTPServer(("127.0.0.1", 0), BenchHandler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server
+
+
+SCRIPTS = {
+    "rget": 'Rget({url: url});',
+    "rpost": 'Rpost({url: url, data: payload});',
+    "get_": 'Get_(url, {"X-Bench": "1"});',
+    "post_": 'Post_(url, {value: payload}, {"X-Bench": "1"});',
+}
+
+
+def make_loop_script(statement, count):
+    return "for (var i = 0; i < {}; i++) {{ {} }}".format(count, statement)
+
+
+def bench_engine(url, payload, count):
+    logger = get_null_logger()
+    engine = RequestsJsEngine(logger=logger, max_retries=0)
+    engine.run(temp_script="var url = {}; var payload = {};".format(json.dumps(url), json.dumps(payload)))
+
+    results = {}
+    for name, statement in SCRIPTS.items():
+        samples = measure(lambda: engine.run(temp_script=statement), repeat=count, warmup=5)
+        loop_script = make_loop_script(statement, count)
+        t = perf_counter()
+        engine.run(temp_script=loop_script)
+        elapsed = perf_counter() - t
+        results[name] = {
+            "latency": summarize(samples),
+            "req_per_sec": count / elapsed if elapsed > 0 else None,
+        }
+    results["connection_stats"] = engine.get_connection_stats()
+    return results
+
+
+def bench_replay(url, payload, count):
+    logger = get_null_logger()
+    init_script = "var url = {}; var payload = {};".format(json.dumps(url), json.dumps(payload))
+    fd, cassette_file = tempfile.mkstemp(suffix=".cassette")
+    os.close(fd)
+    try:
+        # 录制（每个用例一次请求，回放时重复使用）
+        engine = RequestsJsEngine(logger=logger, max_retries=0, cassette_file=cassette_file, cassette_mode="record")
+        engine.run(temp_script=init_script + "".join(SCRIPTS.values()))
+
+        engine = RequestsJsEngine(logger=logger, cassette_file=cassette_file, cassette_mode="replay")
+        engine.run(temp_script=init_script)
+        results = {}
+        for name, statement in SCRIPTS.items():
+            samples = measure(lambda: engine.run(temp_script=statement), repeat=count, warmup=5)
+            t = perf_counter()
+            engine.run(temp_script=make_loop_script(statement, count))
+            elapsed = perf_counter() - t
+            results[name] = {
+                "latency": summarize(samples),
+                "req_per_sec": count / elapsed if elapsed > 0 else None,
+            }
+        results["cassette_stats"] = engine.get_cassette_stats()
+        engine.cassette.close()
+        return results
+    finally:
+        os.remove(cassette_file)
+
+
+def bench_raw(url, payload, count):
+    session = requests.session()
+    headers = {"User-Agent": RequestsJsEngine.DEFAULT_USER_AGENT}
+    cases = {
+        "raw_get": lambda: session.get(url, headers=headers, timeout=RequestsJsEngine.DEFAULT_REQUEST_TIMEOUT),
+        "raw_post": lambda: session.post(url, headers=headers, data=payload,
+                                         timeout=RequestsJsEngine.DEFAULT_REQUEST_TIMEOUT),
+    }
+    results = {}
+    for name, func in cases.items():
+        samples = measure(func, repeat=count, warmup=5)
+        t = perf_counter()
+        for i in range(count):
+            func()
+        elapsed = perf_counter() - t
+        results[name] = {
+            "latency": summarize(samples),
+            "req_per_sec": count / elapsed if elapsed > 0 else None,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0, help="server latency (ms)")
+    parser.add_argument("--size", type=int, default=1024, help="response body size (bytes)")
+    parser.add_argument("--status", type=int, default=200, help="response status code")
+    parser.add_argument("--replay", action="store_true", help="also benchmark cassette replay (no network)")
+    parser.add_argument("-o", "--output", default=None)
+    args = parser.parse_args()
+
+    server = start_server()
+    try:
+        url = "http://127.0.0.1:{}/bench?latency={}&size={}&status={}".format(
+            server.server_address[1], args.latency, args.size, args.status)
+        payload = "x" * 256
+
+        results = bench_raw(url, payload, args.requests)
+        results.update(bench_engine(url, payload, args.requests))
+        for name, raw_name in (("rget", "raw_get"), ("get_", "raw_get"), ("rpost", "raw_post"),
+                               ("post_", "raw_post")):
+            results[name]["overhead"] = results[name]["latency"]["mean"] - results[raw_name]["latency"]["mean"]
+        if args.replay:
+            results["replay"] = bench_replay(url, payload, args.requests)
+        results["config"] = {
+            "requests": args.requests,
+            "latency_ms": args.latency,
+            "size": args.size,
+            "status": args.status,
+        }
+        write_json(results, args.output)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
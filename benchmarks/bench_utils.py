@@ -0,0 +1,79 @@
+# coding=utf-8
+
+import os
+import sys
+import json
+import logging
+import platform
+from time import perf_counter, strftime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def get_null_logger(name="pyjse_bench"):
+    logger = logging.getLogger(name)
+    if len(logger.handlers) <= 0:
+        logger.addHandler(logging.NullHandler())
+    logger.setLevel(logging.WARNING)
+    logger.propagate = False
+    return logger
+
+
+# 多次执行func，返回每次耗时（秒）
+def measure(func, repeat=10, warmup=0):
+    for i in range(warmup):
+        func()
+    samples = []
+    for i in range(repeat):
+        t = perf_counter()
+        func()
+        samples.append(perf_counter() - t)
+    return samples
+
+
+def percentile(samples, p):
+    if not samples:
+        return None
+    s = sorted(samples)
+    k = min(len(s) - 1, max(0, int(round(p / 100.0 * (len(s) - 1)))))
+    return s[k]
+
+
+def summarize(samples):
+    if not samples:
+        return {"count": 0}
+    return {
+        "count": len(samples),
+        "mean": sum(samples) / len(samples),
+        "min": min(samples),
+        "p50": percentile(samples, 50),
+        "p90": percentile(samples, 90),
+        "p99": percentile(samples, 99),
+        "max": max(samples),
+    }
+
+
+def get_environment():
+    try:
+        from pyjse import __version__ as pyjse_version
+    except Exception:
+        pyjse_version = None
+    return {
+        "time": strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pyjse": pyjse_version,
+    }
+
+
+def write_json(results, file_name=None):
+    data = {
+        "environment": get_environment(),
+        "results": results,
+    }
+    text = json.dumps(data, ensure_ascii=False, sort_keys=True, indent=2)
+    if file_name:
+        with open(file_name, 'w', encoding='utf-8') as fp:
+            fp.write(text)
+    else:
+        print(text)
@@ -0,0 +1,66 @@
+# coding=utf-8
+
+"""
+变量标识替换（var_replacer_raw）微基准：逐字串替换的旧实现与缓存片段解析的新实现对比
+
+    python benchmarks/bench_var_replacer.py [-n 20000] [-v 200] [-o result.json]
+"""
+
+import re
+import argparse
+
+from bench_utils import measure, summarize, write_json
+
+from pyjse.PyJsEngineBase import PyJsEngineBase
+
+
+# 旧实现（每次编译正则、findall，并按变量逐个str.replace）
+def var_replacer_raw_legacy(var_dict, v_str, v_prefix=r"$%", v_suffix=r"%$", re_prefix=r"\$\%", re_suffix=r"\%\$"):
+    keys = re.findall(re_prefix + r"(.+?)" + re_suffix, v_str)
+    d_keys = [i for i in keys if var_dict.get(i) is not None]
+    o_str = v_str
+    for i in d_keys:
+        o_str = o_str.replace(v_prefix + i + v_suffix, str(var_dict.get(i)))
+    return o_str
+
+
+def make_cases(var_count):
+    return [
+        ("no_var", "plain string without any variable"),
+        ("one_var", "$%var_1%$"),
+        ("mixed", "id=$%var_1%$, name=$%var_2%$, missing=$%no_such_var%$, value=$%var_3%$"),
+        ("many_vars", ",".join("$%var_{}%$".format(i) for i in range(min(var_count, 50)))),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--loops", type=int, default=20000)
+    parser.add_argument("-v", "--vars", type=int, default=200)
+    parser.add_argument("-o", "--output", default=None)
+    args = parser.parse_args()
+
+    var_dict = {"var_{}".format(i): "value_{}".format(i) for i in range(args.vars)}
+    impls = [
+        ("legacy", var_replacer_raw_legacy),
+        ("cached", PyJsEngineBase.var_replacer_raw),
+    ]
+
+    results = {}
+    for case_name, v_str in make_cases(args.vars):
+        case_result = {}
+        for impl_name, impl in impls:
+            def loop():
+                for i in range(args.loops):
+                    impl(var_dict, v_str)
+
+            samples = measure(loop, repeat=5, warmup=1)
+            stats = summarize([s / args.loops for s in samples])
+            stats["calls_per_sec"] = 1.0 / stats["p50"] if stats["p50"] > 0 else None
+            case_result[impl_name] = stats
+        results[case_name] = case_result
+    write_json(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+# coding=utf-8
+
+import ast
+from functools import lru_cache
+
+from js2py.base import JsObjectWrapper
+
+
+# 转换为整数（不使用eval；依次尝试int、float、字面量解析）
+def to_int(value):
+    if value is None or isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return int(value)
+    s = str(value).strip()
+    try:
+        return int(s)
+    except ValueError:
+        pass
+    try:
+        return int(float(s))
+    except ValueError:
+        pass
+    return int(literal_eval(s))
+
+
+# 转换为数值（不使用eval；整数字串得到int，其余按float或字面量解析）
+def to_number(value):
+    if value is None or isinstance(value, float):
+        return value
+    s = str(value).strip()
+    try:
+        return int(s)
+    except ValueError:
+        pass
+    try:
+        return float(s)
+    except ValueError:
+        pass
+    return literal_eval(s)
+
+
+def to_bool(value):
+    return str(value).lower() == 'true'
+
+
+def to_str(value):
+    return str(value) if value is not None else None
+
+
+def literal_eval(s):
+    try:
+        return ast.literal_eval(s)
+    except (ValueError, SyntaxError):
+        raise ValueError("Illegal number literal: {!r}".format(s))
+
+
+ATTR_NAME_PREFIX = "attrn_"
+
+
+# 取得子类重定义的参数名映射（MRO中各类曾定义的attrn_*值 -> 该类当前的值）
+@lru_cache(maxsize=256)
+def get_attr_name_remap(cls):
+    remap = {}
+    for name in dir(cls):
+        if not name.startswith(ATTR_NAME_PREFIX):
+            continue
+        value = getattr(cls, name)
+        for base in cls.__mro__:
+            old = vars(base).get(name, value)
+            if isinstance(old, str) and old != value:
+                remap.setdefault(old, value)
+    return remap
+
+
+class ArgsRules:
+    """
+    预编译的参数解析规则（格式同args_parser：{key:(name, type)}或{key:(name, type, default)}）
+    2元组：参数不存在时不输出该项；3元组：参数不存在时取默认值
+    bind_attr_names为True时（args_rules装饰器），规则中的参数名按引擎类解析：
+    子类重定义的attrn_*在调用时生效（每个引擎类计算一次）
+    """
+
+    # 类型代码 -> (转换函数, 是否进行变量标识替换)
+    TYPES = {
+        's': (to_str, True),
+        'sr': (to_str, False),
+        'i': (to_int, True),
+        'ir': (to_int, False),
+        'r': (to_number, True),
+        'rr': (to_number, False),
+        'b': (to_bool, True),
+        'br': (to_bool, False),
+    }
+
+    def __init__(self, rules, bind_attr_names=False):
+        self._bind_attr_names = bind_attr_names
+        self._bound = {}
+        self._rules = []
+        for pk, pv in rules.items():
+            if isinstance(pk, str) and isinstance(pv, tuple) and len(pv) in {2, 3}:
+                # pk: key, pn: name, pt: type, pd: default
+                pn, pt = pv[0], pv[1]
+                optional = len(pv) == 2
+                pd = None if optional else pv[2]
+                converter = self.TYPES.get(pt)
+                if converter is None:
+                    continue
+                convert, replace = converter
+                self._rules.append((pk, pn, convert, replace, optional, pd))
+
+    def __len__(self):
+        return len(self._rules)
+
+    # 取得按引擎类解析参数名后的规则
+    def get_rules(self, cls):
+        if not self._bind_attr_names:
+            return self._rules
+        rules = self._bound.get(cls)
+        if rules is None:
+            remap = get_attr_name_remap(cls)
+            rules = [(remap.get(r[0], r[0]),) + r[1:] for r in self._rules] if remap else self._rules
+            self._bound[cls] = rules
+        return rules
+
+    # 按规则解析参数字典（engine提供变量标识替换）
+    def parse(self, engine, jskwargs):
+        if isinstance(jskwargs, JsObjectWrapper):
+            # 确保jskwargs为非JsObjectWrapper
+            jskwargs = jskwargs.to_dict()
+
+        if not isinstance(jskwargs, dict):
+            return None
+
+        args = {}
+        encoding = engine.DEFAULT_ENCODING
+        for pk, pn, convert, replace, optional, pd in self.get_rules(type(engine)):
+            if pk in jskwargs:
+                value = jskwargs[pk]
+            elif optional:
+                continue
+            else:
+                value = pd
+
+            if isinstance(value, bytes):
+                value = value.decode(encoding)
+            if replace and isinstance(value, str):
+                value = engine.var_replacer(value)
+            args[pn] = convert(value)
+        return args
+
+
+@lru_cache(maxsize=1024)
+def _compile_rules_items(items):
+    return ArgsRules(dict(items))
+
+
+# 取得编译后的解析规则（用于以字典传入的规则，如扩展的操作；按规则内容缓存，含不可哈希的默认值时不缓存）
+def compile_args_rules(rules):
+    if isinstance(rules, ArgsRules):
+        return rules
+    try:
+        return _compile_rules_items(tuple(rules.items()))
+    except TypeError:
+        return ArgsRules(rules)
+
+
+# 装饰器：为操作方法附加预编译的解析规则（类定义时编译一次；方法内以类名.方法名.args_rules取得并传给args_parser）
+# 注：规则以类定义时的attrn_*值为键，子类重定义的attrn_*在解析时按引擎类映射
+def args_rules(rules):
+    compiled = ArgsRules(rules, bind_attr_names=True)
+
+    def decorator(func):
+        func.args_rules = compiled
+        return func
+
+    return decorator
@@ -0,0 +1,196 @@
+# coding=utf-8
+
+from collections import deque
+from functools import partial
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+from queue import Queue
+from threading import Lock
+from time import perf_counter
+
+from .PyJsEngine import PyJsEngine
+
+
+# 默认任务：重置后的引擎执行脚本，返回执行后的变量字典
+def run_script_job(engine, script, vars=None):
+    if vars:
+        engine.set_vars(vars)
+    engine.run(temp_script=script)
+    return engine.sync_vars()
+
+
+# ---- 进程后端：每个工作进程持有一个引擎 ----
+_process_engine = None
+
+
+def _init_process_engine(engine_class, engine_kwargs):
+    global _process_engine
+    _process_engine = engine_class(**engine_kwargs)
+    _process_engine.create_js_context()
+
+
+def _run_process_job(func, args, kwargs):
+    t = perf_counter()
+    _process_engine.reset_state()
+    result = func(_process_engine, *args, **kwargs)
+    return result, perf_counter() - t
+
+
+class EnginePool:
+    """
+    引擎池：保持N个已预热的引擎，按任务分配（支持线程/进程两种后端）
+    每个任务执行前调用engine.reset_state()：重置__vars__、过程、模块、Output打开的文件及模板缓存
+    注：engine.path等构建时的设置不重置
+    """
+
+    BACKEND_THREAD = "thread"
+    BACKEND_PROCESS = "process"
+
+    DEFAULT_SIZE = 4
+    DEFAULT_LATENCY_SAMPLES = 1000
+
+    def __init__(self, engine_class=PyJsEngine, size=DEFAULT_SIZE, backend=BACKEND_THREAD, engine_kwargs=None,
+                 latency_samples=DEFAULT_LATENCY_SAMPLES):
+        if backend not in {self.BACKEND_THREAD, self.BACKEND_PROCESS}:
+            raise ValueError("backend illegal!")
+        if size <= 0:
+            raise ValueError("size illegal!")
+
+        self._engine_class = engine_class
+        self._size = size
+        self._backend = backend
+        self._engine_kwargs = dict(engine_kwargs or {})
+
+        self._stats_lock = Lock()
+        self._pending = 0
+        self._busy = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._latencies = deque(maxlen=latency_samples)
+
+        self._engines = None
+        if backend == self.BACKEND_THREAD:
+            self._engines = Queue()
+            for i in range(size):
+                engine = engine_class(**self._engine_kwargs)
+                engine.create_js_context()
+                self._engines.put(engine)
+            self._executor = ThreadPoolExecutor(max_workers=size)
+        else:
+            self._executor = ProcessPoolExecutor(max_workers=size, initializer=_init_process_engine,
+                                                 initargs=(engine_class, self._engine_kwargs))
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def backend(self):
+        return self._backend
+
+    # 提交任务：func(engine, *args, **kwargs)，进程后端要求func及参数可被pickle
+    def submit_call(self, func, *args, **kwargs):
+        with self._stats_lock:
+            self._pending += 1
+            self._submitted += 1
+
+        if self._backend == self.BACKEND_THREAD:
+            future = self._executor.submit(self._run_thread_job, func, args, kwargs)
+        else:
+            future = Future()
+            inner = self._executor.submit(_run_process_job, func, args, kwargs)
+            inner.add_done_callback(partial(self._on_process_job_done, future))
+        return future
+
+    # 提交脚本任务，结果为执行后的变量字典
+    def submit(self, script, vars=None):
+        return self.submit_call(run_script_job, script, vars)
+
+    # 执行脚本并等待结果
+    def run(self, script, vars=None, timeout=None):
+        return self.submit(script, vars=vars).result(timeout=timeout)
+
+    # 批量执行脚本，按提交顺序返回结果
+    def map(self, scripts, timeout=None):
+        futures = [self.submit(script) for script in scripts]
+        return [f.result(timeout=timeout) for f in futures]
+
+    def _run_thread_job(self, func, args, kwargs):
+        engine = self._engines.get()
+        with self._stats_lock:
+            self._busy += 1
+        t = perf_counter()
+        ok = False
+        try:
+            engine.reset_state()
+            result = func(engine, *args, **kwargs)
+            ok = True
+            return result
+        finally:
+            self._job_finished(perf_counter() - t, ok)
+            self._engines.put(engine)
+
+    def _on_process_job_done(self, future, inner):
+        try:
+            result, elapsed = inner.result()
+        except BaseException as e:
+            self._job_finished(None, False)
+            future.set_exception(e)
+        else:
+            self._job_finished(elapsed, True)
+            future.set_result(result)
+
+    def _job_finished(self, elapsed, ok):
+        with self._stats_lock:
+            self._pending -= 1
+            if self._backend == self.BACKEND_THREAD:
+                self._busy -= 1
+            if ok:
+                self._completed += 1
+            else:
+                self._failed += 1
+            if elapsed is not None:
+                self._latencies.append(elapsed)
+
+    @property
+    def busy_count(self):
+        with self._stats_lock:
+            if self._backend == self.BACKEND_THREAD:
+                return self._busy
+            # 进程后端无法得知任务何时开始，按未完成任务数估算
+            return min(self._pending, self._size)
+
+    @property
+    def queue_depth(self):
+        with self._stats_lock:
+            busy = self._busy if self._backend == self.BACKEND_THREAD else min(self._pending, self._size)
+            return self._pending - busy
+
+    def get_stats(self):
+        busy = self.busy_count
+        with self._stats_lock:
+            latencies = sorted(self._latencies)
+            stats = {
+                "backend": self._backend,
+                "size": self._size,
+                "busy": busy,
+                "queue_depth": self._pending - busy,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+            }
+        if latencies:
+            stats["latency_mean"] = sum(latencies) / len(latencies)
+            stats["latency_p50"] = latencies[int(0.5 * (len(latencies) - 1))]
+            stats["latency_p99"] = latencies[int(0.99 * (len(latencies) - 1))]
+            stats["latency_max"] = latencies[-1]
+        return stats
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
@@ -0,0 +1,219 @@
+# coding=utf-8
+
+import io
+import os
+import csv
+import codecs
+import locale
+from itertools import islice
+from threading import Lock, RLock, Timer
+
+
+class OutputWriter:
+    """
+    CSV输出文件：各行先格式化到内存缓冲，刷新时在按文件绝对路径共享的锁内整块追加写入
+    （同一进程内多个引擎写同一文件时不会出现半行交错）；标题行仅在文件为空时随首次刷新写入
+    有未刷新的行时启动定时器，超过flush_interval后即使没有新的写入也会刷新
+    """
+
+    WRITEROWS_BATCH_SIZE = 1000
+
+    # 按文件绝对路径共享的锁（进程内各引擎共用）
+    _file_locks = {}
+    _file_locks_lock = Lock()
+
+    def __init__(self, file_name, cols, mode='a', encoding=None, buffer_size=-1, flush_rows=None,
+                 flush_interval=None):
+        self._file_name = file_name
+        self._encoding = encoding
+        self._buffer_size = buffer_size
+        self._flush_rows = flush_rows
+        self._flush_interval = flush_interval
+        # 缓冲及文件写入均使用按路径共享的锁（定时刷新线程与写入线程之间无锁顺序问题）
+        self._lock = self.get_file_lock(file_name)
+        if 'b' not in mode:
+            mode += 'b'
+        with self._lock:
+            self._fp = open(file_name, mode=mode)
+        self._encoder = codecs.getincrementalencoder(encoding or locale.getpreferredencoding(False))()
+        self._buffer = io.StringIO()
+        self._cols = None
+        self._writer = None
+        self._pending_rows = 0
+        self._timer = None
+        self._header_checked = False
+        self.set_cols(cols)
+        header = io.StringIO()
+        csv.DictWriter(header, self._cols).writeheader()
+        self._header = header.getvalue()
+
+    @staticmethod
+    def make_key(file_name):
+        return os.path.normcase(os.path.abspath(file_name))
+
+    @classmethod
+    def get_file_lock(cls, file_name):
+        key = cls.make_key(file_name)
+        with cls._file_locks_lock:
+            return cls._file_locks.setdefault(key, RLock())
+
+    @property
+    def file_name(self):
+        return self._file_name
+
+    @property
+    def encoding(self):
+        return self._encoding
+
+    @property
+    def pending_rows(self):
+        return self._pending_rows
+
+    def set_cols(self, cols):
+        cols = list(cols)
+        with self._lock:
+            if cols != self._cols:
+                self._cols = cols
+                self._writer = csv.DictWriter(self._buffer, cols)
+
+    def writerow(self, row):
+        with self._lock:
+            self._writer.writerow(row)
+            self._pending_rows += 1
+            self.maybe_flush()
+
+    # 批量写入（rows可为迭代器，按批次取出写入，不整体读入内存）
+    def writerows(self, rows):
+        count = 0
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, self.WRITEROWS_BATCH_SIZE))
+            if not batch:
+                break
+            with self._lock:
+                self._writer.writerows(batch)
+                self._pending_rows += len(batch)
+                self.maybe_flush()
+            count += len(batch)
+        return count
+
+    # 达到行数或缓冲大小阈值时刷新缓冲，否则确保定时刷新
+    def maybe_flush(self):
+        with self._lock:
+            if self._pending_rows <= 0:
+                return False
+            if (self._flush_rows is not None and self._pending_rows >= self._flush_rows) or \
+                    (self._buffer_size is not None and 0 <= self._buffer_size <= self._buffer.tell()):
+                self.flush()
+                return True
+            if self._flush_interval is not None and self._timer is None:
+                self._timer = Timer(self._flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+            return False
+
+    def flush(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._fp is None:
+                return
+            data = self._buffer.getvalue()
+            if not self._header_checked:
+                self._header_checked = True
+                if os.fstat(self._fp.fileno()).st_size > 0:
+                    # 追加到已有内容时不再写入BOM
+                    self._encoder.setstate(0)
+                else:
+                    data = self._header + data
+            if data:
+                self._fp.write(self._encoder.encode(data))
+                self._fp.flush()
+            self._buffer.seek(0)
+            self._buffer.truncate()
+            self._pending_rows = 0
+
+    def close(self):
+        with self._lock:
+            try:
+                self.flush()
+            finally:
+                if self._fp is not None:
+                    self._fp.close()
+                    self._fp = None
+                self._pending_rows = 0
+
+
+class OutputWriterRegistry:
+    """
+    按文件绝对路径登记的OutputWriter集合（运行期间保持打开，结束时统一刷新关闭）
+    注：同一文件首次打开后，后续写入均追加到已打开的文件；mode仅在首次打开时生效
+    """
+
+    DEFAULT_FLUSH_ROWS = 1000
+    DEFAULT_FLUSH_INTERVAL = 1.0
+    DEFAULT_BUFFER_SIZE = 256 * 1024
+
+    def __init__(self, flush_rows=DEFAULT_FLUSH_ROWS, flush_interval=DEFAULT_FLUSH_INTERVAL,
+                 buffer_size=DEFAULT_BUFFER_SIZE):
+        self._flush_rows = flush_rows
+        self._flush_interval = flush_interval
+        self._buffer_size = buffer_size
+        self._writers = {}
+        self._lock = Lock()
+
+    @staticmethod
+    def make_key(file_name):
+        return OutputWriter.make_key(file_name)
+
+    def get_writer(self, file_name, cols, mode='a', encoding=None):
+        key = self.make_key(file_name)
+        with self._lock:
+            writer = self._writers.get(key)
+            if writer is not None and writer.encoding != encoding:
+                # 编码变化时重新以追加方式打开
+                writer.close()
+                writer = None
+                mode = 'a'
+            if writer is None:
+                writer = OutputWriter(file_name, cols, mode=mode, encoding=encoding, buffer_size=self._buffer_size,
+                                      flush_rows=self._flush_rows, flush_interval=self._flush_interval)
+                self._writers[key] = writer
+            else:
+                writer.set_cols(cols)
+            return writer
+
+    def write_row(self, file_name, cols, row, mode='a', encoding=None):
+        writer = self.get_writer(file_name, cols, mode=mode, encoding=encoding)
+        writer.writerow(row)
+
+    def write_rows(self, file_name, cols, rows, mode='a', encoding=None):
+        writer = self.get_writer(file_name, cols, mode=mode, encoding=encoding)
+        return writer.writerows(rows)
+
+    def __contains__(self, file_name):
+        with self._lock:
+            return self.make_key(file_name) in self._writers
+
+    def __len__(self):
+        with self._lock:
+            return len(self._writers)
+
+    def flush(self):
+        with self._lock:
+            writers = list(self._writers.values())
+        for writer in writers:
+            writer.flush()
+
+    # 关闭指定文件（file_name为None时关闭全部）
+    def close(self, file_name=None):
+        with self._lock:
+            if file_name is None:
+                writers = list(self._writers.values())
+                self._writers.clear()
+            else:
+                writer = self._writers.pop(self.make_key(file_name), None)
+                writers = [writer] if writer is not None else []
+        for writer in writers:
+            writer.close()
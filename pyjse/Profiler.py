@@ -0,0 +1,104 @@
+# coding=utf-8
+
+import json
+from collections import deque
+from threading import Lock, local
+from time import perf_counter
+
+
+class BuiltinProfiler:
+    """
+    内置操作调用统计（按操作名统计调用次数、总/平均/p50/p99耗时，及参数解析/do_before/操作本身/do_after耗时拆分）
+    注：嵌套调用（如Call中执行的其他操作）的耗时计入外层操作的总耗时，另以self统计扣除嵌套调用后的耗时
+    """
+
+    DEFAULT_SAMPLES = 1000
+
+    def __init__(self, samples=DEFAULT_SAMPLES):
+        self._samples = samples
+        self._stats = {}
+        self._lock = Lock()
+        self._local = local()
+
+    def _get_frames(self):
+        frames = getattr(self._local, 'frames', None)
+        if frames is None:
+            frames = self._local.frames = []
+        return frames
+
+    # 开始一次操作调用，返回调用帧（[参数解析耗时, 嵌套调用耗时]）
+    def enter(self):
+        frame = [0.0, 0.0]
+        self._get_frames().append(frame)
+        return frame
+
+    # 当前调用帧的参数解析耗时
+    def get_parse_time(self):
+        frames = self._get_frames()
+        return frames[-1][0] if frames else 0.0
+
+    # 累计参数解析耗时（计入当前调用帧）
+    def add_parse_time(self, elapsed):
+        frames = self._get_frames()
+        if frames:
+            frames[-1][0] += elapsed
+
+    # 结束一次操作调用并记录
+    def leave(self, name, before, parse, func, after, ok=True):
+        frames = self._get_frames()
+        frame = frames.pop() if frames else [0.0, 0.0]
+        total = before + parse + func + after
+        if frames:
+            frames[-1][1] += total
+
+        with self._lock:
+            stat = self._stats.get(name)
+            if stat is None:
+                stat = self._stats[name] = {
+                    "count": 0,
+                    "errors": 0,
+                    "total": 0.0,
+                    "self": 0.0,
+                    "parse": 0.0,
+                    "before": 0.0,
+                    "func": 0.0,
+                    "after": 0.0,
+                    "max": 0.0,
+                    "samples": deque(maxlen=self._samples),
+                }
+            stat["count"] += 1
+            if not ok:
+                stat["errors"] += 1
+            stat["total"] += total
+            stat["self"] += total - frame[1]
+            stat["parse"] += parse
+            stat["before"] += before
+            stat["func"] += func
+            stat["after"] += after
+            if total > stat["max"]:
+                stat["max"] = total
+            stat["samples"].append(total)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    # 取得统计结果（按总耗时降序）
+    def get_profile(self):
+        with self._lock:
+            items = [(name, dict(stat, samples=sorted(stat["samples"]))) for name, stat in self._stats.items()]
+
+        profile = {}
+        for name, stat in sorted(items, key=lambda item: item[1]["total"], reverse=True):
+            samples = stat.pop("samples")
+            count = stat["count"]
+            stat["mean"] = stat["total"] / count if count else 0.0
+            stat["p50"] = samples[int(0.5 * (len(samples) - 1))] if samples else 0.0
+            stat["p99"] = samples[int(0.99 * (len(samples) - 1))] if samples else 0.0
+            profile[name] = stat
+        return profile
+
+    # 将统计结果写入JSON文件
+    def dump(self, file_name, encoding='utf-8'):
+        with open(file_name, mode='w', encoding=encoding) as fp:
+            json.dump(self.get_profile(), fp, indent=2)
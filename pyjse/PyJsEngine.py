@@ -1,21 +1,30 @@
 # coding=utf-8
 
 
+import io
+import re
 import traceback as tb
 import subprocess
 import types
 import csv
+import codecs
 from functools import partial
+from collections import OrderedDict
+from concurrent.futures import as_completed
 from threading import Lock
 from datetime import datetime, timezone
 from dateutil.relativedelta import relativedelta
-from time import strftime, strptime, time, localtime, sleep
+from time import strftime, strptime, time, localtime, sleep, perf_counter
 from copy import deepcopy
+from itertools import chain
 # from collections import ChainMap
 
-from jinja2 import Environment, ChoiceLoader, FileSystemLoader, Template
+from jinja2 import Environment, ChoiceLoader, FileSystemLoader, FileSystemBytecodeCache, Template
+from js2py.base import JsObjectWrapper
 
 from .PyJsEngineBase import PyJsEngineBase, get_method_name
+from .ArgsRules import args_rules
+from .OutputWriters import OutputWriterRegistry
 from .MiniUtils import *
 
 __version__ = "1.0.191024"
@@ -39,7 +48,9 @@ class PyJsEngine(PyJsEngineBase):
     funcn_get = "get"
     funcn_load_vars = "load_vars"
     funcn_load_data = "load_data"
+    funcn_load_data_parallel = "load_data_parallel"
     funcn_output = "output"
+    funcn_output_rows = "output_rows"
     funcn_template = "template"
     funcn_call_os_cmd = "call_os_cmd"
 
@@ -59,8 +70,18 @@ class PyJsEngine(PyJsEngineBase):
     attrn_content = "content"
     attrn__from_file = "_from_file"
     attrn__to_file = "_to_file"
+    attrn__to_key = "_to_key"
     attrn_cmd = "cmd"
     attrn_args = "args"
+    attrn_body = "body"
+    attrn_init = "init"
+    attrn_workers = "workers"
+    attrn_ordered = "ordered"
+    attrn_chunk_size = "chunk_size"
+    attrn_stream = "stream"
+    attrn_count = "count"
+    attrn_rows = "rows"
+    attrn_reload = "reload"
 
     REF_KEY_PREFIX = "__"
     SUB_SPLITTER = "."
@@ -79,6 +100,16 @@ class PyJsEngine(PyJsEngineBase):
     MVAR_LOADED_DATA_COLS = "__loaded_data_cols__"
     MVAR_LOG_DATETIME = "__log_datetime__"
 
+    DEFAULT_PARALLEL_CHUNK_SIZE = 200
+
+    LINE_COUNT_BUFSIZE = 1024 * 1024
+    LINE_COUNT_STRAY_QUOTE = re.compile(b'\0(?:(?<![,\r\n\0]\0)|(?![,\r\n\0]|\\Z))')
+    LINE_COUNT_CACHE_SIZE = 256
+    _line_count_cache = {}
+    _line_count_cache_lock = Lock()
+
+    DEFAULT_TEMPLATE_CACHE_SIZE = 128
+
     PREPARE_SCRIPT_MAIN = r"""
         function Next_(iterator) {
             var i;
@@ -103,6 +134,10 @@ class PyJsEngine(PyJsEngineBase):
         })
         # 用于存放过程
         self._proc_dict = dict()
+        # 已加载的模块（按文件绝对路径登记，文件修改时间及大小未变时不重复加载）及模块路径解析缓存
+        self._modules = dict()
+        self._module_paths = dict()
+        self._modules_lock = Lock()
         # 其他变量
         self._encoding = self.DEFAULT_ENCODING
         if msg_handler is None:
@@ -114,10 +149,21 @@ class PyJsEngine(PyJsEngineBase):
 
         # 2019-5-5
         self._j2_env = None  # Jinja2 environment
+        self._j2_bytecode_cache_dir = kwargs.get("template_bytecode_cache_dir")
+        self._j2_auto_reload = kwargs.get("template_auto_reload", True)
+        # 已编译的内联模板（content、key或文件对象来源），按模板源LRU缓存
+        self._template_cache = OrderedDict()
+        self._template_cache_lock = Lock()
+        self._template_cache_size = kwargs.get("template_cache_size", self.DEFAULT_TEMPLATE_CACHE_SIZE)
 
         # 2019-9-21
         self._output_lmap = {}
         self._output_lmap_lock = Lock()
+        self._output_sink = None
+        self._output_writers = OutputWriterRegistry(
+            flush_rows=kwargs.get("output_flush_rows", OutputWriterRegistry.DEFAULT_FLUSH_ROWS),
+            flush_interval=kwargs.get("output_flush_interval", OutputWriterRegistry.DEFAULT_FLUSH_INTERVAL),
+            buffer_size=kwargs.get("output_buffer_size", OutputWriterRegistry.DEFAULT_BUFFER_SIZE))
 
         self.register_context({
             # ---- Engine functions ----
@@ -137,7 +183,9 @@ class PyJsEngine(PyJsEngineBase):
             self.funcn_get: self.run_get,
             self.funcn_load_vars: self.run_load_vars,
             self.funcn_load_data: self.run_load_data,
+            self.funcn_load_data_parallel: self.run_load_data_parallel,
             self.funcn_output: self.run_output,
+            self.funcn_output_rows: self.run_output_rows,
             self.funcn_template: self.run_template,
             self.funcn_call_os_cmd: self.run_call_os_cmd,
             # ---- Python functions / modules ----
@@ -159,7 +207,7 @@ class PyJsEngine(PyJsEngineBase):
         # self._logger.debug(msg="registered_context={}".format(repr(self._registered_context)))  # debug
         self.append_prepare_script(self.PREPARE_SCRIPT_MAIN)
 
-        self._logger.debug(msg="pyjse loaded. ({})".format(__version__))
+        self._logger.debug("pyjse loaded. (%s)", __version__)
 
     @property
     def encoding(self):
@@ -173,9 +221,18 @@ class PyJsEngine(PyJsEngineBase):
     def msg_handler(self, mh):
         self._msg_handler = mh
 
+    @property
+    def output_sink(self):
+        return self._output_sink
+
+    @output_sink.setter
+    def output_sink(self, sink):
+        self._output_sink = sink
+
     def init_jinja2_env(self):
         """
         为Jinja2模板功能初始化一个Environment（使用FileSystemLoader加载器 从_path中的路径依次查找模板）
+        如指定了template_bytecode_cache_dir，则编译结果缓存到该目录，进程重启后无需重新编译
         """
 
         logger = self._logger
@@ -187,8 +244,14 @@ class PyJsEngine(PyJsEngineBase):
                 ]
                 cloader = ChoiceLoader(loaders)
 
-                self._j2_env = Environment(loader=cloader)
-                logger.debug(msg="[pyjse]<{}>: Jinja2 Environment initialized.".format(get_method_name()))
+                bytecode_cache = None
+                if self._j2_bytecode_cache_dir:
+                    os.makedirs(self._j2_bytecode_cache_dir, exist_ok=True)
+                    bytecode_cache = FileSystemBytecodeCache(self._j2_bytecode_cache_dir)
+
+                self._j2_env = Environment(loader=cloader, bytecode_cache=bytecode_cache,
+                                           auto_reload=self._j2_auto_reload)
+                logger.debug("[pyjse]<%s>: Jinja2 Environment initialized.", get_method_name())
             except Exception as e:
                 self._j2_env = None
                 self.internal_exception_handler(funcn=get_method_name(), e=e)
@@ -203,7 +266,7 @@ class PyJsEngine(PyJsEngineBase):
     def load(self, script, load_as_module=False):
         if isinstance(script, str):
             if load_as_module:
-                self.load_as_module(script)
+                self.load_module(script)
             else:
                 self._script = script
         else:
@@ -221,9 +284,11 @@ class PyJsEngine(PyJsEngineBase):
                 dirname = os.path.dirname(dirname)
                 # os.chdir(dirname)
                 # logger.debug(msg='OS change to script''s directory (%s)' % (dirname))
-                vars = self.get_vars()
-                vars[self.MVAR_SCRIPT_NAME] = os.path.splitext(base_name)[0]
-                vars[self.MVAR_WORKING_DIR] = dirname
+                self.create_js_context()
+                self.set_vars({
+                    self.MVAR_SCRIPT_NAME: os.path.splitext(base_name)[0],
+                    self.MVAR_WORKING_DIR: dirname,
+                })
                 self._path.clear()
                 self.add_to_path(os.path.abspath('.'))  # 最后：程序目录
                 self.add_to_path(dirname)  # 倒数第二：脚本目录
@@ -238,6 +303,19 @@ class PyJsEngine(PyJsEngineBase):
         script = self.read_from_string(source)
         self.load(script, load_as_module=load_as_module)
 
+    # 重置脚本状态（清空__vars__、已定义的过程及模块，关闭Output打开的文件并清除模板缓存）
+    def reset_state(self):
+        super().reset_state()
+        context = self.context
+        for proc_name in self._proc_dict.keys():
+            context[proc_name.capitalize()] = None
+        self._proc_dict.clear()
+        # 模块中定义的过程已清除，需重新加载
+        self.clear_modules()
+        self.close_outputs()
+        self._output_sink = None
+        self.clear_template_cache()
+
     def send_msg_to_handler(self, msg, **kwargs):
         logger = self._logger
 
@@ -253,16 +331,15 @@ class PyJsEngine(PyJsEngineBase):
     # 脚本内部异常处理（可被覆写）
     def internal_exception_handler(self, funcn=None, jskwargs=None, args=None, e=None, ignore_err=False):
         logger = self._logger
-        logger.error(msg="[pyjse]<{}>: {}".format(funcn, str(e)))
-        logger.debug(msg="------Traceback------\n" + tb.format_exc())
+        logger.error("[pyjse]<%s>: %s", funcn, e)
+        logger.debug("------Traceback------\n%s", tb.format_exc())
         if e is not None and not ignore_err:
             raise e
 
     # 生成日志时间
     def generate_log_datetime(self, jskwargs, *args):
         _log_datetime = strftime("%Y-%m-%d %H:%M:%S")
-        vars = self.get_vars()
-        vars[self.MVAR_LOG_DATETIME] = _log_datetime
+        self.set_var(self.MVAR_LOG_DATETIME, _log_datetime)
 
         return _log_datetime
 
@@ -279,12 +356,13 @@ class PyJsEngine(PyJsEngineBase):
 
         return None
 
+    @args_rules({
+        attrn_msg: ('msg', 's', None),
+    })
     def do_before(self, jskwargs, *args):
         super().do_before(jskwargs, *args)
 
-        jargs = self.args_parser(jskwargs, {
-            self.attrn_msg: ('msg', 's', None),
-        })
+        jargs = self.args_parser(jskwargs, PyJsEngine.do_before.args_rules)
         msg = jargs['msg']
 
         self.generate_log_datetime(jskwargs, *args)
@@ -301,13 +379,13 @@ class PyJsEngine(PyJsEngineBase):
             }
         return super().args_parser(jskwargs, rules)
 
-    def wrapped_method(self, jskwargs, *args, func=None):
+    def wrapped_method(self, jskwargs, *args, func=None, name=None):
         if func == self.run_msg and isinstance(jskwargs, str):
             # 兼容第一参数为字符串类型的操作
             jskwargs = {
                 self.attrn_msg: jskwargs,
             }
-        return super().wrapped_method(jskwargs, *args, func=func)
+        return super().wrapped_method(jskwargs, *args, func=func, name=name)
 
     # 操作：消息 msg
     def run_msg(self, jskwargs, *args):
@@ -324,24 +402,24 @@ class PyJsEngine(PyJsEngineBase):
 
         # 处理
         try:
-            logger.debug(msg="[pyjse]<{}>: sub-script entered.".format(get_method_name()))
+            logger.debug("[pyjse]<%s>: sub-script entered.", get_method_name())
             result = args[0]()
-            logger.debug(
-                msg="[pyjse]<{}>: sub-script exited (result={}).".format(get_method_name(), format(result)))
+            logger.debug("[pyjse]<%s>: sub-script exited (result=%s).", get_method_name(), result)
             return result
         except Exception as e:
             self.internal_exception_handler(funcn=get_method_name(), jskwargs=jskwargs, args=args, e=e, ignore_err=True)
             return None
 
     # 操作：断言
+    @args_rules({
+        attrn_key: ('key', 's', None),
+        attrn_value: ('value', 's', None)
+    })
     def run_assert(self, jskwargs, *args):
         logger = self._logger
 
         # 属性
-        jargs = self.args_parser(jskwargs, {
-            self.attrn_key: ('key', 's', None),
-            self.attrn_value: ('value', 's', None)
-        })
+        jargs = self.args_parser(jskwargs, PyJsEngine.run_assert.args_rules)
         key = (jargs['key'] or '').strip()
         value = jargs['value']
 
@@ -369,23 +447,22 @@ class PyJsEngine(PyJsEngineBase):
                 if not my_assert(_value, value):
                     return False
                 return True
-            logger.debug(
-                "[pyjse]<{}>: assert value: {} (compare with value: {})".format(get_method_name(),
-                                                                                     repr(_value), repr(value)))
+            logger.debug("[pyjse]<%s>: assert value: %r (compare with value: %r)", get_method_name(), _value, value)
 
             return my_assert(_value, value)
         except Exception as e:
             self.internal_exception_handler(funcn=get_method_name(), jskwargs=jskwargs, args=args, e=e)
 
     # 操作：否定断言
+    @args_rules({
+        attrn_key: ('key', 's', None),
+        attrn_value: ('value', 's', None)
+    })
     def run_assert_not(self, jskwargs, *args):
         logger = self._logger
 
         # 属性
-        jargs = self.args_parser(jskwargs, {
-            self.attrn_key: ('key', 's', None),
-            self.attrn_value: ('value', 's', None)
-        })
+        jargs = self.args_parser(jskwargs, PyJsEngine.run_assert_not.args_rules)
         key = (jargs['key'] or '').strip()
         value = jargs['value']
 
@@ -413,49 +490,130 @@ class PyJsEngine(PyJsEngineBase):
                 if not my_assert_not(_value, value):
                     return False
                 return True
-            logger.debug(
-                "[pyjse]<{}>: assert value: {} (compare with value: {})".format(get_method_name(),
-                                                                                     repr(_value), repr(value)))
+            logger.debug("[pyjse]<%s>: assert value: %r (compare with value: %r)", get_method_name(), _value, value)
 
             return my_assert_not(_value, value)
         except Exception as e:
             self.internal_exception_handler(funcn=get_method_name(), jskwargs=jskwargs, args=args, e=e)
 
     # 操作：预加载模块
+    @args_rules({
+        attrn_src: ('src', 's', None),
+        attrn_reload: ('reload', 'b', False),
+    })
     def run_module(self, jskwargs, *args):
         logger = self._logger
 
         # 属性
-        jargs = self.args_parser(jskwargs, {
-            self.attrn_src: ('src', 's', None)
-        })
+        jargs = self.args_parser(jskwargs, PyJsEngine.run_module.args_rules)
         src = jargs['src']
-        try:
-            # 特别操作：按顺序检查不加扩展名、加扩展名是否能找到；其中每次按path顺序检查是否能找到
-            for ext in self.EXT_NAME_SET:
-                esrc = src + ext
-                for dir in self._path:
-                    nsrc = os.path.join(dir, esrc)
-                    if os.path.exists(nsrc):
-                        src = nsrc
-                        break
-        except:
-            pass
+        reload = jargs['reload']
 
         # 处理
         try:
-            self.load_from_file(src, load_as_module=True)
+            path = self.resolve_module_path(src)
+            if not reload and self.is_module_loaded(path):
+                logger.debug("[pyjse]<%s>: module already loaded. (%s)", get_method_name(), path)
+                return
+
+            # 先登记再加载（模块间循环引用时不重复加载）
+            self.register_module(src, path)
+            t = perf_counter()
+            try:
+                self.load_from_file(path, load_as_module=True)
+            except Exception:
+                self.unregister_module(path)
+                raise
+            self.update_module_load_time(path, perf_counter() - t)
         except Exception as e:
             self.internal_exception_handler(funcn=get_method_name(), jskwargs=jskwargs, args=args, e=e)
 
+    # 解析模块文件路径：按顺序检查不加扩展名、加扩展名是否能找到；其中每次按path顺序检查（结果按src及path缓存）
+    def resolve_module_path(self, src):
+        cache_key = (src, tuple(self._path))
+        with self._modules_lock:
+            path = self._module_paths.get(cache_key)
+        if path is not None and os.path.isfile(path):
+            return path
+
+        path = src
+        for ext in sorted(self.EXT_NAME_SET):
+            esrc = src + ext
+            found = None
+            for dir in self._path:
+                nsrc = os.path.join(dir, esrc)
+                if os.path.isfile(nsrc):
+                    found = nsrc
+                    break
+            if found is not None:
+                path = found
+                break
+        path = os.path.abspath(path)
+
+        with self._modules_lock:
+            self._module_paths[cache_key] = path
+        return path
+
+    @staticmethod
+    def get_file_signature(path):
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+
+    # 模块是否已加载（文件修改时间或大小变化时视为未加载）
+    def is_module_loaded(self, path):
+        with self._modules_lock:
+            module = self._modules.get(path)
+        if module is None:
+            return False
+        try:
+            return self.get_file_signature(path) == (module['mtime_ns'], module['size'])
+        except OSError:
+            return False
+
+    def register_module(self, src, path):
+        mtime_ns, size = self.get_file_signature(path)
+        with self._modules_lock:
+            module = self._modules.get(path)
+            load_count = module['load_count'] if module is not None else 0
+            self._modules[path] = {
+                'src': src,
+                'path': path,
+                'mtime_ns': mtime_ns,
+                'size': size,
+                'loaded_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f"),
+                'load_count': load_count + 1,
+                'elapsed': None,
+            }
+
+    def unregister_module(self, path):
+        with self._modules_lock:
+            self._modules.pop(path, None)
+
+    def update_module_load_time(self, path, elapsed):
+        with self._modules_lock:
+            module = self._modules.get(path)
+            if module is not None:
+                module['elapsed'] = elapsed
+
+    # 取得已加载的模块列表（按加载顺序）
+    def get_loaded_modules(self):
+        with self._modules_lock:
+            return [dict(module) for module in self._modules.values()]
+
+    # 清除已加载模块登记（之后Module将重新加载）
+    def clear_modules(self):
+        with self._modules_lock:
+            self._modules.clear()
+
     # 操作：定义过程
+    @args_rules({
+        attrn_name: ('proc_name', 'sr', None)
+    })
     def run_procedure(self, jskwargs, *args):
         logger = self._logger
 
         # 属性
-        jargs = self.args_parser(jskwargs, {
-            self.attrn_name: ('proc_name', 'sr', None)
-        })
+        jargs = self.args_parser(jskwargs, PyJsEngine.run_procedure.args_rules)
         proc_name = (jargs['proc_name'] or '').strip()
 
         # 处理
@@ -469,20 +627,21 @@ class PyJsEngine(PyJsEngineBase):
                     proc_dict[proc_name] = func
                     context[proc_name.capitalize()] = func
 
-                logger.debug(msg="[pyjse]<{}>: proc_names={} defined.".format(get_method_name(), repr(proc_names)))
+                logger.debug("[pyjse]<%s>: proc_names=%r defined.", get_method_name(), proc_names)
             else:
                 raise ValueError("proc_name={} name illegal!".format(repr(proc_name)))
         except Exception as e:
             self.internal_exception_handler(funcn=get_method_name(), jskwargs=jskwargs, args=args, e=e)
 
     # 操作：调用过程
+    @args_rules({
+        attrn_name: ('proc_name', 's', None),
+    })
     def run_call(self, jskwargs, *args):
         logger = self._logger
 
         # 属性
-        jargs = self.args_parser(jskwargs, {
-            self.attrn_name: ('proc_name', 's', None),
-        })
+        jargs = self.args_parser(jskwargs, PyJsEngine.run_call.args_rules)
         proc_name = (jargs['proc_name'] or '').strip()
 
         # 处理
@@ -491,7 +650,7 @@ class PyJsEngine(PyJsEngineBase):
             if isinstance(proc_name, str) and proc_name != '':
                 func = proc_dict.get(proc_name)
                 if func is not None:
-                    logger.debug(msg="[pyjse]<{}>: proc_name={} found!".format(get_method_name(), repr(proc_name)))
+                    logger.debug("[pyjse]<%s>: proc_name=%r found!", get_method_name(), proc_name)
 
                     # 传递参数至要call的procedure
                     new_jargs = deepcopy(jargs)
@@ -509,13 +668,14 @@ class PyJsEngine(PyJsEngineBase):
             self.internal_exception_handler(funcn=get_method_name(), jskwargs=jskwargs, args=args, e=e)
 
     # 操作：调用过程（根据变量条件）
+    @args_rules({
+        attrn_name: ('proc_name', 's', None),
+    })
     def run_cond_call(self, jskwargs, *args):
         logger = self._logger
 
         # 属性
-        jargs = self.args_parser(jskwargs, {
-            self.attrn_name: ('proc_name', 's', None),
-        })
+        jargs = self.args_parser(jskwargs, PyJsEngine.run_cond_call.args_rules)
         proc_name = (jargs['proc_name'] or '').strip()
 
         # 处理
@@ -533,49 +693,88 @@ class PyJsEngine(PyJsEngineBase):
         except Exception as e:
             self.internal_exception_handler(funcn=get_method_name(), jskwargs=jskwargs, args=args, e=e)
 
+    # 取得编译后的模板（按模板源缓存，超出容量时淘汰最久未用的模板）
+    def get_compiled_template(self, template_str):
+        with self._template_cache_lock:
+            template = self._template_cache.get(template_str)
+            if template is not None:
+                self._template_cache.move_to_end(template_str)
+                return template
+
+        template = Template(template_str)
+        with self._template_cache_lock:
+            self._template_cache[template_str] = template
+            while len(self._template_cache) > self._template_cache_size:
+                self._template_cache.popitem(last=False)
+        return template
+
+    # 清除已编译的模板缓存
+    def clear_template_cache(self):
+        with self._template_cache_lock:
+            self._template_cache.clear()
+
     # 操作：渲染模板
+    @args_rules({
+        attrn_key: ('key', 's', None),
+        attrn__from_file: ('_from_file', 's', None),
+        attrn__to_file: ('_to_file', 's', None),
+        attrn__to_key: ('_to_key', 's', None),
+        attrn_content: ('content', 's', None),
+        attrn_encoding: ('encoding', 's', None),
+        attrn_stream: ('stream', 'b', False),
+    })
     def run_template(self, jskwargs, *args):
         logger = self._logger
 
         # 属性
-        jargs = self.args_parser(jskwargs, {
-            self.attrn_key: ('key', 's', None),
-            self.attrn__from_file: ('_from_file', 's', None),
-            self.attrn__to_file: ('_to_file', 's', None),
-            self.attrn_content: ('content', 's', None),
-            self.attrn_encoding: ('encoding', 's', None),
-        })
+        jargs = self.args_parser(jskwargs, PyJsEngine.run_template.args_rules)
+        # _from_file/_to_file为文件对象时直接使用原始值（按字串解析会得到Python的repr）
+        raw_kwargs = self.args_parser_all(jskwargs)
+        if isinstance(raw_kwargs, dict):
+            for attrn, name in ((self.attrn__from_file, '_from_file'), (self.attrn__to_file, '_to_file')):
+                v = raw_kwargs.get(attrn)
+                if v is not None and not isinstance(v, str):
+                    jargs[name] = v
         key = (jargs['key'] or '').strip()
         _from_file = jargs['_from_file']
         _to_file = jargs['_to_file']
         _to_key = jargs['_to_key']
         content = jargs['content']
         encoding = jargs['encoding'] or self._encoding
+        # 流式渲染：仅在输出到_to_file且无需_to_key时生效，分块写入文件，不生成完整结果字串（返回None）
+        stream = jargs['stream'] and _to_file is not None and not _to_key
 
         # 处理
         try:
+            # 文件参数可为路径或文件对象（_from_file需有read()，_to_file需有write()）
+            if _from_file is not None and not isinstance(_from_file, str) and not hasattr(_from_file, 'read'):
+                raise ValueError("_from_file illegal!")
+            if _to_file is not None and not isinstance(_to_file, str) and not hasattr(_to_file, 'write'):
+                raise ValueError("_to_file illegal!")
+
             vars_dict = self.get_vars_dict()
             fp = None
             template_str = None
             template = None
+            from_real_file = False
             if isinstance(key, str) and key != '':
-                template_str = self.engine_get_var(vars_dict, key)
+                template_str = vars_dict.get(key)
+                if template_str is None:
+                    raise ValueError("key={!r} not found!".format(key))
+                template_str = str(template_str)
             elif isinstance(content, str):
                 template_str = content
             elif _from_file is not None:
                 # 支持引用io变量，故在此不限制它是str类型！
-                from_real_file = False
                 if isinstance(_from_file, str):
                     # 先尝试从jinja2 env加载文件
                     env = self._j2_env
                     try:
                         template = env.get_template(_from_file)
-                        logger.debug("[pyjse]<{}>: Template loaded with env.".format(get_method_name()))
+                        logger.debug("[pyjse]<%s>: Template loaded with env.", get_method_name())
                     except Exception as e:
                         template = None
-                        logger.debug("[pyjse]<{}>: Loading template with env failed! ({})".format(
-                            get_method_name(),
-                            str(e)))
+                        logger.debug("[pyjse]<%s>: Loading template with env failed! (%s)", get_method_name(), e)
                     if template is None:
                         fp = open(_from_file, "r", encoding=encoding)
                         from_real_file = True
@@ -583,20 +782,35 @@ class PyJsEngine(PyJsEngineBase):
                     fp = _from_file
 
             if template is None:
+                if template_str is None:
+                    try:
+                        template_str = fp.read()
+                    finally:
+                        if from_real_file:
+                            fp.close()
+                logger.debug("[pyjse]<%s>: template_str=%r", get_method_name(), template_str)
+                template = self.get_compiled_template(template_str)
+
+            if stream:
+                to_real_file = False
+                if isinstance(_to_file, str):
+                    fp = open(_to_file, "w", encoding=encoding)
+                    to_real_file = True
+                else:
+                    fp = _to_file
                 try:
-                    template_str = fp.read()
+                    template.stream(**vars_dict).dump(fp)
                 finally:
-                    if from_real_file:
+                    if to_real_file:
                         fp.close()
-                logger.debug("[pyjse]<{}>: template_str={}".format(get_method_name(), repr(template_str)))
-                template = Template(template_str)
+                logger.debug("[pyjse]<%s>: template streamed to %r", get_method_name(), _to_file)
+                return None
 
-            vars_dict = self.get_vars_dict()
             template_render_result = template.render(**vars_dict)
             # logger.debug("[pyjse]<{}>: template_render_result={}".format(get_method_name(), repr(template_render_result)))
-            logger.debug("[pyjse]<{}>: len(template_render_result)={}".format(
-                get_method_name(),
-                len(template_render_result) if template_render_result is not None else -1))
+            logger.debug(
+                "[pyjse]<%s>: len(template_render_result)=%s",
+                get_method_name(), len(template_render_result) if template_render_result is not None else -1)
 
             # 输出
             if _to_file is not None:
@@ -612,42 +826,42 @@ class PyJsEngine(PyJsEngineBase):
                 finally:
                     if to_real_file:
                         fp.close()
+            if _to_key:
+                self.set_var(_to_key, template_render_result)
             return template_render_result
         except Exception as e:
             self.internal_exception_handler(funcn=get_method_name(), jskwargs=jskwargs, args=args, e=e)
 
     # 操作：定义变量
+    @args_rules({
+        attrn_type: ('set_type', 's', SET_TYPE_VALUE),
+        attrn_key: ('key', 's', None),
+        attrn_value: ('value', 's', None),
+    })
     def run_set(self, jskwargs, *args):
         logger = self._logger
 
         # 属性
-        jargs = self.args_parser(jskwargs, {
-            self.attrn_type: ('set_type', 's', self.SET_TYPE_VALUE),
-            self.attrn_key: ('key', 's', None),
-            self.attrn_value: ('value', 's', None),
-        })
+        jargs = self.args_parser(jskwargs, PyJsEngine.run_set.args_rules)
         set_type = jargs['set_type']
         key = (jargs['key'] or '').strip()
         value = jargs['value'] or None
 
         # 处理
         try:
-            vars = self.get_vars()
             if isinstance(key, str) and key != '':
-                logger.debug(
-                    "[pyjse]<{}>: setting {}({})...".format(get_method_name(), repr(key), repr(set_type)))
+                logger.debug("[pyjse]<%s>: setting %r(%r)...", get_method_name(), key, set_type)
                 if set_type == self.SET_TYPE_OBJECT:
                     value = args[0]()
-                    vars[key] = value
+                    self.set_var(key, value)
                 elif set_type == self.SET_TYPE_EVAL:
                     value = eval(value)
-                    vars[key] = value
+                    self.set_var(key, value)
                 elif set_type == self.SET_TYPE_VALUE:
-                    vars[key] = value
+                    self.set_var(key, value)
                 else:
                     raise ValueError("set_type illegal!")
-                logger.debug("[pyjse]<{}>: value={}, type(value)={}".format(get_method_name(),
-                                                                                 repr(value), repr(type(value))))
+                logger.debug("[pyjse]<%s>: value=%r, type(value)=%r", get_method_name(), value, type(value))
             else:
                 raise ValueError("key name illegal!")
         except Exception as e:
@@ -662,11 +876,10 @@ class PyJsEngine(PyJsEngineBase):
 
         # 处理
         try:
-            vars = self.get_vars()
             tmp_dict = {}
             for k, v in jargs.items():
                 if funcn in {self.funcn_set_int, self.funcn_set_num, self.funcn_set_str, }:
-                    v = self.var_replacer(str(v), vars=vars) if v is not None else None
+                    v = self.var_replacer(str(v)) if v is not None else None
                     # v = self.var_replacer(v, vars=vars) if isinstance(v, str) else None
                     # v = self.var_replacer(v, vars=vars) if v is not None else None
                     if funcn == self.funcn_set_int:
@@ -683,22 +896,22 @@ class PyJsEngine(PyJsEngineBase):
                 else:
                     raise RuntimeError()
                 tmp_dict[k] = v
-                logger.debug("[pyjse]<{}>: preparing {} = {} ...".format(get_method_name(), repr(k), repr(v)))
+                logger.debug("[pyjse]<%s>: preparing %r = %r ...", get_method_name(), k, v)
             # 检查到全部变量定义不存在问题，才执行update进行更新
-            for k, v in tmp_dict.items():
-                vars[k] = v
+            self.set_vars(tmp_dict)
         except Exception as e:
             self.internal_exception_handler(funcn=get_method_name(), jskwargs=jskwargs, args=args, e=e)
 
     # 操作：取得变量
+    @args_rules({
+        attrn_key: ('key', 's', None),
+        attrn_default_value: ('defvalue', 's', None),
+    })
     def run_get(self, jskwargs, *args):
         logger = self._logger
 
         # 属性
-        jargs = self.args_parser(jskwargs, {
-            self.attrn_key: ('key', 's', None),
-            self.attrn_default_value: ('defvalue', 's', None),
-        })
+        jargs = self.args_parser(jskwargs, PyJsEngine.run_get.args_rules)
         key = (jargs['key'] or '').strip()
         defvalue = jargs['defvalue']
 
@@ -707,11 +920,9 @@ class PyJsEngine(PyJsEngineBase):
             vars_dict = self.get_vars_dict()
             # vars_dict = self.get_vars_dict()
             if isinstance(key, str) and key != '':
-                logger.debug(
-                    "[pyjse]<{}>: getting {}...".format(get_method_name(), repr(key)))
+                logger.debug("[pyjse]<%s>: getting %r...", get_method_name(), key)
                 value = vars_dict.get(key, defvalue)
-                logger.debug("[pyjse]<{}>: value={}, type(value)={}".format(get_method_name(),
-                                                                                 repr(value), repr(type(value))))
+                logger.debug("[pyjse]<%s>: value=%r, type(value)=%r", get_method_name(), value, type(value))
 
                 return value
             elif defvalue is not None:
@@ -721,33 +932,105 @@ class PyJsEngine(PyJsEngineBase):
         except Exception as e:
             self.internal_exception_handler(funcn=get_method_name(), jskwargs=jskwargs, args=args, e=e)
 
-    # 统计文本文件行数
-    @staticmethod
-    def count_file_lines(file_name, encoding=None):
-        count = -1
-        if encoding:
-            with open(file_name, mode='rU', encoding=encoding) as fp:
-                for count, line in enumerate(fp):
+    # 统计文本文件行数（二进制分块读取；csv_quoting为True时不统计CSV引号内的换行；结果按路径、大小及修改时间缓存）
+    @classmethod
+    def count_file_lines(cls, file_name, encoding=None, csv_quoting=True):
+        st = os.stat(file_name)
+        key = (os.path.abspath(file_name), st.st_size, st.st_mtime_ns, encoding, csv_quoting)
+        with cls._line_count_cache_lock:
+            count = cls._line_count_cache.get(key)
+        if count is not None:
+            return count
+
+        if encoding and codecs.lookup(encoding).name.startswith(('utf-16', 'utf-32')):
+            # 非ASCII兼容编码无法按字节统计，退回文本方式
+            count = 0
+            with open(file_name, mode='r', newline='' if csv_quoting else None, encoding=encoding) as fp:
+                for count, line in enumerate(csv.reader(fp) if csv_quoting else fp, 1):
                     pass
         else:
-            with open(file_name, mode='rU') as fp:
-                for count, line in enumerate(fp):
-                    pass
-        count += 1
+            with open(file_name, mode='rb') as fp:
+                count = cls.count_bytes_lines(fp, csv_quoting=csv_quoting)
+
+        with cls._line_count_cache_lock:
+            if len(cls._line_count_cache) >= cls.LINE_COUNT_CACHE_SIZE:
+                cls._line_count_cache.clear()
+            cls._line_count_cache[key] = count
+        return count
+
+    # 统计二进制文件对象中的行数（末行无换行符时也计为一行；支持\n、\r\n及\r换行）
+    # 按字节统计引号外的换行符（引号内外状态跨块保持）；仅在出现不位于字段首尾的引号、NUL字节或引号未闭合等
+    # 难以按字节判断的情况时，回到起始位置按CSV记录（csv_quoting为False时按文本行）统计
+    @classmethod
+    def count_bytes_lines(cls, fp, csv_quoting=True):
+        start = fp.tell()
+        count = 0
+        in_quote = False
+        tail = b'\n'  # 上一块引号外内容的末字节（引号段以\0表示）
+        last = b''
+        while True:
+            chunk = fp.read(cls.LINE_COUNT_BUFSIZE)
+            if not chunk:
+                break
+            last = chunk[-1:]
+            text = chunk
+            if csv_quoting:
+                if b'\0' in chunk:
+                    count = None
+                    break
+                parts = chunk.split(b'"')
+                if len(parts) > 1 or in_quote:
+                    # 引号段以\0代替：引号段前后须为分隔符、换行符或另一引号段（""转义），否则为字段中间的引号
+                    end_in_quote = in_quote != (len(parts) % 2 == 0)
+                    text = b'\0'.join(parts[1::2] if in_quote else parts[0::2])
+                    head = b'\0' if in_quote else tail
+                    if cls.LINE_COUNT_STRAY_QUOTE.search(b'\n' + head + text + (b'\0' if end_in_quote else b'')):
+                        count = None
+                        break
+                    in_quote = end_in_quote
+                elif tail == b'\0' and chunk[:1] not in b',\r\n':
+                    count = None
+                    break
+            count += text.count(b'\n') + text.count(b'\r') - text.count(b'\r\n')
+            if tail == b'\r' and text[:1] == b'\n':
+                count -= 1  # \r\n跨块
+            if in_quote:
+                tail = b'\0'
+            elif text:
+                tail = text[-1:]
+        if count is None or in_quote:
+            fp.seek(start)
+            return cls.count_text_lines(fp, csv_quoting=csv_quoting)
+        if last and last not in b'\r\n':
+            count += 1
+        return count
+
+    # 按文本方式统计行数（以latin-1逐块解码：各ASCII兼容编码中引号、逗号及换行符的字节均不变）
+    @staticmethod
+    def count_text_lines(fp, csv_quoting=True):
+        count = 0
+        tp = io.TextIOWrapper(fp, encoding='latin-1', newline='' if csv_quoting else None)
+        try:
+            lines = csv.reader(tp) if csv_quoting else tp
+            for count, line in enumerate(lines, 1):
+                pass
+        finally:
+            tp.detach()
         return count
 
     # 操作：加载变量清单
+    @args_rules({
+        attrn_type: ('file_type', 's', None),
+        attrn_name: ('file_name', 's', None),
+        attrn_encoding: ('encoding', 's', None),
+        attrn_auto_strip: ('auto_strip', 'b', True),
+        attrn_allow_none: ('allow_none', 'b', False)
+    })
     def run_load_vars(self, jskwargs, *args):
         logger = self._logger
 
         # 属性
-        jargs = self.args_parser(jskwargs, {
-            self.attrn_type: ('file_type', 's', None),
-            self.attrn_name: ('file_name', 's', None),
-            self.attrn_encoding: ('encoding', 's', None),
-            self.attrn_auto_strip: ('auto_strip', 'b', True),
-            self.attrn_allow_none: ('allow_none', 'b', False)
-        })
+        jargs = self.args_parser(jskwargs, PyJsEngine.run_load_vars.args_rules)
         file_type = jargs['file_type'] or self.FILE_TYPE_CSV
         file_name = (jargs['file_name'] or '')  # .strip()
         encoding = jargs['encoding'] or self._encoding
@@ -764,8 +1047,7 @@ class PyJsEngine(PyJsEngineBase):
 
         # 处理
         try:
-            vars = self.get_vars()
-            logger.debug(msg="[pyjse]<{}>: loading vars started! ({})".format(get_method_name(), file_name))
+            logger.debug("[pyjse]<%s>: loading vars started! (%s)", get_method_name(), file_name)
             if isinstance(file_name, str) and file_name != '':
                 if file_type == self.FILE_TYPE_CSV:
                     fp = None
@@ -778,19 +1060,13 @@ class PyJsEngine(PyJsEngineBase):
                         for nr, r in enumerate(cr):
                             if len(r) <= 0 or len([1 for i in r if i is not None]) <= 0:
                                 # 跳过完全空行
-                                logger.info(
-                                    msg="[pyjse]<{}>: skipping empty row... ({})".format(
-                                        get_method_name(),
-                                        str(nr + 1)))
+                                logger.info("[pyjse]<%s>: skipping empty row... (%s)", get_method_name(), nr + 1)
                                 continue
 
                             # 处理变量名
                             var_name = r[0]
                             if not var_name:
-                                logger.info(
-                                    msg="[pyjse]<{}>: skipping empty var name... ({})".format(
-                                        get_method_name(),
-                                        str(nr + 1)))
+                                logger.info("[pyjse]<%s>: skipping empty var name... (%s)", get_method_name(), nr + 1)
                                 continue
                             var_name = var_name.strip()
                             # 处理变量值
@@ -802,11 +1078,10 @@ class PyJsEngine(PyJsEngineBase):
                                     var_value = var_value.strip()
 
                             # 存入变量字典
-                            vars[var_name] = var_value
+                            self.set_var(var_name, var_value)
                             logger.info(
-                                msg="[pyjse]<{}>: var stored! ({} -> {}) ({})".format(
-                                    get_method_name(),
-                                    repr(var_name), repr(var_value), str(nr + 1)))
+                                "[pyjse]<%s>: var stored! (%r -> %r) (%s)",
+                                get_method_name(), var_name, var_value, nr + 1)
                     except Exception as e:
                         raise e
                     finally:
@@ -817,89 +1092,112 @@ class PyJsEngine(PyJsEngineBase):
                     raise ValueError("file type illegal!")
             else:
                 raise ValueError("file name illegal!")
-            logger.debug(msg="[pyjse]<{}>: loading vars finished! ({})".format(get_method_name(), file_name))
+            logger.debug("[pyjse]<%s>: loading vars finished! (%s)", get_method_name(), file_name)
         except Exception as e:
             self.internal_exception_handler(funcn=get_method_name(), jskwargs=jskwargs, args=args, e=e)
 
     def load_data_file(self, file_name, file_type=FILE_TYPE_CSV, encoding=None, **kwargs):
         logger = self._logger
         encoding = encoding or self._encoding
-        data_list = []
-        fieldnames = []
 
         if file_type == self.FILE_TYPE_CSV:
-            auto_strip = kwargs.get('auto_strip')
-            allow_none = kwargs.get('allow_none')
-
             count = max(self.count_file_lines(file_name, encoding=encoding) - 1, 0)
-            logger.info(msg="[pyjse]<{}>: lines count: {}".format(get_method_name(), str(count)))
+            logger.info("[pyjse]<%s>: lines count: %s", get_method_name(), count)
 
-            fp = None
-            try:
-                if encoding:
-                    fp = open(file_name, mode='r', newline='', encoding=encoding)
-                else:
-                    fp = open(file_name, mode='r', newline='')
-                cdr = csv.DictReader(fp)
-                fieldnames = cdr.fieldnames
-                fieldnames = [k.replace(',', '_') for k in fieldnames]  # 将字段名中的英文逗号替换为“_”
-                for nd, d in enumerate(cdr):
-                    flag = True
-                    if len(d) <= 0 or len([1 for a, b in d.items() if b is not None]) <= 0:
-                        # 跳过完全空行
-                        logger.info(
-                            msg="[pyjse]<{}>: skipping empty row... ({}/{})".format(
-                                get_method_name(),
-                                str(nd + 1),
-                                str(count)))
-                        continue
-                    d = {k.replace(',', '_'): v for k, v in d.items()}  # 将字段名中的英文逗号替换为“_”
-
-                    new_d = d
-                    if auto_strip or allow_none:
-                        # 2018-5-4：新增开关 auto_strip自动裁剪 allow_none允许空值（不转换为空串）
-                        new_d = {}
-                        for k, v in d.items():
-                            new_k = k
-                            new_v = v
-                            if not allow_none and new_v is None:
-                                new_v = ''
-                            if auto_strip and isinstance(new_v, str):
-                                new_v = new_v.strip()
-                            new_d[new_k] = new_v
-
-                    # 2019-9-17：排除MVAR字段名，避免MVAR被覆盖（包括权限设置等）
-                    new_d = {k: v for k, v in new_d.items() if k not in self.MVAR_SET}
-
-                    data_list.append(new_d)
-            except Exception as e:
-                raise e
-            finally:
-                # 关闭文件
-                if fp:
-                    fp.close()
+            data_iter, fieldnames = self.open_data_file(file_name, file_type=file_type, encoding=encoding, count=count,
+                                                        **kwargs)
+            data_list = list(data_iter)
         else:
             raise ValueError("file type illegal!")
 
         return data_list, fieldnames, count
 
+    # 打开数据文件，返回（逐行按需解析的数据迭代器, 字段名列表）；迭代结束时关闭文件
+    def open_data_file(self, file_name, file_type=FILE_TYPE_CSV, encoding=None, count=0, **kwargs):
+        encoding = encoding or self._encoding
+
+        if file_type != self.FILE_TYPE_CSV:
+            raise ValueError("file type illegal!")
+
+        if encoding:
+            fp = open(file_name, mode='r', newline='', encoding=encoding)
+        else:
+            fp = open(file_name, mode='r', newline='')
+        try:
+            cdr = csv.DictReader(fp)
+            fieldnames = [k.replace(',', '_') for k in cdr.fieldnames]  # 将字段名中的英文逗号替换为“_”
+            cdr.fieldnames = fieldnames
+        except Exception as e:
+            fp.close()
+            raise e
+
+        data_iter = self.iter_data_rows(fp, cdr, count=count,
+                                        auto_strip=kwargs.get('auto_strip'), allow_none=kwargs.get('allow_none'))
+        return data_iter, fieldnames
+
+    def iter_data_rows(self, fp, reader, count=0, auto_strip=None, allow_none=None):
+        logger = self._logger
+
+        # 2019-9-17：排除MVAR字段名，避免MVAR被覆盖（包括权限设置等）
+        excluded_keys = self.MVAR_SET.intersection(reader.fieldnames)
+        try:
+            for nd, d in enumerate(reader):
+                if len(d) <= 0 or len([1 for a, b in d.items() if b is not None]) <= 0:
+                    # 跳过完全空行
+                    logger.info("[pyjse]<%s>: skipping empty row... (%s/%s)", get_method_name(), nd + 1, count)
+                    continue
+
+                new_d = d
+                if auto_strip or allow_none:
+                    # 2018-5-4：新增开关 auto_strip自动裁剪 allow_none允许空值（不转换为空串）
+                    new_d = {}
+                    for k, v in d.items():
+                        if not allow_none and v is None:
+                            v = ''
+                        if auto_strip and isinstance(v, str):
+                            v = v.strip()
+                        new_d[k] = v
+
+                if excluded_keys:
+                    new_d = {k: v for k, v in new_d.items() if k not in excluded_keys}
+
+                yield new_d
+        finally:
+            # 关闭文件
+            fp.close()
+
+    # 为数据行添加序号、总数及字段名MVAR
+    def annotate_data(self, data_list, fieldnames, count):
+        cols = ",".join(fieldnames)
+        for nd, d in enumerate(data_list):
+            # index从1计起，适应实际需求
+            d[self.MVAR_LOADED_DATA_ITEM_INDEX] = nd + 1
+            d[self.MVAR_LOADED_DATA_COUNT] = count
+            d[self.MVAR_LOADED_DATA_COLS] = cols
+            yield d
+
     # 操作：加载数据
+    @args_rules({
+        attrn_type: ('file_type', 's', None),
+        attrn_name: ('file_name', 's', None),
+        attrn_encoding: ('encoding', 's', None),
+        attrn_auto_strip: ('auto_strip', 'b', True),
+        attrn_allow_none: ('allow_none', 'b', False),
+        attrn_stream: ('stream', 'b', False),
+        attrn_count: ('count_rows', 'b', True),
+    })
     def run_load_data(self, jskwargs, *args):
         logger = self._logger
 
         # 属性
-        jargs = self.args_parser(jskwargs, {
-            self.attrn_type: ('file_type', 's', None),
-            self.attrn_name: ('file_name', 's', None),
-            self.attrn_encoding: ('encoding', 's', None),
-            self.attrn_auto_strip: ('auto_strip', 'b', True),
-            self.attrn_allow_none: ('allow_none', 'b', False)
-        })
+        jargs = self.args_parser(jskwargs, PyJsEngine.run_load_data.args_rules)
         file_type = jargs['file_type'] or self.FILE_TYPE_CSV
         file_name = (jargs['file_name'] or '')  # .strip()
         encoding = jargs['encoding'] or self._encoding
         auto_strip = jargs['auto_strip']
         allow_none = jargs['allow_none']
+        stream = jargs['stream']
+        count_rows = jargs['count_rows']
         try:
             for dir in self._path:
                 n_file_name = os.path.join(dir, file_name)
@@ -911,32 +1209,112 @@ class PyJsEngine(PyJsEngineBase):
 
         # 处理
         try:
-            logger.debug(msg="[pyjse]<{}>: loading data started! ({})".format(get_method_name(), file_name))
+            logger.debug("[pyjse]<%s>: loading data started! (%s)", get_method_name(), file_name)
             if isinstance(file_name, str) and file_name != '':
+                if stream:
+                    # 流式加载：逐行按需解析，不整体读入内存（count为False时不统计行数，总数记为0）
+                    count = max(self.count_file_lines(file_name, encoding=encoding) - 1, 0) if count_rows else 0
+                    logger.info("[pyjse]<%s>: lines count: %s", get_method_name(), count)
+                    data_iter, fieldnames = self.open_data_file(file_name, file_type=file_type, encoding=encoding,
+                                                                count=count,
+                                                                auto_strip=auto_strip, allow_none=allow_none)
+                    logger.info("[pyjse]<%s>: fieldnames: %r", get_method_name(), fieldnames)
+                    return self.annotate_data(data_iter, fieldnames, count)
+
                 data_list, fieldnames, count = self.load_data_file(file_name, file_type=file_type, encoding=encoding,
                                                                    auto_strip=auto_strip, allow_none=allow_none)
-                logger.info(msg="[pyjse]<{}>: lines count: {}".format(get_method_name(), str(count)))
-                logger.info(msg="[pyjse]<{}>: fieldnames: {}".format(get_method_name(), repr(fieldnames)))
-
-                new_data_list = []
-                for nd, d in enumerate(data_list):
-                    # index从1计起，适应实际需求
-                    new_ind = nd + 1
-                    d[self.MVAR_LOADED_DATA_ITEM_INDEX] = new_ind
-                    d[self.MVAR_LOADED_DATA_COUNT] = count
-
-                    d[self.MVAR_LOADED_DATA_COLS] = ",".join(fieldnames)
-                    # logger.debug(
-                    #     msg="[pyjse]<{}>: row read! ({}/{})".format(get_method_name(), str(nd + 1), str(count)))
-                    new_data_list.append(d)
-
-                logger.info(msg="[pyjse]<{}>: loading data finished! ({})".format(get_method_name(), file_name))
+                logger.info("[pyjse]<%s>: lines count: %s", get_method_name(), count)
+                logger.info("[pyjse]<%s>: fieldnames: %r", get_method_name(), fieldnames)
+
+                new_data_list = list(self.annotate_data(data_list, fieldnames, count))
+
+                logger.info("[pyjse]<%s>: loading data finished! (%s)", get_method_name(), file_name)
                 return iter(new_data_list)
             else:
                 raise ValueError("file name illegal!")
         except Exception as e:
             self.internal_exception_handler(funcn=get_method_name(), jskwargs=jskwargs, args=args, e=e)
 
+    # 操作：并行加载数据（数据行分块交由多个进程的引擎执行body脚本，Output的CSV行汇总后由本引擎写入）
+    @args_rules({
+        attrn_type: ('file_type', 's', None),
+        attrn_name: ('file_name', 's', None),
+        attrn_encoding: ('encoding', 's', None),
+        attrn_auto_strip: ('auto_strip', 'b', True),
+        attrn_allow_none: ('allow_none', 'b', False),
+        attrn_body: ('body', 'sr', None),
+        attrn_init: ('init', 'sr', None),
+        attrn_workers: ('workers', 'i', None),
+        attrn_ordered: ('ordered', 'b', True),
+        attrn_chunk_size: ('chunk_size', 'i', None),
+    })
+    def run_load_data_parallel(self, jskwargs, *args):
+        logger = self._logger
+
+        # 属性
+        jargs = self.args_parser(jskwargs, PyJsEngine.run_load_data_parallel.args_rules)
+        file_type = jargs['file_type'] or self.FILE_TYPE_CSV
+        file_name = (jargs['file_name'] or '')  # .strip()
+        encoding = jargs['encoding'] or self._encoding
+        auto_strip = jargs['auto_strip']
+        allow_none = jargs['allow_none']
+        body = jargs['body'] or ''
+        init = jargs['init']
+        workers = jargs['workers'] or os.cpu_count() or 1
+        ordered = jargs['ordered']
+        chunk_size = jargs['chunk_size'] or self.DEFAULT_PARALLEL_CHUNK_SIZE
+        try:
+            for dir in self._path:
+                n_file_name = os.path.join(dir, file_name)
+                if os.path.exists(n_file_name):
+                    file_name = n_file_name
+                    break
+        except:
+            pass
+
+        # 处理
+        try:
+            from .EnginePool import EnginePool
+
+            logger.debug("[pyjse]<%s>: parallel loading data started! (%s)", get_method_name(), file_name)
+            if not isinstance(file_name, str) or file_name == '':
+                raise ValueError("file name illegal!")
+            if workers <= 0 or chunk_size <= 0:
+                raise ValueError("workers or chunk_size illegal!")
+
+            data_list, fieldnames, count = self.load_data_file(file_name, file_type=file_type, encoding=encoding,
+                                                               auto_strip=auto_strip, allow_none=allow_none)
+            data_list = list(self.annotate_data(data_list, fieldnames, count))
+            chunks = [data_list[i:i + chunk_size] for i in range(0, len(data_list), chunk_size)]
+            logger.info(
+                "[pyjse]<%s>: rows: %s, chunks: %s, workers: %s",
+                get_method_name(), len(data_list), len(chunks), workers)
+
+            written = 0
+            if chunks:
+                # 本引擎当前变量的快照（各工作引擎执行前先载入，使body/init可使用调用前设置的变量）
+                vars = self.sync_vars()
+                engine_kwargs = {
+                    "logger": self._logger,
+                    "use_context_template": self._use_context_template,
+                }
+                with EnginePool(engine_class=type(self), size=min(workers, len(chunks)),
+                                backend=EnginePool.BACKEND_PROCESS, engine_kwargs=engine_kwargs) as pool:
+                    futures = [pool.submit_call(run_data_rows_job, body, chunk, init=init, path=list(self._path),
+                                                vars=vars)
+                               for chunk in chunks]
+                    # ordered为True时按原数据顺序写入，否则按完成顺序写入
+                    for future in (futures if ordered else as_completed(futures)):
+                        for file_name, cols, row, mode, encoding in future.result():
+                            with self.get_output_lock(file_name):
+                                self.write_output_row(file_name, cols, row, mode=mode, encoding=encoding)
+                            written += 1
+
+            logger.info("[pyjse]<%s>: parallel loading data finished! (%s rows written)", get_method_name(), written)
+            return len(data_list)
+        except Exception as e:
+            self.internal_exception_handler(funcn=get_method_name(), jskwargs=jskwargs, args=args, e=e)
+
     # 输出数据到文件
     @staticmethod
     def write_data_to_file(file_name, data, binary_data=False, newline=None, encoding=None):
@@ -961,19 +1339,41 @@ class PyJsEngine(PyJsEngineBase):
             lock = self._output_lmap.setdefault(base_name, Lock())
             return lock
 
+    # 写入一行CSV数据（设置了output sink时交由sink处理，用于并行加载数据时收集各进程的输出）
+    # 注：文件在运行期间保持打开（带缓冲），最外层run()结束或调用close_outputs()时刷新关闭
+    def write_output_row(self, file_name, cols, row, mode='a', encoding=None):
+        if self._output_sink is not None:
+            self._output_sink(file_name, cols, row, mode, encoding)
+            return
+
+        self._output_writers.write_row(file_name, cols, row, mode=mode, encoding=encoding)
+
+    @property
+    def output_writers(self):
+        return self._output_writers
+
+    # 刷新并关闭Output打开的文件
+    def close_outputs(self):
+        self._output_writers.close()
+
+    def do_finish(self):
+        super().do_finish()
+        self.close_outputs()
+
     # 操作：存储数据
+    @args_rules({
+        attrn_type: ('file_type', 's', None),
+        attrn_name: ('file_name', 's', None),
+        attrn_encoding: ('encoding', 's', None),
+        attrn_newline: ('newline', 's', None),
+        attrn_mode: ('mode', 's', None),
+        attrn_cols: ('cols', 's', None)
+    })
     def run_output(self, jskwargs, *args):
         logger = self._logger
 
         # 属性
-        jargs = self.args_parser(jskwargs, {
-            self.attrn_type: ('file_type', 's', None),
-            self.attrn_name: ('file_name', 's', None),
-            self.attrn_encoding: ('encoding', 's', None),
-            self.attrn_newline: ('newline', 's', None),
-            self.attrn_mode: ('mode', 's', None),
-            self.attrn_cols: ('cols', 's', None)
-        })
+        jargs = self.args_parser(jskwargs, PyJsEngine.run_output.args_rules)
         file_type = jargs['file_type'] or self.FILE_TYPE_CSV
         file_name = (jargs['file_name'] or '')  # .strip()
         encoding = jargs['encoding'] or self._encoding
@@ -989,13 +1389,14 @@ class PyJsEngine(PyJsEngineBase):
 
         # 处理
         try:
-            logger.debug(msg="[pyjse]<{}>: output started!".format(get_method_name()))
+            logger.debug("[pyjse]<%s>: output started!", get_method_name())
             if isinstance(file_name, str) and file_name != '':
                 with self.get_output_lock(file_name):
                     if len(args) > 0:
                         # 子标签第1个标签返回的结果作为文件数据写入到文件（无视输出文件类型）
                         data = args[0]()
                         try:
+                            self._output_writers.close(file_name)
                             self.write_data_to_file(file_name=file_name, data=data,
                                                     binary_data=isinstance(data, bytes),
                                                     newline=newline,
@@ -1005,39 +1406,102 @@ class PyJsEngine(PyJsEngineBase):
                     else:
                         if file_type == self.FILE_TYPE_CSV:
                             if len(cols) > 0:
-                                fp = None
-                                try:
-                                    if encoding:
-                                        fp = open(file_name, mode=mode, newline='', encoding=encoding)
-                                    else:
-                                        fp = open(file_name, mode=mode, newline='')
-                                    cdw = csv.DictWriter(fp, cols)
-                                    # if mode.find('w') >= 0:
-                                    if fp.tell() <= 0:
-                                        # 新建或覆盖时才写入标题字段
-                                        cdw.writeheader()
-
-                                    # 写入数据
-                                    vars_dict = self.get_vars_dict()
-                                    row = {}
-                                    for c in cols:
-                                        # 改成取连同全局变量在内的变量
-                                        row[c] = vars_dict.get(c)
-                                    cdw.writerow(row)
-                                    logger.info(msg="[pyjse]<{}>: row written!".format(get_method_name()))
-                                except Exception as e:
-                                    raise e
-                                finally:
-                                    # 关闭文件
-                                    if fp:
-                                        fp.close()
+                                # 写入数据
+                                vars_dict = self.get_vars_dict()
+                                row = self.make_output_row(cols, vars_dict)
+                                self.write_output_row(file_name, cols, row, mode=mode, encoding=encoding)
+                                logger.info("[pyjse]<%s>: row written!", get_method_name())
                             else:
                                 raise ValueError("columns illegal!")
                         else:
                             raise ValueError("file type illegal!")
             else:
                 raise ValueError("file name illegal!")
-            logger.debug(msg="[pyjse]<{}>: output finished!".format(get_method_name()))
+            logger.debug("[pyjse]<%s>: output finished!", get_method_name())
+        except Exception as e:
+            self.internal_exception_handler(funcn=get_method_name(), jskwargs=jskwargs, args=args, e=e)
+
+    # 按字段列表生成输出行（data中有的字段优先，其余取连同全局变量在内的变量）
+    @staticmethod
+    def make_output_row(cols, vars_dict, data=None):
+        if data is None:
+            return {c: vars_dict.get(c) for c in cols}
+        return {c: (data[c] if c in data else vars_dict.get(c)) for c in cols}
+
+    # 将JS数组/Python可迭代对象逐项转换为字典
+    @staticmethod
+    def iter_rows_data(rows):
+        if isinstance(rows, JsObjectWrapper):
+            rows = rows.to_list()
+        for d in rows:
+            if isinstance(d, JsObjectWrapper):
+                d = d.to_dict()
+            yield d
+
+    # 操作：批量存储数据（一次调用写入多行，rows为对象数组或Load_data返回的迭代器）
+    @args_rules({
+        attrn_type: ('file_type', 's', None),
+        attrn_name: ('file_name', 's', None),
+        attrn_encoding: ('encoding', 's', None),
+        attrn_mode: ('mode', 's', None),
+        attrn_cols: ('cols', 's', None)
+    })
+    def run_output_rows(self, jskwargs, *args):
+        logger = self._logger
+
+        # 属性
+        jargs = self.args_parser(jskwargs, PyJsEngine.run_output_rows.args_rules)
+        file_type = jargs['file_type'] or self.FILE_TYPE_CSV
+        file_name = (jargs['file_name'] or '')  # .strip()
+        encoding = jargs['encoding'] or self._encoding
+        mode = jargs['mode'] or 'a'  # output方式默认为append
+        cols = (jargs['cols'] or '').strip()
+        cols = [c.strip() for c in cols.split(',')] if cols else []
+        rows = args[0] if len(args) > 0 else None
+        if rows is None:
+            rows = self.args_parser_all(jskwargs).get(self.attrn_rows)
+        try:
+            n_file_name = os.path.join(self._path[0], file_name)
+            file_name = n_file_name
+        except:
+            pass
+
+        # 处理
+        try:
+            logger.debug("[pyjse]<%s>: output rows started!", get_method_name())
+            if not isinstance(file_name, str) or file_name == '':
+                raise ValueError("file name illegal!")
+            if file_type != self.FILE_TYPE_CSV:
+                raise ValueError("file type illegal!")
+            if rows is None:
+                raise ValueError("rows illegal!")
+
+            rows = self.iter_rows_data(rows)
+            first = next(rows, None)
+            if first is None:
+                return 0
+            if len(cols) <= 0:
+                # 未指定字段时，取数据行的__loaded_data_cols__或其非MVAR字段
+                data_cols = first.get(self.MVAR_LOADED_DATA_COLS)
+                if data_cols:
+                    cols = [c.strip() for c in str(data_cols).split(',')]
+                else:
+                    cols = [c for c in first.keys() if c not in self.MVAR_SET]
+            if len(cols) <= 0:
+                raise ValueError("columns illegal!")
+
+            vars_dict = self.get_vars_dict()
+            out_rows = (self.make_output_row(cols, vars_dict, d) for d in chain((first,), rows))
+            with self.get_output_lock(file_name):
+                if self._output_sink is not None:
+                    count = 0
+                    for row in out_rows:
+                        self._output_sink(file_name, cols, row, mode, encoding)
+                        count += 1
+                else:
+                    count = self._output_writers.write_rows(file_name, cols, out_rows, mode=mode, encoding=encoding)
+            logger.info("[pyjse]<%s>: %s rows written!", get_method_name(), count)
+            return count
         except Exception as e:
             self.internal_exception_handler(funcn=get_method_name(), jskwargs=jskwargs, args=args, e=e)
 
@@ -1053,14 +1517,15 @@ class PyJsEngine(PyJsEngineBase):
         return status, msgs
 
     # 操作：执行os命令 call_os_cmd
+    @args_rules({
+        attrn_cmd: ('os_cmd', 's', ''),
+        attrn_args: ('os_args', 's', ''),
+    })
     def run_call_os_cmd(self, jskwargs, *args):
         logger = self._logger
 
         # 属性
-        jargs = self.args_parser(jskwargs, {
-            self.attrn_cmd: ('os_cmd', 's', ''),
-            self.attrn_args: ('os_args', 's', ''),
-        })
+        jargs = self.args_parser(jskwargs, PyJsEngine.run_call_os_cmd.args_rules)
         os_cmd = jargs['os_cmd']
         os_args = jargs['os_args']
 
@@ -1068,24 +1533,39 @@ class PyJsEngine(PyJsEngineBase):
         try:
             status = None
             if os_cmd != '':
-                logger.info(msg="[pyjse]<{}>: Executing OS command... (<{}><{}>)".format(
-                    get_method_name(),
-                    repr(os_cmd), repr(os_args)))
+                logger.info("[pyjse]<%s>: Executing OS command... (<%r><%r>)", get_method_name(), os_cmd, os_args)
                 logger.info(msg="-" * 36)
                 status, msgs = self.subprocess_popen(os_cmd + ((" " + os_args) if os_args != '' else ""),
                                                      cwd=(self._path[0] if len(self._path) > 0 else None))
                 logger.info(msg="".join(msgs))
                 logger.info(msg="-" * 36)
-                logger.info(msg="[pyjse]<{}>: status <{}>".format(get_method_name(), repr(status)))
-                logger.info(msg="[pyjse]<{}>: OS command executed! (<{}><{}>)".format(
-                    get_method_name(),
-                    repr(os_cmd), repr(os_args)))
+                logger.info("[pyjse]<%s>: status <%r>", get_method_name(), status)
+                logger.info("[pyjse]<%s>: OS command executed! (<%r><%r>)", get_method_name(), os_cmd, os_args)
 
             return str(status) == "0"
         except Exception as e:
             self.internal_exception_handler(funcn=get_method_name(), jskwargs=jskwargs, args=args, e=e)
 
 
+# 并行加载数据的工作任务：逐行设置变量（同Set_str）后执行body脚本，收集Output写出的CSV行
+def run_data_rows_job(engine, body, rows, init=None, path=None, vars=None):
+    if path:
+        engine.path[:] = path
+    if vars:
+        engine.set_vars(vars)
+    records = []
+    engine.output_sink = lambda *record: records.append(record)
+    try:
+        if init:
+            engine.run(temp_script=init)
+        for row in rows:
+            engine.run_set_with_type(row, funcn=engine.funcn_set_str)
+            engine.run(temp_script=body)
+    finally:
+        engine.output_sink = None
+    return records
+
+
 if __name__ == "__main__":
     engine = PyJsEngine()
     engine.run(temp_script=r"""
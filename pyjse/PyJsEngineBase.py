@@ -1,25 +1,79 @@
 # coding=utf-8
 
 
+import sys
 import inspect
 import types
-import chardet as crd
 import codecs as cdc
 import re
-from functools import partial
-from copy import deepcopy, copy
+from functools import partial, lru_cache
+from copy import copy
 from threading import Lock
+from time import perf_counter
 
 from js2py import EvalJs
-from js2py.base import JsObjectWrapper
+from js2py.base import JsObjectWrapper, to_python
+from js2py.node_import import require as node_require
 
 from .MiniUtils import *
+from .TranslationCache import TranslationCache, get_default_translation_cache, translate_script
+from .Profiler import BuiltinProfiler
+from .ArgsRules import ArgsRules, compile_args_rules
 
 
+_getframe = getattr(sys, '_getframe', None)
+
+
+# 取得调用者的函数名（仅取单个栈帧，不像inspect.stack()那样构建整个调用栈及源码上下文）
 def get_method_name():
+    if _getframe is not None:
+        return _getframe(1).f_code.co_name
     return inspect.stack()[1][3]
 
 
+VAR_TEMPLATE_CACHE_SIZE = 4096
+# 超过此长度的模板串（如整段模板内容、POST数据）不进入缓存，避免挤出常用的短模板
+VAR_TEMPLATE_CACHE_MAX_LENGTH = 1024
+
+
+# 解析变量标识模板为片段元组（偶数位为原文，奇数位为变量名）
+def split_var_template(v_str, re_prefix=r"\$\%", re_suffix=r"\%\$"):
+    return tuple(re.split(re_prefix + r"(.+?)" + re_suffix, v_str))
+
+
+# 同split_var_template，按模板串及前后缀缓存
+@lru_cache(maxsize=VAR_TEMPLATE_CACHE_SIZE)
+def parse_var_template(v_str, re_prefix=r"\$\%", re_suffix=r"\%\$"):
+    return split_var_template(v_str, re_prefix, re_suffix)
+
+
+# 生成JS上下文的require函数
+# 注：参数列表已带有this/arguments/var，js2py无需再改写其字节码，故可为每个上下文廉价生成
+def make_js_require(js_context):
+    def require(npm_module_name, this=None, arguments=None, var=None):
+        return node_require(to_python(npm_module_name), context=js_context)
+
+    return require
+
+
+JS_ARRAY_CLASSES = {
+    'Array', 'Int8Array', 'Uint8Array', 'Uint8ClampedArray', 'Int16Array', 'Uint16Array', 'Int32Array', 'Uint32Array',
+    'Float32Array', 'Float64Array',
+}
+
+
+# 将JS值转换为Python值（与JsObjectWrapper.to_dict()对各值的转换一致）
+def js_to_python(value):
+    value = to_python(value)
+    if isinstance(value, JsObjectWrapper):
+        obj_class = value._obj.Class
+        if obj_class == 'Object':
+            return value.to_dict()
+        elif obj_class in JS_ARRAY_CLASSES:
+            return value.to_list()
+    return value
+
+
 class PyJsEngineBase:
     DEFAULT_ENCODING = 'utf-8'
     common_bufsize = 1024
@@ -32,6 +86,26 @@ class PyJsEngineBase:
     MVAR_SCRIPT_NAME = "__script_name__"
     MVAR_WORKING_DIR = "__working_dir__"
 
+    PREPARE_SCRIPT_SEPARATOR = "\n;\n"
+
+    # 脚本文件编码检测：BOM -> 严格UTF-8 -> chardet（取样大小） -> latin-1（不会解码失败）；检测结果按(路径, 修改时间, 大小)缓存
+    ENCODING_DETECT_BUFSIZE = 64 * 1024
+    FALLBACK_ENCODING = 'latin-1'
+    ENCODING_CACHE_SIZE = 1024
+    BOM_ENCODINGS = (
+        (cdc.BOM_UTF32_LE, 'utf-32'),
+        (cdc.BOM_UTF32_BE, 'utf-32'),
+        (cdc.BOM_UTF8, 'utf-8-sig'),
+        (cdc.BOM_UTF16_LE, 'utf-16'),
+        (cdc.BOM_UTF16_BE, 'utf-16'),
+    )
+    _encoding_cache = {}
+    _encoding_cache_lock = Lock()
+
+    # 上下文模板缓存（按引擎类及预备脚本缓存已编译的预备代码，供各实例共用）
+    _context_templates = {}
+    _context_templates_lock = Lock()
+
     def __init__(self, logger=None, **kwargs):
         self._logger = logger or get_logger()
 
@@ -43,6 +117,32 @@ class PyJsEngineBase:
         self._context = None
         self._context_lock = Lock()
 
+        self._run_depth = 0
+        self._run_depth_lock = Lock()
+
+        # js2py翻译缓存：None使用默认共享缓存，False不使用缓存
+        translation_cache = kwargs.get("translation_cache")
+        translation_cache_dir = kwargs.get("translation_cache_dir")
+        if translation_cache is None:
+            if translation_cache_dir:
+                translation_cache = TranslationCache(cache_dir=translation_cache_dir)
+            else:
+                translation_cache = get_default_translation_cache()
+        self._translation_cache = translation_cache or None
+        self._use_context_template = kwargs.get("use_context_template", True)
+
+        # __vars__的Python侧镜像（vars_mirror=True时启用，经set_var()等增量维护，读取时无需整体转换）
+        # 注：启用后脚本中直接修改__vars__（如__vars__.x = 1）不会反映到Get、$%x%$替换及Output等，
+        # 需调用sync_vars()；默认不启用，每次读取时按__vars__整体转换
+        self._use_vars_mirror = kwargs.get("vars_mirror", False)
+        self._vars = None
+
+        # 内置操作调用统计：profile为True时启用，profile_file指定时在最外层run()结束时写入JSON
+        self._profiler = None
+        if kwargs.get("profile"):
+            self._profiler = BuiltinProfiler(samples=kwargs.get("profile_samples", BuiltinProfiler.DEFAULT_SAMPLES))
+        self._profile_file = kwargs.get("profile_file")
+
         self.MVAR_SET = {
             self.MVAR_SCRIPT_NAME,
             self.MVAR_WORKING_DIR,
@@ -65,13 +165,47 @@ class PyJsEngineBase:
         with self._context_lock:
             return self._context
 
+    @property
+    def translation_cache(self):
+        return self._translation_cache
+
+    def get_translation_cache_stats(self):
+        if self._translation_cache is None:
+            return None
+        return self._translation_cache.get_stats()
+
+    @property
+    def profiler(self):
+        return self._profiler
+
+    # 取得内置操作调用统计（未启用时返回None）
+    def get_profile(self):
+        if self._profiler is None:
+            return None
+        return self._profiler.get_profile()
+
+    # 将内置操作调用统计写入JSON文件
+    def dump_profile(self, file_name=None):
+        file_name = file_name or self._profile_file
+        if self._profiler is None or not file_name:
+            return
+        self._profiler.dump(file_name)
+        self._logger.debug("Profile dumped to %s", file_name)
+
     def do_before(self, jskwargs, *args):
         pass
 
     def do_after(self, jskwargs, *args):
         pass
 
-    def wrapped_method(self, jskwargs, *args, func=None):
+    # 最外层run()结束时调用（模块加载等嵌套的run()不触发）
+    def do_finish(self):
+        if self._profile_file:
+            self.dump_profile()
+
+    def wrapped_method(self, jskwargs, *args, func=None, name=None):
+        if self._profiler is not None:
+            return self.profiled_method(jskwargs, *args, func=func, name=name)
         self.do_before(jskwargs, *args)
         result = None
         if func is not None:
@@ -79,13 +213,68 @@ class PyJsEngineBase:
         self.do_after(jskwargs, *args)
         return result
 
+    # 同wrapped_method，并分段计时（do_before中的参数解析计入before，操作本身的参数解析计入parse）
+    def profiled_method(self, jskwargs, *args, func=None, name=None):
+        profiler = self._profiler
+        if name is None:
+            name = func.__name__ if func is not None else None
+        profiler.enter()
+        before = parse = func_time = after = 0.0
+        ok = False
+        t = perf_counter()
+        try:
+            self.do_before(jskwargs, *args)
+            t1 = perf_counter()
+            before = t1 - t
+            parse_start = profiler.get_parse_time()
+            result = None
+            if func is not None:
+                result = func(jskwargs, *args)
+            t2 = perf_counter()
+            parse = profiler.get_parse_time() - parse_start
+            func_time = t2 - t1 - parse
+            self.do_after(jskwargs, *args)
+            after = perf_counter() - t2
+            ok = True
+            return result
+        finally:
+            if not ok:
+                # 出错时剩余耗时计入当前阶段
+                elapsed = perf_counter() - t
+                func_time = max(elapsed - before - parse - after, 0.0)
+            profiler.leave(name, before, parse, func_time, after, ok=ok)
+
+    # 同profiled_method，用于以partial注册的操作（不经wrapped_method，故不调用do_before/do_after）
+    def profiled_call(self, *args, func=None, name=None):
+        profiler = self._profiler
+        profiler.enter()
+        parse = func_time = 0.0
+        ok = False
+        t = perf_counter()
+        try:
+            parse_start = profiler.get_parse_time()
+            result = func(*args)
+            parse = profiler.get_parse_time() - parse_start
+            func_time = perf_counter() - t - parse
+            ok = True
+            return result
+        finally:
+            if not ok:
+                func_time = max(perf_counter() - t - parse, 0.0)
+            profiler.leave(name, 0.0, parse, func_time, 0.0, ok=ok)
+
     # 注册上下文（context）
     def register_context(self, context):
         if isinstance(context, dict):
             new_context = copy(context)
             for k, v in context.items():
+                name = k.capitalize() if isinstance(k, str) and not k.startswith(self.MVAR_PREFIX) else k
                 if isinstance(v, types.MethodType) and getattr(self, v.__name__):
-                    new_context[k] = partial(self.wrapped_method, func=v)
+                    new_context[k] = partial(self.wrapped_method, func=v, name=name)
+                elif self._profiler is not None and isinstance(v, partial) and \
+                        isinstance(v.func, types.MethodType) and v.func.__self__ is self:
+                    # 以partial注册的本引擎方法（如Set_str、Rget）：启用统计时同样计入
+                    new_context[k] = partial(self.profiled_call, func=v, name=name)
             self._registered_context.update(new_context)
 
         # 强制将非MVAR_PREFIX开头的键名改为大写字母开头
@@ -110,10 +299,52 @@ class PyJsEngineBase:
             if self._context is None:
                 registered_context = self._registered_context
                 registered_context[self.MVAR_VARS] = {}
-                self._context = EvalJs(context=registered_context, enable_require=True)
-                if self._prepare_script:
-                    for script in self._prepare_script:
-                        self._context.execute(script)
+                self._vars = {} if self._use_vars_mirror else None
+                if self._use_context_template:
+                    self._context = EvalJs(context=registered_context)
+                    self._context['require'] = make_js_require(self._context.context)
+                    if self._prepare_script:
+                        exec(self.get_context_template(), self._context.context)
+                else:
+                    self._context = EvalJs(context=registered_context, enable_require=True)
+                    if self._prepare_script:
+                        for script in self._prepare_script:
+                            self.execute_script(script, context=self._context)
+
+    # 取得上下文模板（同一引擎类、同一组预备脚本只翻译编译一次）
+    def get_context_template(self):
+        key = (type(self), tuple(self._prepare_script))
+        cls = PyJsEngineBase
+        with cls._context_templates_lock:
+            template = cls._context_templates.get(key)
+        if template is None:
+            script = self.PREPARE_SCRIPT_SEPARATOR.join(self._prepare_script)
+            try:
+                template = self.compile_script(script)
+            except Exception:
+                # 合并后的脚本翻译出错时逐个翻译，抛出出错的预备脚本本身的错误（同不使用模板时）
+                for i, prepare_script in enumerate(self._prepare_script):
+                    try:
+                        self.compile_script(prepare_script)
+                    except Exception:
+                        self._logger.error("Prepare script #%s failed to translate.", i)
+                        raise
+                raise
+            with cls._context_templates_lock:
+                template = cls._context_templates.setdefault(key, template)
+        return template
+
+    # 翻译并编译脚本（使用翻译缓存时经缓存）
+    def compile_script(self, script):
+        if self._translation_cache is not None:
+            return self._translation_cache.get_compiled(script)
+        return compile(translate_script(script), TranslationCache.COMPILE_FILE_NAME, 'exec')
+
+    # 清除上下文模板缓存
+    @staticmethod
+    def clear_context_templates():
+        with PyJsEngineBase._context_templates_lock:
+            PyJsEngineBase._context_templates.clear()
 
     # 加载脚本
     def load(self, script):
@@ -154,28 +385,60 @@ class PyJsEngineBase:
         logger = self._logger
 
         logger.debug(msg="Loading script from file...")
-        fp = None
+        if not isinstance(file, str):
+            return self.read_from_string(file.read())
+
+        # 只打开一次文件，读取全部内容后再按编码解码
+        with open(file, mode='rb') as fp:
+            data = fp.read()
+            st = os.fstat(fp.fileno())
+
+        if encoding is not None:
+            return data.decode(encoding)
+
+        cache_key = (os.path.abspath(file), st.st_mtime_ns, st.st_size)
+        cls = PyJsEngineBase
+        with cls._encoding_cache_lock:
+            c = cls._encoding_cache.get(cache_key)
+        if c is not None:
+            return data.decode(c)
+
+        script, c = self.decode_source(data, file_name=file)
+        logger.debug("Encoding detected: %r", c)
+        with cls._encoding_cache_lock:
+            if len(cls._encoding_cache) >= self.ENCODING_CACHE_SIZE:
+                cls._encoding_cache.clear()
+            cls._encoding_cache[cache_key] = c
+        return script
+
+    # 检测编码并解码脚本数据，返回(脚本, 编码)
+    def decode_source(self, data, file_name=None):
+        for bom, c in self.BOM_ENCODINGS:
+            if data.startswith(bom):
+                return data.decode(c), c
+
         try:
-            if isinstance(file, str):
-                c = encoding
-                if c is None:
-                    # 如无自定义文件编码，先读文件自动检测编码
-                    tmpf = open(file=file, mode='rb')
-                    tmps = tmpf.read(self.common_bufsize)
-                    tmpchd = crd.detect(tmps)
-                    logger.debug(msg="Encoding detected: %s" % (repr(tmpchd)))
-                    # 再用codecs按检测到的编码读取内容
-                    c = tmpchd['encoding']
-                fp = cdc.open(file, encoding=c)
-            else:
-                fp = file
+            return data.decode('utf-8'), 'utf-8'
+        except UnicodeDecodeError:
+            pass
 
-            script = self.read_from_string(fp.read())
+        # 非UTF-8时才使用chardet检测（延迟导入）
+        try:
+            import chardet
+            c = chardet.detect(data[:self.ENCODING_DETECT_BUFSIZE])['encoding']
+        except ImportError:
+            c = None
+            self._logger.warning("chardet not installed, cannot detect encoding of %s.", file_name)
+        if c:
+            try:
+                return data.decode(c), c
+            except (UnicodeDecodeError, LookupError):
+                self._logger.warning("Detected encoding %r failed to decode %s.", c, file_name)
 
-            return script
-        finally:
-            if fp is not None and isinstance(file, str):
-                fp.close()
+        # 严格UTF-8已失败，按不会失败的编码解码（非ASCII字符可能乱码）
+        c = self.FALLBACK_ENCODING
+        self._logger.warning("Decoding %s with %s.", file_name, c)
+        return data.decode(c), c
 
     # 读取脚本数据
     def read_from_string(self, source):
@@ -193,13 +456,66 @@ class PyJsEngineBase:
             script = self._script
 
         self.create_js_context()
-        self.context.execute(script)
+        with self._run_depth_lock:
+            self._run_depth += 1
+        try:
+            self.execute_script(script)
+        finally:
+            with self._run_depth_lock:
+                self._run_depth -= 1
+                finished = self._run_depth <= 0
+            if finished:
+                self.do_finish()
+
+    # 在JS上下文中执行脚本（经翻译缓存）
+    def execute_script(self, script, context=None):
+        if context is None:
+            context = self.context
+        if self._translation_cache is None:
+            context.execute(script)
+        else:
+            compiled = self._translation_cache.get_compiled(script)
+            exec(compiled, context.context)
 
     def get_vars(self):
         return self.context[self.MVAR_VARS]
 
+    # 设置变量（同时更新JS的__vars__及Python侧镜像）
+    def set_var(self, key, value):
+        vars = self.get_vars()
+        vars[key] = value
+        if self._vars is not None:
+            if value is None or (isinstance(value, (str, int)) and not isinstance(value, bool)):
+                self._vars[key] = value
+            else:
+                # 其他类型按JS中实际存储的值转换
+                self._vars[key] = js_to_python(vars[key])
+
+    # 批量设置变量
+    def set_vars(self, var_dict):
+        for k, v in var_dict.items():
+            self.set_var(k, v)
+
+    # 按JS的__vars__整体重建Python侧镜像，返回变量字典快照
+    def sync_vars(self):
+        vars = self.get_vars()
+        if isinstance(vars, JsObjectWrapper):
+            vars = vars.to_dict()
+        if self._use_vars_mirror:
+            self._vars = dict(vars)
+        return vars
+
+    # 重置脚本状态（清空__vars__，保留已创建的JS上下文）
+    def reset_state(self):
+        self.create_js_context()
+        self.context[self.MVAR_VARS] = {}
+        self._vars = {} if self._use_vars_mirror else None
+
+    # 取得变量字典（未指定vars时返回Python侧镜像，调用方不应修改；需独立快照时使用sync_vars()）
     def get_vars_dict(self, vars=None):
         if vars is None:
+            if self._vars is not None:
+                return self._vars
             # 如未指定vars，则使用内置上下文vars
             vars = self.get_vars()
         if isinstance(vars, JsObjectWrapper):
@@ -214,47 +530,25 @@ class PyJsEngineBase:
 
     # 解析参数字典，按规则规范参数格式及赋予默认值
     # jskwargs Js传递的参数字典，rules 解析规则字典（格式：{key:(name, type, default)}，type有 s字串/sr原始字串/i整数/r实数/b布尔 ）
+    # 注：rules也可为ArgsRules对象（如经@args_rules装饰的操作方法的func.args_rules）
     def args_parser(self, jskwargs, rules):
-        if not isinstance(rules, dict):
+        if self._profiler is not None:
+            t = perf_counter()
+            try:
+                return self.args_parser_raw(jskwargs, rules)
+            finally:
+                self._profiler.add_parse_time(perf_counter() - t)
+        return self.args_parser_raw(jskwargs, rules)
+
+    # 解析参数字典（实际解析过程；规则经编译缓存，rules也可为预编译的ArgsRules对象）
+    def args_parser_raw(self, jskwargs, rules):
+        if not isinstance(rules, (dict, ArgsRules)):
             return None
 
-        if isinstance(jskwargs, JsObjectWrapper):
-            # 确保jskwargs为非JsObjectWrapper
-            jskwargs = jskwargs.to_dict()
-
-        if not isinstance(jskwargs, dict):
+        args = compile_args_rules(rules).parse(self, jskwargs)
+        if args is None:
             return None
 
-        args = {}
-        keys = set(jskwargs.keys())
-        for pk, pv in rules.items():
-            if isinstance(pk, str) and isinstance(pv, tuple) and len(pv) in {2, 3}:
-                # pk: key, pn: name, pt: type, pd: default
-                lpv = len(pv)
-                if lpv == 2:
-                    pn, pt = pv
-                    pd = None
-                    if pk not in keys:
-                        continue
-                else:
-                    pn, pt, pd = pv
-
-                value = jskwargs.get(pk, pd)
-                if isinstance(value, bytes):
-                    value = value.decode(self.DEFAULT_ENCODING)
-                if pt in {'s', 'i', 'r', 'b'}:
-                    value = self.var_replacer(value) if isinstance(value, str) else value
-                if pt in {'s', 'sr'}:
-                    args[pn] = str(value) if value is not None else None
-                elif pt in {'i', 'ir'}:
-                    args[pn] = (int(eval(str(value))) if value is not None else None) if not isinstance(value,
-                                                                                                        int) else value
-                elif pt in {'r', 'rr'}:
-                    args[pn] = (eval(str(value)) if value is not None else None) if not isinstance(value,
-                                                                                                   float) else value
-                elif pt in {'b', 'br'}:
-                    args[pn] = str(value).lower() == str(True).lower()
-
         if self.MVAR_VARS not in args:
             try:
                 args[self.MVAR_VARS] = self.get_vars_dict()
@@ -270,18 +564,25 @@ class PyJsEngineBase:
                                      v_prefix=v_prefix, v_suffix=v_suffix, re_prefix=re_prefix,
                                      re_suffix=re_suffix)
 
-    # 变量标识替换（原始方法）
+    # 变量标识替换（原始方法；不含标识的字串直接返回，短模板的解析结果经缓存，单次拼接输出；未定义的变量保留原标识）
     @staticmethod
     def var_replacer_raw(var_dict, v_str, v_prefix=r"$%", v_suffix=r"%$", re_prefix=r"\$\%", re_suffix=r"\%\$"):
-        keys = re.findall(re_prefix + r"(.+?)" + re_suffix, v_str)
-        d_keys = []
-        for i in keys:
-            value = var_dict.get(i)
-            if value is not None:
-                d_keys.append(i)
-
-        o_str = deepcopy(v_str)
-        for i in d_keys:
-            # 注：这里var_dict.get(i)需要强制转字符串，适应var_dict中保存包含字符串以外类型对象的情况
-            o_str = o_str.replace(v_prefix + i + v_suffix, str(var_dict.get(i)))
-        return o_str
+        if v_prefix not in v_str:
+            return v_str
+        if len(v_str) > VAR_TEMPLATE_CACHE_MAX_LENGTH:
+            segments = split_var_template(v_str, re_prefix, re_suffix)
+        else:
+            segments = parse_var_template(v_str, re_prefix, re_suffix)
+        if len(segments) <= 1:
+            return v_str
+
+        parts = list(segments)
+        for n in range(1, len(parts), 2):
+            key = parts[n]
+            value = var_dict.get(key)
+            if value is None:
+                parts[n] = v_prefix + key + v_suffix
+            else:
+                # 注：这里需要强制转字符串，适应var_dict中保存包含字符串以外类型对象的情况
+                parts[n] = str(value)
+        return ''.join(parts)
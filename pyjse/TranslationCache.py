@@ -0,0 +1,248 @@
+# coding=utf-8
+
+import os
+import hashlib
+import tempfile
+from collections import OrderedDict
+from threading import Lock
+
+from js2py.translators import translate_js
+
+
+def get_js2py_version():
+    try:
+        from importlib.metadata import version
+        return version('js2py')
+    except Exception:
+        pass
+    try:
+        import pkg_resources
+        return pkg_resources.get_distribution('js2py').version
+    except Exception:
+        return 'unknown'
+
+
+# js2py翻译过程使用模块级状态，多线程下需串行执行
+_translate_lock = Lock()
+
+
+def translate_script(script):
+    with _translate_lock:
+        return translate_js(script, '')
+
+
+class TranslationCache:
+    """
+    js2py翻译结果缓存（内容哈希+js2py版本为键；内存LRU + 可选磁盘持久化，均按字节数上限淘汰）
+    """
+
+    DEFAULT_MAX_MEMORY_BYTES = 64 * 1024 * 1024
+    DEFAULT_MAX_DISK_BYTES = 256 * 1024 * 1024
+    DEFAULT_ENCODING = 'utf-8'
+
+    CACHE_FILE_EXT_NAME = ".py"
+    COMPILE_FILE_NAME = "<EvalJS snippet>"
+
+    def __init__(self, cache_dir=None, max_memory_bytes=DEFAULT_MAX_MEMORY_BYTES,
+                 max_disk_bytes=DEFAULT_MAX_DISK_BYTES):
+        self._cache_dir = os.path.abspath(cache_dir) if cache_dir else None
+        self._max_memory_bytes = max_memory_bytes
+        self._max_disk_bytes = max_disk_bytes
+        self._version = get_js2py_version()
+
+        self._memory = OrderedDict()  # key -> (code, compiled, nbytes)
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+        self._lock = Lock()
+
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._disk_evictions = 0
+
+        if self._cache_dir is not None:
+            os.makedirs(self._cache_dir, exist_ok=True)
+            self._disk_bytes = sum(size for path, size, mtime in self._list_disk_files())
+
+    @property
+    def cache_dir(self):
+        return self._cache_dir
+
+    @property
+    def version(self):
+        return self._version
+
+    def make_key(self, script):
+        h = hashlib.sha1()
+        h.update(self._version.encode(self.DEFAULT_ENCODING))
+        h.update(b'\0')
+        h.update(script.encode(self.DEFAULT_ENCODING))
+        return h.hexdigest()
+
+    # 取得已编译的代码对象（未命中时翻译并写入缓存）
+    def get_compiled(self, script):
+        key = self.make_key(script)
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self._hits += 1
+                return entry[1]
+
+        code = self._read_disk(key)
+        if code is not None:
+            with self._lock:
+                self._disk_hits += 1
+        else:
+            code = translate_script(script)
+            with self._lock:
+                self._misses += 1
+            self._write_disk(key, code)
+
+        compiled = compile(code, self.COMPILE_FILE_NAME, 'exec')
+        self._put_memory(key, code, compiled)
+        return compiled
+
+    # 取得翻译后的Python代码
+    def get_code(self, script):
+        key = self.make_key(script)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                return entry[0]
+        self.get_compiled(script)
+        with self._lock:
+            entry = self._memory.get(key)
+            return entry[0] if entry is not None else None
+
+    def _put_memory(self, key, code, compiled):
+        nbytes = len(code.encode(self.DEFAULT_ENCODING))
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return
+            self._memory[key] = (code, compiled, nbytes)
+            self._memory_bytes += nbytes
+            while self._memory_bytes > self._max_memory_bytes and len(self._memory) > 1:
+                old_key, old_entry = self._memory.popitem(last=False)
+                self._memory_bytes -= old_entry[2]
+                self._evictions += 1
+
+    def _disk_path(self, key):
+        return os.path.join(self._cache_dir, key + self.CACHE_FILE_EXT_NAME)
+
+    def _list_disk_files(self):
+        result = []
+        if self._cache_dir is None:
+            return result
+        for name in os.listdir(self._cache_dir):
+            if not name.endswith(self.CACHE_FILE_EXT_NAME):
+                continue
+            path = os.path.join(self._cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            result.append((path, st.st_size, st.st_mtime))
+        return result
+
+    def _read_disk(self, key):
+        if self._cache_dir is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'r', encoding=self.DEFAULT_ENCODING) as fp:
+                code = fp.read()
+            # 更新访问时间，供淘汰时判断
+            os.utime(path, None)
+            return code
+        except (OSError, UnicodeDecodeError):
+            return None
+
+    def _write_disk(self, key, code):
+        if self._cache_dir is None:
+            return
+        path = self._disk_path(key)
+        tmp_path = None
+        try:
+            data = code.encode(self.DEFAULT_ENCODING)
+            # 临时文件名唯一（同一进程内多个线程可能同时写入同一缓存项）
+            fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp',
+                                            dir=os.path.dirname(path))
+            with os.fdopen(fd, 'wb') as fp:
+                fp.write(data)
+            existed = os.path.exists(path)
+            os.replace(tmp_path, path)
+        except OSError:
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+            return
+
+        with self._lock:
+            if not existed:
+                self._disk_bytes += len(data)
+            over = self._disk_bytes > self._max_disk_bytes
+        if over:
+            self._evict_disk(keep=path)
+
+    def _evict_disk(self, keep=None):
+        files = sorted(self._list_disk_files(), key=lambda f: f[2])
+        with self._lock:
+            self._disk_bytes = sum(f[1] for f in files)
+            for path, size, mtime in files:
+                if self._disk_bytes <= self._max_disk_bytes:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                self._disk_bytes -= size
+                self._disk_evictions += 1
+
+    # 清空缓存（memory_only为True时保留磁盘缓存）
+    def clear(self, memory_only=False):
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        if not memory_only and self._cache_dir is not None:
+            for path, size, mtime in self._list_disk_files():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            with self._lock:
+                self._disk_bytes = 0
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "disk_evictions": self._disk_evictions,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_bytes": self._disk_bytes,
+                "js2py_version": self._version,
+            }
+
+
+_default_translation_cache = None
+_default_translation_cache_lock = Lock()
+
+
+# 取得进程内共享的默认翻译缓存（仅内存）
+def get_default_translation_cache():
+    global _default_translation_cache
+    with _default_translation_cache_lock:
+        if _default_translation_cache is None:
+            _default_translation_cache = TranslationCache()
+        return _default_translation_cache
@@ -6,7 +6,12 @@ __version__ = '0.1.191029.4'
 __author__ = 'DJun'
 __all__ = [
     'PyJsEngine', 'PyJsEngineBase', 'get_method_name',
+    'TranslationCache', 'EnginePool', 'BuiltinProfiler', 'ArgsRules', 'args_rules',
 ]
 
 from pyjse.PyJsEngine import PyJsEngine, PyJsEngineBase
 from pyjse.PyJsEngineBase import get_method_name
+from pyjse.TranslationCache import TranslationCache
+from pyjse.EnginePool import EnginePool
+from pyjse.Profiler import BuiltinProfiler
+from pyjse.ArgsRules import ArgsRules, args_rules
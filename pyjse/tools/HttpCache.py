@@ -0,0 +1,272 @@
+# coding=utf-8
+
+import os
+import json
+import hashlib
+import tempfile
+from threading import Lock
+from time import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+class HttpCache:
+    """
+    基于文件的HTTP响应缓存（GET）：保存ETag/Last-Modified校验信息，过期后发送条件请求，304时直接使用缓存内容
+    每条缓存为一个文件（首行为JSON元数据，其后为响应内容），按总字节数上限及最长保存时间淘汰
+    响应带Vary时同时保存所列请求头的值，请求头不一致时视为未命中（Vary: *不缓存）
+    """
+
+    DEFAULT_TTL = 0
+    DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+    DEFAULT_MAX_AGE = 7 * 24 * 3600
+    DEFAULT_ENCODING = 'utf-8'
+
+    CACHE_FILE_EXT_NAME = ".cache"
+
+    def __init__(self, cache_dir, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE):
+        self._cache_dir = os.path.abspath(cache_dir)
+        self._ttl = ttl or 0
+        self._max_bytes = max_bytes
+        self._max_age = max_age
+        self._lock = Lock()
+
+        self._hits = 0
+        self._revalidated = 0
+        self._misses = 0
+        self._stores = 0
+        self._evictions = 0
+        self._bytes_saved = 0
+        self._latency_saved = 0.0
+
+        os.makedirs(self._cache_dir, exist_ok=True)
+        self._disk_bytes = sum(size for path, size, mtime in self._list_files())
+
+    @property
+    def cache_dir(self):
+        return self._cache_dir
+
+    @property
+    def ttl(self):
+        return self._ttl
+
+    def make_key(self, url):
+        return hashlib.sha1(url.encode(self.DEFAULT_ENCODING)).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self._cache_dir, key + self.CACHE_FILE_EXT_NAME)
+
+    def _list_files(self):
+        result = []
+        for name in os.listdir(self._cache_dir):
+            if not name.endswith(self.CACHE_FILE_EXT_NAME):
+                continue
+            path = os.path.join(self._cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            result.append((path, st.st_size, st.st_mtime))
+        return result
+
+    # 取得响应头Vary所列的请求头名（小写）
+    @staticmethod
+    def get_vary_names(headers):
+        vary = headers.get('Vary') if headers else None
+        if not vary:
+            return []
+        return [name.strip().lower() for name in vary.split(',') if name.strip()]
+
+    # 按Vary所列请求头名取得请求头的值
+    @staticmethod
+    def make_vary(names, request_headers):
+        request_headers = CaseInsensitiveDict(request_headers or {})
+        return {name: request_headers.get(name) for name in names}
+
+    # 读取缓存元数据（不存在、已超过最长保存时间或Vary所列请求头不一致时返回None）
+    def get_meta(self, url, request_headers=None):
+        path = self._path(self.make_key(url))
+        try:
+            with open(path, 'rb') as fp:
+                meta = json.loads(fp.readline().decode(self.DEFAULT_ENCODING))
+        except (OSError, ValueError):
+            return None
+        if meta.get('url') != url:
+            return None
+        if self._max_age is not None and time() - meta.get('stored_at', 0) > self._max_age:
+            self._remove(path)
+            return None
+        vary = meta.get('vary')
+        if vary and self.make_vary(vary.keys(), request_headers) != vary:
+            return None
+        return meta
+
+    def is_fresh(self, meta):
+        return self._ttl > 0 and time() - meta.get('stored_at', 0) <= self._ttl
+
+    # 条件请求头
+    @staticmethod
+    def get_conditional_headers(meta):
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    # 由缓存构造requests.Response
+    def load_response(self, url, meta):
+        path = self._path(self.make_key(url))
+        with open(path, 'rb') as fp:
+            fp.readline()
+            content = fp.read()
+        # 更新访问时间，供淘汰时判断
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+        resp = requests.Response()
+        resp.url = url
+        resp.status_code = meta.get('status', 200)
+        resp.reason = meta.get('reason')
+        resp.encoding = meta.get('encoding')
+        resp.headers = CaseInsensitiveDict(meta.get('headers') or {})
+        resp._content = content
+        return resp
+
+    # 响应是否可缓存
+    def is_cacheable(self, resp):
+        if resp.status_code != 200:
+            return False
+        if 'no-store' in resp.headers.get('Cache-Control', '').lower():
+            return False
+        if '*' in self.get_vary_names(resp.headers):
+            return False
+        return self._ttl > 0 or bool(resp.headers.get('ETag') or resp.headers.get('Last-Modified'))
+
+    # 保存响应（request_headers为发出请求时的请求头，用于Vary；未指定时取resp.request的请求头）
+    def put(self, url, resp, elapsed=None, request_headers=None):
+        if not self.is_cacheable(resp):
+            return False
+        if request_headers is None and resp.request is not None:
+            request_headers = resp.request.headers
+        meta = {
+            'url': url,
+            'status': resp.status_code,
+            'reason': resp.reason,
+            'encoding': resp.encoding,
+            'headers': dict(resp.headers),
+            'etag': resp.headers.get('ETag'),
+            'last_modified': resp.headers.get('Last-Modified'),
+            'stored_at': time(),
+            'elapsed': elapsed,
+            'vary': self.make_vary(self.get_vary_names(resp.headers), request_headers),
+        }
+        self._write(url, meta, resp.content)
+        with self._lock:
+            self._stores += 1
+        return True
+
+    # 304时刷新缓存的保存时间（及服务器返回的新校验信息），返回由缓存构造的响应
+    def revalidate(self, url, meta, resp):
+        response = self.load_response(url, meta)
+        meta = dict(meta)
+        meta['stored_at'] = time()
+        for name, key in (('ETag', 'etag'), ('Last-Modified', 'last_modified')):
+            if resp.headers.get(name):
+                meta[key] = resp.headers[name]
+        self._write(url, meta, response.content)
+        self.record_revalidated(len(response.content))
+        return response
+
+    def _write(self, url, meta, content):
+        path = self._path(self.make_key(url))
+        tmp_path = None
+        head = json.dumps(meta, ensure_ascii=True).encode(self.DEFAULT_ENCODING) + b'\n'
+        try:
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            # 临时文件名唯一（同一进程内多个线程可能同时写入同一缓存项）
+            fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp',
+                                            dir=os.path.dirname(path))
+            with os.fdopen(fd, 'wb') as fp:
+                fp.write(head)
+                fp.write(content)
+            os.replace(tmp_path, path)
+        except OSError:
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+            return
+
+        with self._lock:
+            self._disk_bytes += len(head) + len(content) - old_size
+            over = self._disk_bytes > self._max_bytes
+        if over:
+            self._evict(keep=path)
+
+    def _remove(self, path):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            self._disk_bytes -= size
+            self._evictions += 1
+
+    def _evict(self, keep=None):
+        files = sorted(self._list_files(), key=lambda f: f[2])
+        with self._lock:
+            self._disk_bytes = sum(f[1] for f in files)
+            for path, size, mtime in files:
+                if self._disk_bytes <= self._max_bytes:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                self._disk_bytes -= size
+                self._evictions += 1
+
+    def record_hit(self, meta, nbytes):
+        with self._lock:
+            self._hits += 1
+            self._bytes_saved += nbytes
+            self._latency_saved += meta.get('elapsed') or 0.0
+
+    def record_revalidated(self, nbytes):
+        with self._lock:
+            self._revalidated += 1
+            self._bytes_saved += nbytes
+
+    def record_miss(self):
+        with self._lock:
+            self._misses += 1
+
+    def clear(self):
+        for path, size, mtime in self._list_files():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_bytes = 0
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "revalidated": self._revalidated,
+                "misses": self._misses,
+                "stores": self._stores,
+                "evictions": self._evictions,
+                "bytes_saved": self._bytes_saved,
+                "latency_saved": self._latency_saved,
+                "disk_bytes": self._disk_bytes,
+            }
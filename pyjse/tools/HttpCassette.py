@@ -0,0 +1,261 @@
+# coding=utf-8
+
+import os
+import json
+import mmap
+import struct
+import hashlib
+import tempfile
+from functools import partial
+from threading import Lock
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+class CassetteRecord:
+    """
+    流式响应的录制项：响应内容分块写入临时文件（超过SPOOL_SIZE后落盘），完成后一次性追加到录制文件
+    """
+
+    SPOOL_SIZE = 1024 * 1024
+
+    def __init__(self, cassette, meta):
+        self._cassette = cassette
+        self._meta = meta
+        self._fp = tempfile.SpooledTemporaryFile(max_size=self.SPOOL_SIZE)
+        self._length = 0
+
+    def write(self, chunk):
+        self._fp.write(chunk)
+        self._length += len(chunk)
+
+    # 完成录制（追加到录制文件）
+    def close(self):
+        if self._fp is None:
+            return
+        try:
+            self._fp.seek(0)
+            self._cassette.append(self._meta, self._fp, self._length)
+        finally:
+            self.discard()
+
+    # 放弃录制（如下载出错）
+    def discard(self):
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+
+
+class HttpCassette:
+    """
+    HTTP请求录制/回放（单文件：文件头 + 各响应内容 + JSON索引 + 文件尾）
+    录制模式：响应内容到达时即追加到文件（不在内存中保留），save()时仅在有新录制时重写文件尾的索引；
+    回放模式：以mmap方式读取，按请求直接返回录制的响应，不访问网络
+    同一请求录制多次时按录制顺序依次回放（超出次数后重复最后一次）
+    """
+
+    MODE_RECORD = "record"
+    MODE_REPLAY = "replay"
+
+    MAGIC = b"PYJSECAS1\n"
+    FOOTER_FORMAT = "<Q"
+    FOOTER_SIZE = struct.calcsize(FOOTER_FORMAT)
+    DEFAULT_ENCODING = 'utf-8'
+    COPY_BUFSIZE = 64 * 1024
+
+    def __init__(self, file_name, mode=MODE_REPLAY):
+        if mode not in {self.MODE_RECORD, self.MODE_REPLAY}:
+            raise ValueError("cassette mode illegal!")
+        self._file_name = os.path.abspath(file_name)
+        self._mode = mode
+        self._lock = Lock()
+
+        self._records = []  # 录制：已写入内容的索引项
+        self._data_end = 0
+        self._dirty = False
+        self._index = {}  # 回放：key -> [meta, ...]
+        self._cursors = {}
+        self._fp = None
+        self._mm = None
+
+        self._recorded = 0
+        self._replayed = 0
+        self._missed = 0
+
+        if mode == self.MODE_REPLAY:
+            self._open()
+        else:
+            self._create()
+
+    @property
+    def file_name(self):
+        return self._file_name
+
+    @property
+    def mode(self):
+        return self._mode
+
+    @property
+    def recording(self):
+        return self._mode == self.MODE_RECORD
+
+    @property
+    def replaying(self):
+        return self._mode == self.MODE_REPLAY
+
+    def make_key(self, method, url, data=None):
+        h = hashlib.sha1()
+        h.update(method.upper().encode(self.DEFAULT_ENCODING))
+        h.update(b'\0')
+        h.update(url.encode(self.DEFAULT_ENCODING))
+        h.update(b'\0')
+        if data is not None:
+            if isinstance(data, str):
+                data = data.encode(self.DEFAULT_ENCODING)
+            elif not isinstance(data, bytes):
+                data = json.dumps(data, sort_keys=True).encode(self.DEFAULT_ENCODING)
+            h.update(data)
+        return h.hexdigest()
+
+    def make_meta(self, method, url, data, resp):
+        return {
+            'key': self.make_key(method, url, data),
+            'method': method.upper(),
+            'url': url,
+            'final_url': resp.url,
+            'status': resp.status_code,
+            'reason': resp.reason,
+            'encoding': resp.encoding,
+            'headers': dict(resp.headers),
+        }
+
+    def _create(self):
+        dirname = os.path.dirname(self._file_name)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        self._fp = open(self._file_name, 'w+b')
+        self._fp.write(self.MAGIC)
+        self._data_end = len(self.MAGIC)
+        self._dirty = True
+
+    # 录制一次请求的响应（读取完整响应内容；流式响应使用open_record()）
+    def record(self, method, url, data, resp):
+        content = resp.content
+        meta = self.make_meta(method, url, data, resp)
+        with self._lock:
+            self._write_content(meta, [content], len(content))
+
+    # 开始录制流式响应，返回CassetteRecord（由调用方在读取响应时写入各块，完成后close()）
+    def open_record(self, method, url, data, resp):
+        return CassetteRecord(self, self.make_meta(method, url, data, resp))
+
+    # 追加已读取完成的响应内容（fp为文件对象）
+    def append(self, meta, fp, length):
+        with self._lock:
+            self._write_content(meta, iter(partial(fp.read, self.COPY_BUFSIZE), b''), length)
+
+    def _write_content(self, meta, chunks, length):
+        fp = self._fp
+        fp.seek(self._data_end)
+        for chunk in chunks:
+            fp.write(chunk)
+        self._records.append(dict(meta, offset=self._data_end, length=length))
+        self._data_end += length
+        self._dirty = True
+        self._recorded += 1
+
+    # 写入索引（仅在有新录制时；内容已在录制时写入）
+    def save(self):
+        if not self.recording:
+            return
+        with self._lock:
+            if not self._dirty or self._fp is None:
+                return
+            fp = self._fp
+            data = json.dumps(self._records, ensure_ascii=True).encode(self.DEFAULT_ENCODING)
+            fp.seek(self._data_end)
+            fp.write(data)
+            fp.write(struct.pack(self.FOOTER_FORMAT, len(data)))
+            fp.truncate()
+            fp.flush()
+            self._dirty = False
+
+    def _open(self):
+        self._fp = open(self._file_name, 'rb')
+        try:
+            self._load_index()
+        except Exception:
+            self.close()
+            raise
+
+    # 读取并校验文件尾及索引（录制中断时文件没有索引，给出明确的错误而非mmap/json的原始异常）
+    def _load_index(self):
+        fp = self._fp
+        size = os.fstat(fp.fileno()).st_size
+        magic = fp.read(len(self.MAGIC))
+        if not self.MAGIC.startswith(magic):
+            raise ValueError("cassette file illegal! ({})".format(self._file_name))
+        if size < len(self.MAGIC) + self.FOOTER_SIZE:
+            raise ValueError("incomplete cassette file (no index, recording interrupted?)! ({})".format(
+                self._file_name))
+
+        self._mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        mm = self._mm
+        index_size = struct.unpack(self.FOOTER_FORMAT, mm[size - self.FOOTER_SIZE:size])[0]
+        index_start = size - self.FOOTER_SIZE - index_size
+        try:
+            if index_start < len(self.MAGIC):
+                raise ValueError("index size out of range")
+            index = json.loads(mm[index_start:size - self.FOOTER_SIZE].decode(self.DEFAULT_ENCODING))
+            for meta in index:
+                if not (len(self.MAGIC) <= meta['offset'] and meta['offset'] + meta['length'] <= index_start):
+                    raise ValueError("content out of range")
+        except (ValueError, TypeError, KeyError) as e:
+            raise ValueError("incomplete cassette file (bad index: {}, recording interrupted?)! ({})".format(
+                e, self._file_name))
+        for meta in index:
+            self._index.setdefault(meta['key'], []).append(meta)
+
+    # 回放：返回录制的响应（未录制时抛出异常，不访问网络）
+    def replay(self, method, url, data=None):
+        key = self.make_key(method, url, data)
+        with self._lock:
+            metas = self._index.get(key)
+            if not metas:
+                self._missed += 1
+                raise RuntimeError("request not recorded in cassette! ({} {})".format(method.upper(), url))
+            n = self._cursors.get(key, 0)
+            self._cursors[key] = n + 1
+            self._replayed += 1
+        meta = metas[min(n, len(metas) - 1)]
+
+        resp = requests.Response()
+        resp.url = meta.get('final_url') or url
+        resp.status_code = meta['status']
+        resp.reason = meta.get('reason')
+        resp.encoding = meta.get('encoding')
+        resp.headers = CaseInsensitiveDict(meta.get('headers') or {})
+        resp._content = self._mm[meta['offset']:meta['offset'] + meta['length']]
+        resp._content_consumed = True
+        return resp
+
+    def close(self):
+        if self.recording:
+            self.save()
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "mode": self._mode,
+                "recorded": self._recorded,
+                "replayed": self._replayed,
+                "missed": self._missed,
+                "entries": len(self._records) if self.recording else sum(len(m) for m in self._index.values()),
+            }
@@ -0,0 +1,81 @@
+# coding=utf-8
+
+from threading import Lock
+
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class ConnectionMetrics:
+    """
+    连接统计：新建连接（socket）数与发出的请求数，二者之差即复用已有连接的请求数
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._connections = 0
+        self._requests = 0
+
+    def add_connection(self):
+        with self._lock:
+            self._connections += 1
+
+    def add_request(self):
+        with self._lock:
+            self._requests += 1
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "connections": self._connections,
+                "requests": self._requests,
+                "reused": max(self._requests - self._connections, 0),
+            }
+
+
+# 生成计数的连接类（每新建socket、每发出请求时计数）
+def make_counting_connection_class(base, metrics):
+    class CountingConnection(base):
+        def _new_conn(self):
+            sock = super()._new_conn()
+            metrics.add_connection()
+            return sock
+
+        def request(self, *args, **kwargs):
+            metrics.add_request()
+            return super().request(*args, **kwargs)
+
+    CountingConnection.__name__ = "Counting" + base.__name__
+    return CountingConnection
+
+
+# 生成重试策略（max_retries为0时不重试）
+def make_retry(max_retries, backoff_factor=0, retry_status=None):
+    if not max_retries:
+        return 0
+    return Retry(total=max_retries, connect=max_retries, read=max_retries, status=max_retries,
+                 backoff_factor=backoff_factor, status_forcelist=retry_status, raise_on_status=False)
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    带连接统计的HTTPAdapter（连接池大小、重试策略同HTTPAdapter参数）
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.metrics = ConnectionMetrics()
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        metrics = self.metrics
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: type(pool_class.__name__, (pool_class,), {
+                'ConnectionCls': make_counting_connection_class(pool_class.ConnectionCls, metrics),
+            })
+            for scheme, pool_class in self.poolmanager.pool_classes_by_scheme.items()
+        }
+
+    def __setstate__(self, state):
+        self.metrics = ConnectionMetrics()
+        super().__setstate__(state)
@@ -0,0 +1,55 @@
+# coding=utf-8
+
+import json
+
+
+class HttpResponse:
+    """
+    轻量的HTTP响应对象（供脚本读取状态、响应头等；text/json在访问时才解码，写入文件时不保留内容）
+    """
+
+    def __init__(self, response=None, elapsed=None, bytes=None, file_name=None):
+        self._response = response
+        self.url = response.url if response is not None else None
+        self.status = response.status_code if response is not None else None
+        self.ok = response.ok if response is not None else False
+        self.reason = response.reason if response is not None else None
+        self.encoding = response.encoding if response is not None else None
+        self.headers = dict(response.headers) if response is not None else {}
+        self.elapsed = elapsed
+        # 限速排队等待时间（秒）
+        self.queue_delay = getattr(response, 'queue_delay', 0.0) if response is not None else 0.0
+        self.file_name = file_name
+        if bytes is None and response is not None and file_name is None:
+            bytes = len(response.content)
+        self.bytes = bytes or 0
+
+    @property
+    def response(self):
+        return self._response
+
+    # 吞吐量（字节/秒）
+    @property
+    def throughput(self):
+        if not self.elapsed:
+            return None
+        return self.bytes / self.elapsed
+
+    @property
+    def content(self):
+        if self._response is None or self.file_name is not None:
+            return None
+        return self._response.content
+
+    @property
+    def text(self):
+        if self._response is None or self.file_name is not None:
+            return None
+        return self._response.text
+
+    def json(self):
+        text = self.text
+        return json.loads(text) if text is not None else None
+
+    def __repr__(self):
+        return "<HttpResponse [{}] {}>".format(self.status, self.url)
@@ -0,0 +1,134 @@
+# coding=utf-8
+
+from threading import Lock
+from time import sleep, monotonic
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    """
+    令牌桶：按rate（次/秒）补充令牌，最多积累burst个；取令牌时预约，不足时返回需等待的时间
+    """
+
+    def __init__(self, rate, burst=None):
+        self._lock = Lock()
+        self._rate = float(rate)
+        self._burst = float(burst if burst else max(rate, 1))
+        self._tokens = self._burst
+        self._last = monotonic()
+
+    @property
+    def rate(self):
+        return self._rate
+
+    @property
+    def burst(self):
+        return self._burst
+
+    def set_rate(self, rate, burst=None):
+        with self._lock:
+            self._refill()
+            self._rate = float(rate)
+            self._burst = float(burst if burst else max(rate, 1))
+            self._tokens = min(self._tokens, self._burst)
+
+    def _refill(self):
+        now = monotonic()
+        self._tokens = min(self._burst, self._tokens + (now - self._last) * self._rate)
+        self._last = now
+
+    # 预约一个令牌，返回需等待的秒数（并发调用按预约先后排队）
+    def reserve(self):
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self._rate
+
+
+class RateLimiter:
+    """
+    按主机限速的请求调度器（每个主机一个令牌桶；多线程共用，统计每次请求的排队等待时间）
+    主机按URL的主机名区分（不含端口及用户信息）；限速在发出请求前生效，
+    连接池重试策略（urllib3 Retry）内部的重试不经过限速
+    """
+
+    def __init__(self, rate=None, burst=None, host_rates=None):
+        self._lock = Lock()
+        self._rate = rate
+        self._burst = burst
+        self._host_rates = {}
+        self._buckets = {}
+        self._stats = {}
+        for host, host_rate in (host_rates or {}).items():
+            if isinstance(host_rate, (tuple, list)):
+                self.set_rate(host, *host_rate)
+            else:
+                self.set_rate(host, host_rate)
+
+    @staticmethod
+    def get_host(url):
+        return urlsplit(url).hostname or ''
+
+    # 设置限速（host为None时设置默认限速；rate为None或0时取消限速）
+    def set_rate(self, host=None, rate=None, burst=None):
+        with self._lock:
+            if host is None:
+                self._rate, self._burst = rate, burst
+                # 未单独设置的主机按新的默认限速重建
+                for h in list(self._buckets.keys()):
+                    if h not in self._host_rates:
+                        del self._buckets[h]
+                return
+            # 同get_host()规范为主机名（忽略端口及用户信息）
+            host = self.get_host("//" + host) or host.lower()
+            if rate:
+                self._host_rates[host] = (rate, burst)
+                bucket = self._buckets.get(host)
+                if bucket is not None:
+                    bucket.set_rate(rate, burst)
+            else:
+                self._host_rates.pop(host, None)
+                self._buckets.pop(host, None)
+
+    def _get_bucket(self, host):
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                rate, burst = self._host_rates.get(host, (self._rate, self._burst))
+                if not rate:
+                    return None
+                bucket = self._buckets[host] = TokenBucket(rate, burst)
+            return bucket
+
+    # 请求前调用：按限速等待，返回排队等待的秒数
+    def acquire(self, url):
+        host = self.get_host(url)
+        bucket = self._get_bucket(host)
+        delay = bucket.reserve() if bucket is not None else 0.0
+        if delay > 0:
+            sleep(delay)
+        with self._lock:
+            stat = self._stats.get(host)
+            if stat is None:
+                stat = self._stats[host] = {"requests": 0, "delayed": 0, "total_delay": 0.0, "max_delay": 0.0}
+            stat["requests"] += 1
+            if delay > 0:
+                stat["delayed"] += 1
+                stat["total_delay"] += delay
+                if delay > stat["max_delay"]:
+                    stat["max_delay"] = delay
+        return delay
+
+    def get_stats(self):
+        with self._lock:
+            stats = {}
+            for host, stat in self._stats.items():
+                stat = dict(stat)
+                stat["mean_delay"] = stat["total_delay"] / stat["requests"] if stat["requests"] else 0.0
+                rate, burst = self._host_rates.get(host, (self._rate, self._burst))
+                stat["rate"] = rate
+                stat["burst"] = burst
+                stats[host] = stat
+            return stats
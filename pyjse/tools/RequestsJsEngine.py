@@ -1,10 +1,21 @@
 # coding=utf-8
 
+import json
 import requests
+from requests.structures import CaseInsensitiveDict
 from functools import partial
 from queue import Queue, Empty
+from threading import Event
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+from time import perf_counter
 
 from pyjse.PyJsEngine import PyJsEngine, get_method_name
+from pyjse.ArgsRules import args_rules
+from pyjse.tools.HttpResponse import HttpResponse
+from pyjse.tools.HttpCache import HttpCache
+from pyjse.tools.HttpPool import PooledHTTPAdapter, make_retry
+from pyjse.tools.RateLimiter import RateLimiter
+from pyjse.tools.HttpCassette import HttpCassette
 
 __version__ = "1.0.191029"
 
@@ -17,9 +28,21 @@ class RequestsJsEngine(PyJsEngine):
     DEFAULT_REQUEST_TIMEOUT = 10
     DEFAULT_ENCODING = "utf-8"
     DEFAULT_INPUT_TIMEOUT = 60
+    DEFAULT_CONCURRENCY = 8
+    DEFAULT_DOWNLOAD_CHUNK_SIZE = 64 * 1024
+    # 连接池及重试（默认不重试，出错即失败；构建时指定max_retries后，重试仅用于幂等请求的连接/读取错误及下列状态码，
+    # 按指数退避等待）
+    DEFAULT_POOL_CONNECTIONS = 10
+    DEFAULT_POOL_MAXSIZE = 32
+    DEFAULT_MAX_RETRIES = 0
+    DEFAULT_BACKOFF_FACTOR = 0.5
+    DEFAULT_RETRY_STATUS = (429, 502, 503, 504)
 
     funcn_rget = "rget"
     funcn_rpost = "rpost"
+    funcn_rget_many = "rget_many"
+    funcn_rpost_many = "rpost_many"
+    funcn_rate_limit = "rate_limit"
     funcn_session = "session"  # TODO
     funcn_cookies = "cookies"  # TODO
     funcn_input = "input"
@@ -32,6 +55,13 @@ class RequestsJsEngine(PyJsEngine):
     attrn_headers = "headers"
     attrn_data = "data"
     attrn_timeout = "timeout"
+    attrn_requests = "requests"
+    attrn_concurrency = "concurrency"
+    attrn_batch_timeout = "batch_timeout"
+    attrn_ordered = "ordered"
+    attrn_host = "host"
+    attrn_rate = "rate"
+    attrn_burst = "burst"
     # attrn_encoding = "encoding"
     # attrn_get_bytes = "get_bytes"
 
@@ -74,7 +104,7 @@ class RequestsJsEngine(PyJsEngine):
             
             return Rget({
                 url: url,
-                headers: headers != null? JSON.stringnify(headers): null,
+                headers: headers != null? JSON.stringify(headers): null,
             });
         }
         
@@ -90,8 +120,8 @@ class RequestsJsEngine(PyJsEngine):
             
             return Rpost({
                 url: url,
-                data: data != null? JSON.stringnify(data): null,
-                headers: headers != null? JSON.stringnify(headers): null,
+                data: data != null? JSON.stringify(data): null,
+                headers: headers != null? JSON.stringify(headers): null,
             });
         }
     """
@@ -102,24 +132,57 @@ class RequestsJsEngine(PyJsEngine):
         self._session = requests.session()
         self._cookies = requests.cookies.RequestsCookieJar()
         self._session.cookies = self._cookies
+        self._http_adapter = self.make_http_adapter(
+            pool_connections=kwargs.get("pool_connections", self.DEFAULT_POOL_CONNECTIONS),
+            pool_maxsize=kwargs.get("pool_maxsize", self.DEFAULT_POOL_MAXSIZE),
+            max_retries=kwargs.get("max_retries", self.DEFAULT_MAX_RETRIES),
+            backoff_factor=kwargs.get("backoff_factor", self.DEFAULT_BACKOFF_FACTOR),
+            retry_status=kwargs.get("retry_status", self.DEFAULT_RETRY_STATUS))
+        self._session.mount("http://", self._http_adapter)
+        self._session.mount("https://", self._http_adapter)
+        if not kwargs.get("keep_alive", True):
+            self._session.headers["Connection"] = "close"
 
         self._cookies_str = None
         self._queue = Queue()
 
         self._input_timeout = kwargs.get("input_timeout", self.DEFAULT_INPUT_TIMEOUT)
 
+        # HTTP响应缓存（指定http_cache或http_cache_dir时启用，仅用于非流式的GET请求）
+        http_cache = kwargs.get("http_cache")
+        if http_cache is None and kwargs.get("http_cache_dir"):
+            http_cache = HttpCache(kwargs.get("http_cache_dir"),
+                                   ttl=kwargs.get("http_cache_ttl", HttpCache.DEFAULT_TTL),
+                                   max_bytes=kwargs.get("http_cache_max_bytes", HttpCache.DEFAULT_MAX_BYTES))
+        self._http_cache = http_cache
+
+        # 按主机限速（rate_limit为默认限速，次/秒；rate_limits为{主机: 限速或(限速, 突发数)}）
+        self._rate_limiter = RateLimiter(rate=kwargs.get("rate_limit"), burst=kwargs.get("rate_burst"),
+                                         host_rates=kwargs.get("rate_limits"))
+
+        # 请求录制/回放（cassette_mode为record时记录请求及响应，执行结束时写入cassette_file；
+        # 为replay时直接返回录制的响应，不访问网络、不限速）
+        cassette = kwargs.get("cassette")
+        if cassette is None and kwargs.get("cassette_file"):
+            cassette = HttpCassette(kwargs.get("cassette_file"),
+                                    mode=kwargs.get("cassette_mode", HttpCassette.MODE_REPLAY))
+        self._cassette = cassette
+
         # Register runners for Requests and js2py
         self.register_context({
             # ---- Engine functions ----
             self.funcn_rget: partial(self.run_rfunc, funcn=self.funcn_rget),
             self.funcn_rpost: partial(self.run_rfunc, funcn=self.funcn_rpost),
+            self.funcn_rget_many: partial(self.run_rfunc_many, funcn=self.funcn_rget),
+            self.funcn_rpost_many: partial(self.run_rfunc_many, funcn=self.funcn_rpost),
             self.funcn_input: self.run_input,
+            self.funcn_rate_limit: self.run_rate_limit,
             # ---- Constants ----
             "user_agent": self.DEFAULT_USER_AGENT,
         })
         self.append_prepare_script(self.PREPARE_SCRIPT_REQUESTS_JS)
 
-        self._logger.debug(msg="RequestsJsEngine loaded. ({})".format(__version__))
+        self._logger.debug("RequestsJsEngine loaded. (%s)", __version__)
 
     @property
     def cookies(self):
@@ -194,52 +257,352 @@ class RequestsJsEngine(PyJsEngine):
     def queue_put(self, item):
         self._queue.put_nowait(item)
 
-    def session_get(self, url, headers=None, timeout=DEFAULT_REQUEST_TIMEOUT):
+    # 生成带连接池大小及重试策略的HTTPAdapter
+    @staticmethod
+    def make_http_adapter(pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                          max_retries=DEFAULT_MAX_RETRIES, backoff_factor=DEFAULT_BACKOFF_FACTOR,
+                          retry_status=DEFAULT_RETRY_STATUS):
+        return PooledHTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                 max_retries=make_retry(max_retries, backoff_factor, retry_status))
+
+    # 连接复用统计：新建连接数、请求数，及复用已有连接的请求数
+    def get_connection_stats(self):
+        return self._http_adapter.metrics.get_stats()
+
+    @property
+    def rate_limiter(self):
+        return self._rate_limiter
+
+    def get_rate_limit_stats(self):
+        return self._rate_limiter.get_stats()
+
+    # 发出请求前按主机限速等待，等待时间记录到响应的queue_delay
+    def wait_rate_limit(self, url):
+        return self._rate_limiter.acquire(url)
+
+    @property
+    def http_cache(self):
+        return self._http_cache
+
+    def get_http_cache_stats(self):
+        if self._http_cache is None:
+            return None
+        return self._http_cache.get_stats()
+
+    @property
+    def cassette(self):
+        return self._cassette
+
+    def get_cassette_stats(self):
+        if self._cassette is None:
+            return None
+        return self._cassette.get_stats()
+
+    def save_cassette(self):
+        if self._cassette is not None:
+            self._cassette.save()
+
+    def do_finish(self):
+        super().do_finish()
+        self.save_cassette()
+
+    def session_get(self, url, headers=None, timeout=DEFAULT_REQUEST_TIMEOUT, stream=False):
+        cassette = self._cassette
+        if cassette is not None and cassette.replaying:
+            return cassette.replay("GET", url)
+        req = self.session_get_raw(url, headers=headers, timeout=timeout, stream=stream)
+        if cassette is not None:
+            self.record_response(cassette, "GET", url, None, req, stream)
+        return req
+
+    def session_get_raw(self, url, headers=None, timeout=DEFAULT_REQUEST_TIMEOUT, stream=False):
         if headers is None:
             headers = self.DEFAULT_HEADERS
         session = self._session
 
-        # 获取页面数据
+        cache = self._http_cache
+        if cache is None or stream:
+            # 获取页面数据
+            delay = self.wait_rate_limit(url)
+            req = session.get(url, headers=headers, timeout=timeout, stream=stream)
+            req.queue_delay = delay
+            return req
+
+        # 经缓存：未过期时直接使用缓存，否则带校验信息发送条件请求（Vary按会话请求头合并本次请求头后比较）
+        request_headers = CaseInsensitiveDict(session.headers)
+        request_headers.update(headers)
+        meta = cache.get_meta(url, request_headers)
+        if meta is not None and cache.is_fresh(meta):
+            resp = cache.load_response(url, meta)
+            cache.record_hit(meta, len(resp.content))
+            return resp
+
+        if meta is not None:
+            headers = dict(headers)
+            headers.update(cache.get_conditional_headers(meta))
+        delay = self.wait_rate_limit(url)
+        t = perf_counter()
         req = session.get(url, headers=headers, timeout=timeout)
+        if req.status_code == 304 and meta is not None:
+            req = cache.revalidate(url, meta, req)
+        else:
+            cache.record_miss()
+            cache.put(url, req, elapsed=perf_counter() - t, request_headers=request_headers)
+        req.queue_delay = delay
         return req
 
-    def session_post(self, url, headers=None, data=None, timeout=DEFAULT_REQUEST_TIMEOUT):
+    def session_post(self, url, headers=None, data=None, timeout=DEFAULT_REQUEST_TIMEOUT, stream=False):
+        cassette = self._cassette
+        if cassette is not None and cassette.replaying:
+            return cassette.replay("POST", url, data)
+
         if headers is None:
             headers = self.DEFAULT_HEADERS
         session = self._session
 
         # 获取页面数据
-        req = session.post(url, headers=headers, data=data, timeout=timeout)
+        delay = self.wait_rate_limit(url)
+        req = session.post(url, headers=headers, data=data, timeout=timeout, stream=stream)
+        req.queue_delay = delay
+        if cassette is not None:
+            self.record_response(cassette, "POST", url, data, req, stream)
         return req
 
+    # 录制响应（流式响应不在此读取内容，由save_response()边写文件边录制）
+    @staticmethod
+    def record_response(cassette, method, url, data, resp, stream=False):
+        if stream:
+            resp.cassette_record = cassette.open_record(method, url, data, resp)
+        else:
+            cassette.record(method, url, data, resp)
+
+    # 将响应内容分块写入文件（不在内存中保留完整内容），返回写入的字节数
+    @staticmethod
+    def save_response(resp, file_name, chunk_size=DEFAULT_DOWNLOAD_CHUNK_SIZE):
+        record = getattr(resp, 'cassette_record', None)
+        written = 0
+        try:
+            with open(file_name, 'wb') as fp:
+                for chunk in resp.iter_content(chunk_size=chunk_size):
+                    if chunk:
+                        fp.write(chunk)
+                        if record is not None:
+                            record.write(chunk)
+                        written += len(chunk)
+        except BaseException:
+            if record is not None:
+                record.discard()
+            raise
+        if record is not None:
+            record.close()
+        return written
+
+    # 解析请求头（支持字典或JSON字串）
+    @staticmethod
+    def parse_headers(headers):
+        if isinstance(headers, str):
+            headers = json.loads(headers) if headers.strip() else None
+        return headers or None
+
+    # 将批量请求项规范为字典（项可为url字串或{url, data, headers, timeout}对象）
+    def make_request_spec(self, item, timeout=None):
+        if isinstance(item, str):
+            item = {self.attrn_url: item}
+        elif not isinstance(item, dict):
+            raise ValueError("request item illegal!")
+        url = item.get(self.attrn_url)
+        if not isinstance(url, str) or url == '':
+            raise ValueError("url illegal!")
+        data = item.get(self.attrn_data)
+        if data is not None and not isinstance(data, (str, bytes)):
+            data = json.dumps(data)
+        return {
+            'url': self.var_replacer(url),
+            'data': data,
+            'headers': self.parse_headers(item.get(self.attrn_headers)) or self.DEFAULT_HEADERS,
+            'timeout': item.get(self.attrn_timeout) or timeout or self.DEFAULT_REQUEST_TIMEOUT,
+        }
+
+    # 执行批量请求中的一项，返回结果字典（出错时记录error，不抛出；abort已设置时不再发出请求）
+    def run_request_spec(self, index, spec, funcn, abort=None):
+        result = {
+            'index': index,
+            'url': spec['url'],
+            'status': None,
+            'ok': False,
+            'text': None,
+            'error': None,
+            'elapsed': None,
+            'queue_delay': None,
+        }
+        if abort is not None and abort.is_set():
+            result['error'] = "batch timeout"
+            return result
+        t = perf_counter()
+        try:
+            if funcn == self.funcn_rpost:
+                resp = self.session_post(spec['url'], headers=spec['headers'], data=spec['data'],
+                                         timeout=spec['timeout'])
+            else:
+                resp = self.session_get(spec['url'], headers=spec['headers'], timeout=spec['timeout'])
+            result['status'] = resp.status_code
+            result['ok'] = resp.ok
+            result['text'] = resp.text
+            result['queue_delay'] = getattr(resp, 'queue_delay', 0.0)
+        except Exception as e:
+            result['error'] = "{}: {}".format(type(e).__name__, e)
+        result['elapsed'] = perf_counter() - t
+        return result
+
+    @args_rules({
+        attrn_url: ('url', 's', None),
+        attrn_data: ('data', 's', None),
+        attrn_headers: ('headers', 's', None),
+        attrn_timeout: ('timeout', 'r', None),
+        PyJsEngine.attrn__to_file: ('_to_file', 's', None),
+        PyJsEngine.attrn_chunk_size: ('chunk_size', 'i', None),
+    })
     def run_rfunc(self, jskwargs, *args, funcn=None):
         logger = self._logger
 
         # 属性
-        jargs = self.args_parser(jskwargs, {
-            self.attrn_url: ('url', 's', None),
-            self.attrn_data: ('data', 's', None),
-            self.attrn_headers: ('headers', 's', None),
-            self.attrn_timeout: ('timeout', 'r', None),
-        })
+        jargs = self.args_parser(jskwargs, RequestsJsEngine.run_rfunc.args_rules)
         url = jargs['url']
         data = jargs['data']
-        headers = jargs['headers'] or self.DEFAULT_HEADERS
         timeout = jargs['timeout'] or self.DEFAULT_REQUEST_TIMEOUT
+        _to_file = jargs['_to_file']
+        chunk_size = jargs['chunk_size'] or self.DEFAULT_DOWNLOAD_CHUNK_SIZE
+
+        # headers/data为对象时直接使用原始值（按字串解析会得到Python的repr）
+        raw_kwargs = self.args_parser_all(jskwargs)
+        if isinstance(raw_kwargs, dict):
+            if isinstance(raw_kwargs.get(self.attrn_headers), dict):
+                jargs['headers'] = raw_kwargs[self.attrn_headers]
+            if isinstance(raw_kwargs.get(self.attrn_data), (dict, list)):
+                data = json.dumps(raw_kwargs[self.attrn_data])
 
         try:
+            headers = self.parse_headers(jargs['headers']) or self.DEFAULT_HEADERS
+            stream = _to_file is not None
+            t = perf_counter()
             if funcn == self.funcn_rget:
-                logger.debug(
-                    msg="[RequestsJsEngine]<{}>: Requests-get url={}, headers={}".format(get_method_name(), url,
-                                                                                         headers))
-                self.session_get(url, headers=headers, timeout=timeout)
-                logger.info(msg="[RequestsJsEngine]<{}>: {}".format(get_method_name(), "Requests-get finished!"))
+                logger.debug("[RequestsJsEngine]<%s>: Requests-get url=%s, headers=%s", get_method_name(), url, headers)
+                resp = self.session_get(url, headers=headers, timeout=timeout, stream=stream)
             elif funcn == self.funcn_rpost:
                 logger.debug(
-                    msg="[RequestsJsEngine]<{}>: Requests-post url={}, data={}, headers={}".format(get_method_name(),
-                                                                                                   url, data, headers))
-                self.session_post(url, headers=headers, data=data, timeout=timeout)
-                logger.info(msg="[RequestsJsEngine]<{}>: {}".format(get_method_name(), "Requests-post finished!"))
+                    "[RequestsJsEngine]<%s>: Requests-post url=%s, data=%s, headers=%s",
+                    get_method_name(), url, data, headers)
+                resp = self.session_post(url, headers=headers, data=data, timeout=timeout, stream=stream)
+            else:
+                raise ValueError("funcn illegal!")
+
+            if stream:
+                # 分块写入文件
+                try:
+                    written = self.save_response(resp, _to_file, chunk_size=chunk_size)
+                finally:
+                    resp.close()
+                response = HttpResponse(resp, elapsed=perf_counter() - t, bytes=written, file_name=_to_file)
+            else:
+                response = HttpResponse(resp, elapsed=perf_counter() - t)
+            logger.info("[RequestsJsEngine]<%s>: Requests-%s finished! (status=%s, %s bytes, %.3fs)",
+                        get_method_name(), funcn[1:], response.status, response.bytes, response.elapsed)
+            return response
+        except Exception as e:
+            self.internal_exception_handler(funcn=get_method_name(), jskwargs=jskwargs, args=args, e=e)
+
+    # 批量请求：在有限并发的线程池中执行（共用会话及Cookie），结果按顺序或按完成先后返回
+    # 超出batch_timeout时：未开始的请求取消（不再发出），结果error为"batch timeout"；
+    # 已发出的请求无法中止，在后台继续至完成或单个请求的timeout，结果error为"batch timeout (still running)"，
+    # 其响应被丢弃（但仍会写入HTTP缓存/录制文件并计入统计）
+    @args_rules({
+        attrn_concurrency: ('concurrency', 'i', None),
+        attrn_timeout: ('timeout', 'r', None),
+        attrn_batch_timeout: ('batch_timeout', 'r', None),
+        attrn_ordered: ('ordered', 'b', True),
+    })
+    def run_rfunc_many(self, jskwargs, *args, funcn=None):
+        logger = self._logger
+
+        # 属性
+        jargs = self.args_parser(jskwargs, RequestsJsEngine.run_rfunc_many.args_rules)
+        concurrency = jargs['concurrency'] or self.DEFAULT_CONCURRENCY
+        timeout = jargs['timeout'] or self.DEFAULT_REQUEST_TIMEOUT
+        batch_timeout = jargs['batch_timeout']
+        ordered = jargs['ordered']
+        items = args[0] if len(args) > 0 else None
+        if items is None:
+            items = self.args_parser_all(jskwargs).get(self.attrn_requests)
+
+        try:
+            if items is None:
+                raise ValueError("requests illegal!")
+            specs = [self.make_request_spec(item, timeout=timeout) for item in self.iter_rows_data(items)]
+            logger.debug("[RequestsJsEngine]<%s>: %s requests, concurrency=%s", get_method_name(), len(specs),
+                         concurrency)
+
+            results = [None] * len(specs)
+            done = []
+            abort = Event()
+            executor = ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(specs) or 1)))
+            try:
+                futures = {executor.submit(self.run_request_spec, i, spec, funcn, abort=abort): i
+                           for i, spec in enumerate(specs)}
+                try:
+                    for future in as_completed(futures, timeout=batch_timeout):
+                        result = future.result()
+                        results[result['index']] = result
+                        done.append(result)
+                except FuturesTimeoutError:
+                    logger.info("[RequestsJsEngine]<%s>: batch timeout! (%s/%s finished)", get_method_name(),
+                                len(done), len(specs))
+                    abort.set()
+                    for future, i in futures.items():
+                        if results[i] is not None:
+                            continue
+                        cancelled = future.cancel()
+                        if not cancelled and future.done():
+                            # 超时后刚刚完成
+                            results[i] = future.result()
+                        else:
+                            results[i] = {
+                                'index': i,
+                                'url': specs[i]['url'],
+                                'status': None,
+                                'ok': False,
+                                'text': None,
+                                'error': "batch timeout" if cancelled else "batch timeout (still running)",
+                                'elapsed': None,
+                                'queue_delay': None,
+                            }
+                        done.append(results[i])
+            finally:
+                executor.shutdown(wait=False)
+
+            logger.info("[RequestsJsEngine]<%s>: %s requests finished!", get_method_name(), len(specs))
+            return results if ordered else done
+        except Exception as e:
+            self.internal_exception_handler(funcn=get_method_name(), jskwargs=jskwargs, args=args, e=e)
+
+    # 操作：设置限速（未指定host时设置默认限速；rate为0时取消限速）
+    @args_rules({
+        attrn_host: ('host', 's', None),
+        attrn_rate: ('rate', 'r', None),
+        attrn_burst: ('burst', 'i', None),
+    })
+    def run_rate_limit(self, jskwargs, *args):
+        logger = self._logger
+
+        # 属性
+        jargs = self.args_parser(jskwargs, RequestsJsEngine.run_rate_limit.args_rules)
+        host = jargs['host'] or None
+        rate = jargs['rate']
+        burst = jargs['burst']
+
+        try:
+            self._rate_limiter.set_rate(host, rate, burst)
+            logger.debug("[RequestsJsEngine]<%s>: rate limit set. (host=%s, rate=%s, burst=%s)", get_method_name(),
+                         host, rate, burst)
         except Exception as e:
             self.internal_exception_handler(funcn=get_method_name(), jskwargs=jskwargs, args=args, e=e)
 
@@ -254,8 +617,7 @@ class RequestsJsEngine(PyJsEngine):
             try:
                 code = self._queue.get(timeout=self._input_timeout)
             except Empty:
-                logger.debug(
-                    msg="[RequestsJsEngine]<{}>: {}".format(get_method_name(), "Waiting for inputing code timeout!"))
+                logger.debug("[RequestsJsEngine]<%s>: Waiting for inputing code timeout!", get_method_name())
                 code = "#"
             return code
         except Exception as e:
@@ -0,0 +1,88 @@
+# coding=utf-8
+
+import logging
+import unittest
+
+from pyjse import PyJsEngine
+from pyjse.ArgsRules import ArgsRules, to_int, to_number, to_bool, to_str
+
+
+logger = logging.getLogger(__name__)
+
+
+class RenamedJsEngine(PyJsEngine):
+    attrn_name = "nm"
+
+
+def make_engine(engine_class=PyJsEngine):
+    engine = engine_class(logger=logger)
+    engine.run(temp_script="var _ = 0;")
+    return engine
+
+
+class ArgsRulesTest(unittest.TestCase):
+    def test_to_int(self):
+        self.assertEqual(to_int("42"), 42)
+        self.assertEqual(to_int(" -7 "), -7)
+        self.assertEqual(to_int("3.9"), 3)
+        self.assertEqual(to_int(2.5), 2)
+        self.assertEqual(to_int("0x1f"), 31)
+        self.assertIsNone(to_int(None))
+
+    def test_to_number(self):
+        self.assertEqual(to_number("42"), 42)
+        self.assertIsInstance(to_number("42"), int)
+        self.assertEqual(to_number("1.5"), 1.5)
+        self.assertEqual(to_number("1e3"), 1000.0)
+        self.assertEqual(to_number("0x10"), 16)
+        self.assertIsNone(to_number(None))
+
+    def test_rejects_expressions(self):
+        # 不再以eval求值表达式
+        for s in ("2*3", "1+1", "__import__('os')", "abc", ""):
+            with self.assertRaises(ValueError):
+                to_int(s)
+            with self.assertRaises(ValueError):
+                to_number(s)
+
+    def test_to_bool_and_str(self):
+        self.assertTrue(to_bool("true"))
+        self.assertTrue(to_bool("True"))
+        self.assertTrue(to_bool(True))
+        self.assertFalse(to_bool("1"))
+        self.assertFalse(to_bool(None))
+        self.assertEqual(to_str(1), "1")
+        self.assertIsNone(to_str(None))
+
+    def test_parse_defaults(self):
+        engine = make_engine()
+        rules = ArgsRules({
+            "n": ("n", "i", 5),
+            "r": ("r", "r", None),
+            "b": ("b", "b", True),
+            "opt": ("opt", "s"),
+        })
+        args = engine.args_parser({}, rules)
+        self.assertEqual((args["n"], args["r"], args["b"]), (5, None, True))
+        self.assertNotIn("opt", args)
+        args = engine.args_parser({"n": "0x2", "r": "2.5", "b": "false", "opt": 1}, rules)
+        self.assertEqual((args["n"], args["r"], args["b"], args["opt"]), (2, 2.5, False, "1"))
+
+    def test_parse_var_replace(self):
+        engine = PyJsEngine(logger=logger)
+        engine.run(temp_script='Set_str({n: "12"});')
+        rules = ArgsRules({"n": ("n", "i", None), "raw": ("raw", "sr", None)})
+        args = engine.args_parser({"n": "$%n%$", "raw": "$%n%$"}, rules)
+        self.assertEqual((args["n"], args["raw"]), (12, "$%n%$"))
+
+    def test_subclass_attr_names(self):
+        # 子类重定义的attrn_*在解析时生效
+        rules = PyJsEngine.run_output.args_rules
+        args = make_engine(RenamedJsEngine).args_parser({"nm": "a.csv", "name": "b.csv"}, rules)
+        self.assertEqual(args["file_name"], "a.csv")
+        args = make_engine().args_parser({"nm": "a.csv", "name": "b.csv"}, rules)
+        self.assertEqual(args["file_name"], "b.csv")
+
+
+if __name__ == "__main__":
+    unittest.main()
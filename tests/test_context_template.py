@@ -0,0 +1,77 @@
+# coding=utf-8
+
+import os
+import csv
+import shutil
+import logging
+import tempfile
+import unittest
+
+from pyjse import PyJsEngine
+
+
+logger = logging.getLogger(__name__)
+
+SCRIPT = r"""
+    var n = 0, names = [];
+    var it = Load_data({name: "input.csv", stream: true});
+    for (var i = Next_(it); i; ){
+        n++;
+        names.push(i.name);
+        i = Next_(it);
+    }
+    Set_str({n: "" + n, names: names.join("|"), require: typeof require, x2: "" + x2});
+"""
+
+
+class ChainedPrepareJsEngine(PyJsEngine):
+    """
+    追加两段预备脚本（前一段以无换行的行注释结尾，检查合并后各段仍相互独立）
+    """
+
+    def __init__(self, logger=None, msg_handler=None, **kwargs):
+        super().__init__(logger=logger, msg_handler=msg_handler, **kwargs)
+        self.append_prepare_script("var x1 = 1 // no newline")
+        self.append_prepare_script("var x2 = x1 + 1")
+
+
+class ContextTemplateTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix="pyjse_test_")
+        with open(os.path.join(self.work_dir, "input.csv"), 'w', newline='', encoding='utf-8') as fp:
+            cw = csv.writer(fp)
+            cw.writerow(["id", "name"])
+            for i in range(5):
+                cw.writerow([i, "name_{}".format(i)])
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def run_script(self, use_context_template):
+        engine = ChainedPrepareJsEngine(logger=logger, use_context_template=use_context_template)
+        engine.add_to_path(self.work_dir)
+        engine.run(temp_script=SCRIPT)
+        return engine.sync_vars()
+
+    def test_template_same_as_fresh(self):
+        fresh = self.run_script(False)
+        self.assertEqual((fresh["n"], fresh["require"], fresh["x2"]), ("5", "function", "2"))
+        self.assertEqual(self.run_script(True), fresh)
+        # 模板已缓存时（第二个引擎）结果相同
+        self.assertEqual(self.run_script(True), fresh)
+
+    def test_prepare_script_error(self):
+        errors = []
+        for use_context_template in (False, True):
+            engine = PyJsEngine(logger=logger, use_context_template=use_context_template)
+            engine.append_prepare_script("var ok = 1;")
+            engine.append_prepare_script("var broken = ;")
+            with self.assertRaises(Exception) as cm:
+                engine.create_js_context()
+            errors.append((type(cm.exception), str(cm.exception)))
+        # 使用模板时报告的错误与逐个执行预备脚本时相同
+        self.assertEqual(errors[0], errors[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+# coding=utf-8
+
+import io
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from pyjse import PyJsEngine
+
+
+class CountLinesTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix="pyjse_test_")
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def count(self, data, **kwargs):
+        file_name = os.path.join(self.work_dir, "data.csv")
+        with open(file_name, 'wb') as fp:
+            fp.write(data)
+        return PyJsEngine.count_file_lines(file_name, **kwargs)
+
+    def test_plain(self):
+        self.assertEqual(self.count(b"id,name\n1,a\n2,b\n"), 3)
+        self.assertEqual(self.count(b"id,name\n1,a\n2,b"), 3)
+        self.assertEqual(self.count(b""), 0)
+
+    def test_quoted_newline(self):
+        self.assertEqual(self.count(b'id,name\n1,"a\nb"\n2,"c""\nd"\n'), 3)
+
+    def test_unquoted_quote_char(self):
+        # 字段中间的引号不开启引号模式
+        data = b'id,name,x\n1,5" screen,x\n2,a,x\n3,b,x\n4,c,x\n5,d,x\n'
+        self.assertEqual(self.count(data), 6)
+
+    def test_cr_line_endings(self):
+        self.assertEqual(self.count(b"id,name\r1,a\r2,b\r"), 3)
+        self.assertEqual(self.count(b"id,name\r\n1,a\r\n2,b"), 3)
+        self.assertEqual(self.count(b"id,name\r1,a\r2,b", csv_quoting=False), 3)
+
+    def test_crlf_and_quoted_stay_on_byte_path(self):
+        # Windows导出的CRLF文件及含引号字段的文件不退回csv.reader
+        data = b'id,name,x\r\n1,"a, b",x\r\n2,"c\r\nd",x\r\n3,"e""f",x\r\n4,"",x'
+        with mock.patch.object(PyJsEngine, "count_text_lines", side_effect=AssertionError):
+            self.assertEqual(PyJsEngine.count_bytes_lines(io.BytesIO(data)), 5)
+            self.assertEqual(PyJsEngine.count_bytes_lines(io.BytesIO(data), csv_quoting=False), 6)
+
+    def test_chunk_boundaries(self):
+        data = b'id,name\r\n1,"a\r\nb"\r\n2,"c"",\nd"\r\n3,x\r4,"y"\n'
+        tp = io.TextIOWrapper(io.BytesIO(data), encoding='latin-1', newline='')
+        expected = len(list(csv.reader(tp)))
+        for bufsize in (1, 2, 3, 5, 8):
+            with mock.patch.object(PyJsEngine, "LINE_COUNT_BUFSIZE", bufsize):
+                self.assertEqual(PyJsEngine.count_bytes_lines(io.BytesIO(data)), expected)
+
+    def test_ambiguous_falls_back(self):
+        # 闭合引号后紧跟其他字符、引号未闭合时按CSV记录统计
+        self.assertEqual(self.count(b'id,name\n1,"a"b\nc"\n2,x\n'), 4)
+        self.assertEqual(self.count(b'id,name\n1,"a\n2,x\n'), 2)
+
+    def test_count_bytes_lines_from_offset(self):
+        fp = io.BytesIO(b"skip\nid,name\r1,a\r")
+        fp.readline()
+        self.assertEqual(PyJsEngine.count_bytes_lines(fp), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+# coding=utf-8
+
+import os
+import csv
+import shutil
+import logging
+import tempfile
+import unittest
+
+from pyjse.EnginePool import EnginePool
+
+
+logger = logging.getLogger(__name__)
+
+SCRIPT_SET = 'Set_str({a: "1"}); Procedure({name: "p1"}, function(){ Set_str({b: "2"}); }); Set_str({has_p1: typeof P1});'
+SCRIPT_CHECK = 'Set_str({seen_a: typeof __vars__.a, seen_p1: typeof P1});'
+
+
+# 进程后端的任务函数须可被pickle（模块级函数）
+def write_row_job(engine, file_name):
+    engine.write_output_row(file_name, ["id"], {"id": 1})
+    engine.get_compiled_template("{{ x }}")
+    return len(engine.output_writers)
+
+
+def get_open_state_job(engine):
+    return len(engine.output_writers), len(engine._template_cache)
+
+
+def fail_job(engine):
+    raise ValueError("job failed")
+
+
+class EnginePoolTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix="pyjse_test_")
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def check_isolation(self, pool):
+        vars = pool.run(SCRIPT_SET)
+        self.assertEqual((vars["a"], vars["has_p1"]), ("1", "function"))
+        # 同一引擎执行下一任务时看不到上一任务的变量及过程
+        vars = pool.run(SCRIPT_CHECK, vars={"c": "3"})
+        self.assertEqual((vars["seen_a"], vars["seen_p1"], vars["c"]), ("undefined", "undefined", "3"))
+
+    def check_stats(self, pool, backend):
+        with self.assertRaises(ValueError):
+            pool.submit_call(fail_job).result()
+        stats = pool.get_stats()
+        self.assertEqual(stats["backend"], backend)
+        self.assertEqual((stats["submitted"], stats["completed"], stats["failed"]), (3, 2, 1))
+        self.assertEqual((stats["busy"], stats["queue_depth"]), (0, 0))
+        self.assertGreater(stats["latency_max"], 0)
+
+    def test_thread_backend(self):
+        with EnginePool(size=1, backend=EnginePool.BACKEND_THREAD, engine_kwargs={"logger": logger}) as pool:
+            self.check_isolation(pool)
+            self.check_stats(pool, EnginePool.BACKEND_THREAD)
+
+    def test_process_backend(self):
+        with EnginePool(size=1, backend=EnginePool.BACKEND_PROCESS, engine_kwargs={"logger": logger}) as pool:
+            self.check_isolation(pool)
+            self.check_stats(pool, EnginePool.BACKEND_PROCESS)
+
+    def test_outputs_and_templates_reset_between_jobs(self):
+        file_name = os.path.join(self.work_dir, "out.csv")
+        engine_kwargs = {"logger": logger, "output_flush_rows": None, "output_flush_interval": None}
+        with EnginePool(size=1, backend=EnginePool.BACKEND_THREAD, engine_kwargs=engine_kwargs) as pool:
+            self.assertEqual(pool.submit_call(write_row_job, file_name).result(), 1)
+            # 下一任务前已关闭上一任务打开的文件（缓冲写入文件）并清除模板缓存
+            self.assertEqual(pool.submit_call(get_open_state_job).result(), (0, 0))
+        with open(file_name, newline='', encoding='utf-8') as fp:
+            self.assertEqual(list(csv.reader(fp)), [["id"], ["1"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
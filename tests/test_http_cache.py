@@ -0,0 +1,92 @@
+# coding=utf-8
+
+import os
+import shutil
+import tempfile
+import threading
+import logging
+import unittest
+from time import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from pyjse.tools.HttpCache import HttpCache
+from pyjse.tools.RequestsJsEngine import RequestsJsEngine
+
+
+logger = logging.getLogger(__name__)
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        lang = self.headers.get("Accept-Language") or "none"
+        body = "lang={}".format(lang).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Vary", "*" if self.path.startswith("/star") else "Accept-Language")
+        self.send_header("Cache-Control", "max-age=60")
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class HttpCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix="pyjse_test_")
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = "http://127.0.0.1:{}".format(self.server.server_address[1])
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def get(self, engine, path, lang):
+        resp = engine.session_get(self.base + path, headers={"Accept-Language": lang})
+        return resp.text
+
+    def test_vary(self):
+        engine = RequestsJsEngine(logger=logger, http_cache_dir=self.work_dir, http_cache_ttl=60)
+        self.assertEqual(self.get(engine, "/a", "en"), "lang=en")
+        self.assertEqual(self.get(engine, "/a", "en"), "lang=en")
+        self.assertEqual(engine.get_http_cache_stats()["hits"], 1)
+        self.assertEqual(self.get(engine, "/a", "fr"), "lang=fr")
+        self.assertEqual(engine.get_http_cache_stats()["hits"], 1)
+
+    def test_vary_star_not_cached(self):
+        engine = RequestsJsEngine(logger=logger, http_cache_dir=self.work_dir, http_cache_ttl=60)
+        self.get(engine, "/star", "en")
+        self.get(engine, "/star", "en")
+        stats = engine.get_http_cache_stats()
+        self.assertEqual(stats["hits"], 0)
+        self.assertEqual(stats["stores"], 0)
+
+    def test_concurrent_writes(self):
+        cache = HttpCache(self.work_dir)
+        url = self.base + "/same"
+        errors = []
+
+        def write(n):
+            try:
+                for i in range(20):
+                    cache._write(url, {'url': url, 'stored_at': time(), 'n': n}, b"x" * 1000)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=write, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+        self.assertEqual([name for name in os.listdir(self.work_dir) if name.endswith(".tmp")], [])
+        self.assertIsNotNone(cache.get_meta(url))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+# coding=utf-8
+
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import logging
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import requests
+
+from pyjse.tools.HttpCassette import HttpCassette
+from pyjse.tools.RequestsJsEngine import RequestsJsEngine
+
+BIG_BODY = b"0123456789" * 50000
+
+
+logger = logging.getLogger(__name__)
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    count = 0
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        Handler.count += 1
+        body = BIG_BODY if self.path.startswith("/big") else b"hello"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class HttpCassetteTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix="pyjse_test_")
+        self.cassette_file = os.path.join(self.work_dir, "test.cassette")
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = "http://127.0.0.1:{}".format(self.server.server_address[1])
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def test_streamed_record_not_buffered(self):
+        cassette = HttpCassette(self.cassette_file, mode=HttpCassette.MODE_RECORD)
+        resp = requests.get(self.base + "/big", stream=True)
+        RequestsJsEngine.record_response(cassette, "GET", self.base + "/big", None, resp, stream=True)
+        written = RequestsJsEngine.save_response(resp, os.path.join(self.work_dir, "big.bin"), chunk_size=4096)
+        self.assertEqual(written, len(BIG_BODY))
+        self.assertFalse(resp._content)  # 内容未整体读入内存
+        cassette.close()
+
+        cassette = HttpCassette(self.cassette_file)
+        self.assertEqual(cassette.replay("GET", self.base + "/big").content, BIG_BODY)
+        cassette.close()
+
+    def test_record_and_replay(self):
+        script = r"""
+            var a = Rget({url: "%s/a"});
+            var b = Rget({url: "%s/big", _to_file: "%s"});
+            Set_str({a: a.text, b: b.bytes});
+        """ % (self.base, self.base, os.path.join(self.work_dir, "big.bin"))
+        engine = RequestsJsEngine(logger=logger, cassette_file=self.cassette_file, cassette_mode="record")
+        engine.run(temp_script=script)
+        mtime = os.stat(self.cassette_file).st_mtime_ns
+        # 无新录制时不重写文件
+        engine.run(temp_script="var x = 1;")
+        self.assertEqual(os.stat(self.cassette_file).st_mtime_ns, mtime)
+        engine.cassette.close()
+
+        # 回放不访问网络（服务端请求计数不变）
+        requests_before = Handler.count
+        engine = RequestsJsEngine(logger=logger, cassette_file=self.cassette_file)
+        engine.run(temp_script=script)
+        self.assertEqual(engine.sync_vars()["a"], "hello")
+        self.assertEqual(engine.sync_vars()["b"], str(len(BIG_BODY)))
+        self.assertEqual(engine.get_cassette_stats()["replayed"], 2)
+        self.assertEqual(Handler.count, requests_before)
+        engine.cassette.close()
+
+    def assert_incomplete(self):
+        with self.assertRaises(ValueError) as cm:
+            HttpCassette(self.cassette_file)
+        self.assertIn("incomplete cassette", str(cm.exception))
+
+    def test_incomplete_cassette(self):
+        # 空文件
+        open(self.cassette_file, 'wb').close()
+        self.assert_incomplete()
+
+        # 录制中断：已写入内容但未写入索引及文件尾
+        cassette = HttpCassette(self.cassette_file, mode=HttpCassette.MODE_RECORD)
+        cassette.record("GET", self.base + "/big", None, requests.get(self.base + "/big"))
+        cassette._fp.flush()
+        self.assert_incomplete()
+        cassette.close()
+        with open(self.cassette_file, 'rb') as fp:
+            data = fp.read()
+
+        footer = data[-HttpCassette.FOOTER_SIZE:]
+        index_size = struct.unpack(HttpCassette.FOOTER_FORMAT, footer)[0]
+        index = data[-HttpCassette.FOOTER_SIZE - index_size:-HttpCassette.FOOTER_SIZE]
+        for broken in (
+                HttpCassette.MAGIC + footer,  # 索引大小超出文件范围
+                HttpCassette.MAGIC + b"x" * 10 + index + footer,  # 内容被截断（偏移超出范围）
+                data[:-HttpCassette.FOOTER_SIZE - index_size] + b"x" + index[1:] + footer):  # 索引损坏
+            with open(self.cassette_file, 'wb') as fp:
+                fp.write(broken)
+            self.assert_incomplete()
+
+    def test_illegal_file(self):
+        with open(self.cassette_file, 'wb') as fp:
+            fp.write(b"not a cassette file")
+        with self.assertRaises(ValueError) as cm:
+            HttpCassette(self.cassette_file)
+        self.assertIn("illegal", str(cm.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+# coding=utf-8
+
+import threading
+import logging
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import requests
+
+from pyjse.tools.HttpPool import PooledHTTPAdapter, make_retry
+from pyjse.tools.RequestsJsEngine import RequestsJsEngine
+
+
+logger = logging.getLogger(__name__)
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    wbufsize = -1
+    count = 0
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        Handler.count += 1
+        status = 503 if self.path.startswith("/unavailable") else 200
+        body = b"ok"
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class HttpPoolTest(unittest.TestCase):
+    def setUp(self):
+        Handler.count = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = "http://127.0.0.1:{}".format(self.server.server_address[1])
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connection_metrics(self):
+        adapter = PooledHTTPAdapter(pool_connections=1, pool_maxsize=1)
+        with requests.Session() as session:
+            session.mount("http://", adapter)
+            for i in range(3):
+                self.assertEqual(session.get(self.base + "/a").text, "ok")
+        self.assertEqual(adapter.metrics.get_stats(), {"connections": 1, "requests": 3, "reused": 2})
+
+    def test_no_retry_by_default(self):
+        engine = RequestsJsEngine(logger=logger)
+        resp = engine.session_get(self.base + "/unavailable")
+        self.assertEqual(resp.status_code, 503)
+        self.assertEqual(Handler.count, 1)
+        self.assertEqual(engine.get_connection_stats()["requests"], 1)
+
+    def test_retry_opt_in(self):
+        engine = RequestsJsEngine(logger=logger, max_retries=2, backoff_factor=0)
+        resp = engine.session_get(self.base + "/unavailable")
+        self.assertEqual(resp.status_code, 503)
+        self.assertEqual(Handler.count, 3)
+        stats = engine.get_connection_stats()
+        self.assertEqual((stats["requests"], stats["connections"]), (3, 1))
+
+    def test_make_retry(self):
+        self.assertEqual(make_retry(0), 0)
+        retry = make_retry(2, 0.5, (503,))
+        self.assertEqual((retry.total, retry.backoff_factor, retry.status_forcelist), (2, 0.5, (503,)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+# coding=utf-8
+
+import os
+import csv
+import shutil
+import tempfile
+import logging
+import unittest
+
+from pyjse import PyJsEngine
+
+
+logger = logging.getLogger(__name__)
+
+
+class LoadDataParallelTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix="pyjse_test_")
+        with open(os.path.join(self.work_dir, "input.csv"), 'w', newline='', encoding='utf-8') as fp:
+            cw = csv.writer(fp)
+            cw.writerow(["id", "name"])
+            for i in range(10):
+                cw.writerow([i, "name_{}".format(i)])
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def test_parent_vars_visible_in_body(self):
+        engine = PyJsEngine(logger=logger)
+        engine.add_to_path(self.work_dir)
+        out_name = os.path.join(self.work_dir, "output.csv")
+        engine.run(temp_script=r"""
+            Set_str({outname: %r, suffix: "_x"});
+            Load_data_parallel({
+                name: "input.csv",
+                workers: 2,
+                chunk_size: 3,
+                body: 'Set_str({tag: "$%%name%%$$%%suffix%%$"}); Output({name: "$%%outname%%$", cols: "id,tag"});',
+            });
+        """ % out_name)
+
+        self.assertFalse(os.path.exists(os.path.join(self.work_dir, "$%outname%$")))
+        with open(out_name, newline='', encoding='utf-8') as fp:
+            rows = list(csv.DictReader(fp))
+        self.assertEqual(len(rows), 10)
+        self.assertEqual(rows[0]["tag"], "name_0_x")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+# coding=utf-8
+
+import os
+import shutil
+import logging
+import tempfile
+import unittest
+
+from pyjse import PyJsEngine
+
+
+logger = logging.getLogger(__name__)
+
+MODULE = 'Procedure({name: "p1"}, function(){ Set_str({called: "%s"}); });'
+
+
+class ModulesTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix="pyjse_test_")
+        self.module_file = os.path.join(self.work_dir, "mod.js")
+        self.write_module("v1")
+        self.engine = PyJsEngine(logger=logger)
+        self.engine.add_to_path(self.work_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def write_module(self, version):
+        with open(self.module_file, 'w', encoding='utf-8') as fp:
+            fp.write(MODULE % version)
+
+    def load(self, reload=False):
+        self.engine.run(temp_script='Module({src: "mod", reload: %s}); Call({name: "p1"});'
+                                    % ("true" if reload else "false"))
+        return self.engine.get_loaded_modules()
+
+    def test_load_once(self):
+        modules = self.load()
+        self.assertEqual(len(modules), 1)
+        self.assertEqual(modules[0]['path'], os.path.abspath(self.module_file))
+        self.assertEqual(modules[0]['load_count'], 1)
+        self.assertIsInstance(modules[0]['elapsed'], float)
+        self.assertTrue(self.engine.is_module_loaded(self.module_file))
+        modules = self.load()
+        self.assertEqual(modules[0]['load_count'], 1)
+        self.assertEqual(self.engine.sync_vars()["called"], "v1")
+
+    def test_changed_file_reloaded(self):
+        self.load()
+        # 大小（及修改时间）变化后视为未加载
+        self.write_module("v2-changed")
+        self.assertFalse(self.engine.is_module_loaded(os.path.abspath(self.module_file)))
+        modules = self.load()
+        self.assertEqual(modules[0]['load_count'], 2)
+        self.assertEqual(self.engine.sync_vars()["called"], "v2-changed")
+
+    def test_reload(self):
+        self.load()
+        modules = self.load(reload=True)
+        self.assertEqual(modules[0]['load_count'], 2)
+
+    def test_unregister_and_clear(self):
+        path = self.load()[0]['path']
+        self.engine.unregister_module(path)
+        self.assertFalse(self.engine.is_module_loaded(path))
+        self.assertEqual(self.engine.get_loaded_modules(), [])
+        self.assertEqual(self.load()[0]['load_count'], 1)
+        self.engine.clear_modules()
+        self.assertEqual(self.engine.get_loaded_modules(), [])
+        self.assertEqual(self.load()[0]['load_count'], 1)
+
+    def test_failed_load_unregistered(self):
+        with open(self.module_file, 'w', encoding='utf-8') as fp:
+            fp.write("this is not javascript (")
+        with self.assertRaises(Exception):
+            self.engine.run(temp_script='Module({src: "mod"});')
+        self.assertEqual(self.engine.get_loaded_modules(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+# coding=utf-8
+
+import os
+import csv
+import shutil
+import logging
+import tempfile
+import threading
+import unittest
+from time import sleep
+
+from pyjse import PyJsEngine
+from pyjse.OutputWriters import OutputWriterRegistry
+
+
+logger = logging.getLogger(__name__)
+
+COLS = ["id", "name"]
+
+
+class OutputWritersTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix="pyjse_test_")
+        self.file_name = os.path.join(self.work_dir, "out.csv")
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def read_bytes(self):
+        with open(self.file_name, 'rb') as fp:
+            return fp.read()
+
+    def read_rows(self, encoding='utf-8'):
+        with open(self.file_name, newline='', encoding=encoding) as fp:
+            return list(csv.reader(fp))
+
+    def test_header_once(self):
+        registry = OutputWriterRegistry()
+        registry.write_row(self.file_name, COLS, {"id": 1, "name": "a"}, encoding='utf-8-sig')
+        registry.close()
+        # 追加到已有文件时不再写入标题行及BOM
+        registry = OutputWriterRegistry()
+        registry.write_row(self.file_name, COLS, {"id": 2, "name": "b"}, encoding='utf-8-sig')
+        registry.close()
+        self.assertEqual(self.read_bytes().count(b'\xef\xbb\xbf'), 1)
+        self.assertEqual(self.read_rows('utf-8-sig'), [COLS, ["1", "a"], ["2", "b"]])
+        # mode为w时覆盖并重新写入标题行
+        registry.write_row(self.file_name, COLS, {"id": 3, "name": "c"}, mode='w', encoding='utf-8')
+        registry.close()
+        self.assertEqual(self.read_rows(), [COLS, ["3", "c"]])
+
+    def test_concurrent_engines_whole_rows(self):
+        # 多个引擎（各自的registry）同时写同一文件：标题行仅一次，各行完整不交错
+        rows, threads = 2000, 4
+        name = "x" * 200
+        barrier = threading.Barrier(threads)
+
+        def work(n):
+            registry = OutputWriterRegistry(flush_rows=7, buffer_size=1000)
+            barrier.wait()
+            for i in range(rows):
+                registry.write_row(self.file_name, COLS, {"id": "{}-{}".format(n, i), "name": name})
+                sleep(0)
+            registry.close()
+
+        workers = [threading.Thread(target=work, args=(n,)) for n in range(threads)]
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        result = self.read_rows()
+        self.assertEqual(result[0], COLS)
+        self.assertEqual(len(result), rows * threads + 1)
+        for row in result[1:]:
+            self.assertEqual(row[1], name)
+
+    def test_flush_rows(self):
+        registry = OutputWriterRegistry(flush_rows=2, flush_interval=None, buffer_size=-1)
+        registry.write_row(self.file_name, COLS, {"id": 1, "name": "a"})
+        self.assertEqual(self.read_bytes(), b'')
+        registry.write_row(self.file_name, COLS, {"id": 2, "name": "b"})
+        self.assertEqual(self.read_rows(), [COLS, ["1", "a"], ["2", "b"]])
+        registry.close()
+
+    def test_flush_interval_without_new_writes(self):
+        registry = OutputWriterRegistry(flush_rows=None, flush_interval=0.05, buffer_size=-1)
+        registry.write_row(self.file_name, COLS, {"id": 1, "name": "a"})
+        for i in range(100):
+            if self.read_bytes():
+                break
+            sleep(0.05)
+        self.assertEqual(self.read_rows(), [COLS, ["1", "a"]])
+        registry.close()
+
+    def test_close_on_finish(self):
+        engine = PyJsEngine(logger=logger, output_flush_rows=None, output_flush_interval=None)
+        engine.add_to_path(self.work_dir)
+        engine.run(temp_script=r"""
+            for (var i = 0; i < 3; i++) {
+                Set_str({id: "" + i, name: "n" + i});
+                Output({name: "out.csv", cols: "id,name", encoding: "utf-8"});
+            }
+        """)
+        self.assertEqual(len(engine.output_writers), 0)
+        self.assertEqual(self.read_rows(), [COLS, ["0", "n0"], ["1", "n1"], ["2", "n2"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+# coding=utf-8
+
+import logging
+import unittest
+
+from pyjse import PyJsEngine
+from pyjse.tools.RequestsJsEngine import RequestsJsEngine
+
+
+logger = logging.getLogger(__name__)
+
+
+class ProfilerTest(unittest.TestCase):
+    def test_partial_builtins_profiled(self):
+        engine = PyJsEngine(logger=logger, profile=True)
+        engine.run(temp_script='Set_str({a: "1"}); Set_str({b: "2"}); Set_int({c: "3"}); Assert({key: "a", value: "1"});')
+        profile = engine.get_profile()
+        self.assertEqual(profile["Set_str"]["count"], 2)
+        self.assertEqual(profile["Set_int"]["count"], 1)
+        self.assertEqual(profile["Assert"]["count"], 1)
+        self.assertEqual(engine.sync_vars()["c"], 3)
+
+    def test_requests_builtins_profiled(self):
+        engine = RequestsJsEngine(logger=logger, profile=True, max_retries=0)
+        with self.assertRaises(Exception):
+            engine.run(temp_script='Rget({url: "http://127.0.0.1:1/", timeout: 0.5});')
+        profile = engine.get_profile()
+        self.assertEqual(profile["Rget"]["count"], 1)
+        self.assertEqual(profile["Rget"]["errors"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
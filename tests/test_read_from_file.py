@@ -0,0 +1,78 @@
+# coding=utf-8
+
+import os
+import sys
+import codecs
+import shutil
+import logging
+import tempfile
+import unittest
+from unittest import mock
+
+from pyjse import PyJsEngine
+from pyjse.PyJsEngineBase import PyJsEngineBase
+
+
+logger = logging.getLogger(__name__)
+
+SCRIPT = '// 测试脚本：设置变量并输出结果\nSet_str({name: "中文名称", value: "数据"});\n'
+
+
+class ReadFromFileTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix="pyjse_test_")
+        self.engine = PyJsEngine(logger=logger)
+        with PyJsEngineBase._encoding_cache_lock:
+            PyJsEngineBase._encoding_cache.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def write(self, data, name="script.js"):
+        file_name = os.path.join(self.work_dir, name)
+        with open(file_name, 'wb') as fp:
+            fp.write(data)
+        return file_name
+
+    def test_bom(self):
+        for bom, encoding in ((codecs.BOM_UTF8, 'utf-8'), (codecs.BOM_UTF16_LE, 'utf-16-le')):
+            file_name = self.write(bom + SCRIPT.encode(encoding))
+            self.assertEqual(self.engine.read_from_file(file_name), SCRIPT)
+
+    def test_strict_utf8_without_chardet(self):
+        file_name = self.write(SCRIPT.encode('utf-8'))
+        with mock.patch.dict(sys.modules, {"chardet": None}):
+            self.assertEqual(self.engine.read_from_file(file_name), SCRIPT)
+
+    def test_gbk(self):
+        file_name = self.write(SCRIPT.encode('gbk'))
+        self.assertEqual(self.engine.read_from_file(file_name), SCRIPT)
+        self.assertEqual(self.engine.read_from_file(file_name, encoding='gbk'), SCRIPT)
+
+    def test_fallback_never_raises(self):
+        data = SCRIPT.encode('gbk')
+        file_name = self.write(data)
+        # 未安装chardet
+        with mock.patch.dict(sys.modules, {"chardet": None}):
+            self.assertEqual(self.engine.read_from_file(file_name), data.decode('latin-1'))
+        # chardet未能检测出编码
+        with PyJsEngineBase._encoding_cache_lock:
+            PyJsEngineBase._encoding_cache.clear()
+        with mock.patch("chardet.detect", return_value={'encoding': None}):
+            self.assertEqual(self.engine.read_from_file(file_name), data.decode('latin-1'))
+
+    def test_encoding_cache(self):
+        file_name = self.write(SCRIPT.encode('gbk'))
+        script = self.engine.read_from_file(file_name)
+        with mock.patch.object(PyJsEngine, "decode_source", side_effect=AssertionError):
+            self.assertEqual(self.engine.read_from_file(file_name), script)
+
+        # 文件内容变化（大小改变）后重新检测
+        file_name = self.write(("// x\n" + SCRIPT).encode('utf-8'))
+        with mock.patch.object(PyJsEngine, "decode_source", wraps=self.engine.decode_source) as decode_source:
+            self.assertEqual(self.engine.read_from_file(file_name), "// x\n" + SCRIPT)
+            self.assertEqual(decode_source.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+# coding=utf-8
+
+import threading
+import logging
+import unittest
+from time import sleep
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from pyjse.tools.RequestsJsEngine import RequestsJsEngine
+
+
+logger = logging.getLogger(__name__)
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    wbufsize = -1
+    paths = []
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        Handler.paths.append(self.path)
+        if self.path.startswith("/slow"):
+            sleep(0.6)
+        body = self.path.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class RfuncManyTest(unittest.TestCase):
+    def setUp(self):
+        Handler.paths = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = "http://127.0.0.1:{}".format(self.server.server_address[1])
+        self.engine = RequestsJsEngine(logger=logger)
+        self.engine.run(temp_script="var _ = 0;")
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def rget_many(self, paths, **kwargs):
+        kwargs["requests"] = [self.base + p for p in paths]
+        return self.engine.run_rfunc_many(kwargs, funcn=self.engine.funcn_rget)
+
+    def test_ordered(self):
+        paths = ["/slow", "/a", "/b"]
+        results = self.rget_many(paths, concurrency=3)
+        self.assertEqual([r['text'] for r in results], paths)
+        self.assertEqual([r['index'] for r in results], [0, 1, 2])
+        # 按完成先后返回时慢请求在最后
+        results = self.rget_many(paths, concurrency=3, ordered=False)
+        self.assertEqual(results[-1]['text'], "/slow")
+        self.assertEqual(sorted(r['index'] for r in results), [0, 1, 2])
+
+    def test_batch_timeout(self):
+        results = self.rget_many(["/a", "/slow", "/b", "/c"], concurrency=1, batch_timeout=0.3)
+        self.assertEqual((results[0]['ok'], results[0]['text']), (True, "/a"))
+        self.assertEqual(results[1]['error'], "batch timeout (still running)")
+        self.assertEqual([r['error'] for r in results[2:]], ["batch timeout", "batch timeout"])
+        # 已取消的请求不会在后台发出
+        sleep(0.8)
+        self.assertEqual(Handler.paths, ["/a", "/slow"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+# coding=utf-8
+
+import os
+import shutil
+import tempfile
+import logging
+import unittest
+
+from pyjse import PyJsEngine
+
+
+logger = logging.getLogger(__name__)
+
+
+class TemplateTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix="pyjse_test_")
+        self.file_name = os.path.join(self.work_dir, "out.txt")
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def test_file_objects(self):
+        engine = PyJsEngine(logger=logger)
+        for stream in ("true", "false"):
+            engine.run(temp_script=r"""
+                Set_str({name: "world"});
+                var fo = Open(%r, "w");
+                Template({content: "hello {{ name }}", _to_file: fo, stream: %s});
+                fo.close();
+                var fi = Open(%r, "r");
+                Template({_from_file: fi, _to_key: "result"});
+                fi.close();
+            """ % (self.file_name, stream, self.file_name))
+            with open(self.file_name, encoding='utf-8') as fp:
+                self.assertEqual(fp.read(), "hello world")
+            self.assertEqual(engine.sync_vars()["result"], "hello world")
+
+    def test_file_path(self):
+        engine = PyJsEngine(logger=logger)
+        engine.run(temp_script=r"""
+            Set_str({name: "world"});
+            Template({content: "hello {{ name }}", _to_file: %r, stream: true});
+        """ % self.file_name)
+        with open(self.file_name, encoding='utf-8') as fp:
+            self.assertEqual(fp.read(), "hello world")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+# coding=utf-8
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from pyjse.TranslationCache import TranslationCache
+
+
+SCRIPT_A = "var a = 1;"
+SCRIPT_B = "var b = 2;"
+SCRIPT_C = "var c = 3;"
+
+
+class TranslationCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp(prefix="pyjse_test_")
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def list_cache_dir(self):
+        return sorted(os.listdir(self.cache_dir))
+
+    def test_memory_hit_and_miss(self):
+        cache = TranslationCache()
+        compiled = cache.get_compiled(SCRIPT_A)
+        self.assertIs(cache.get_compiled(SCRIPT_A), compiled)
+        cache.get_compiled(SCRIPT_B)
+        stats = cache.get_stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["disk_hits"]), (1, 2, 0))
+        self.assertEqual(stats["memory_entries"], 2)
+        self.assertGreater(stats["memory_bytes"], 0)
+        self.assertIn("var", cache.get_code(SCRIPT_A))
+
+    def test_disk_persistence_across_instances(self):
+        cache = TranslationCache(cache_dir=self.cache_dir)
+        code = cache.get_code(SCRIPT_A)
+        self.assertEqual(len(self.list_cache_dir()), 1)
+
+        cache = TranslationCache(cache_dir=self.cache_dir)
+        self.assertGreater(cache.get_stats()["disk_bytes"], 0)
+        self.assertEqual(cache.get_code(SCRIPT_A), code)
+        stats = cache.get_stats()
+        self.assertEqual((stats["disk_hits"], stats["misses"]), (1, 0))
+
+        # 仅清空内存时保留磁盘缓存
+        cache.clear(memory_only=True)
+        self.assertEqual(len(self.list_cache_dir()), 1)
+        cache.clear()
+        self.assertEqual(self.list_cache_dir(), [])
+        self.assertEqual(cache.get_stats()["disk_bytes"], 0)
+
+    def test_memory_lru_eviction(self):
+        cache = TranslationCache()
+        nbytes = len(cache.get_code(SCRIPT_A).encode('utf-8'))
+        cache = TranslationCache(max_memory_bytes=nbytes * 2 + nbytes // 2)
+        cache.get_compiled(SCRIPT_A)
+        cache.get_compiled(SCRIPT_B)
+        cache.get_compiled(SCRIPT_A)  # A为最近使用，B最先被淘汰
+        cache.get_compiled(SCRIPT_C)
+        stats = cache.get_stats()
+        self.assertEqual((stats["evictions"], stats["memory_entries"]), (1, 2))
+        cache.get_compiled(SCRIPT_A)
+        self.assertEqual(cache.get_stats()["hits"], 2)
+        cache.get_compiled(SCRIPT_B)
+        self.assertEqual(cache.get_stats()["misses"], 4)
+
+    def test_disk_eviction(self):
+        cache = TranslationCache(cache_dir=self.cache_dir, max_disk_bytes=1)
+        cache.get_compiled(SCRIPT_A)
+        cache.get_compiled(SCRIPT_B)
+        # 超出上限时淘汰旧文件，保留刚写入的文件
+        self.assertEqual(len(self.list_cache_dir()), 1)
+        self.assertEqual(cache.get_stats()["disk_evictions"], 1)
+
+    def test_concurrent_disk_writes(self):
+        caches = [TranslationCache(cache_dir=self.cache_dir) for i in range(8)]
+        threads = [threading.Thread(target=c.get_compiled, args=(SCRIPT_A,)) for c in caches]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        # 不残留临时文件
+        names = self.list_cache_dir()
+        self.assertEqual(len(names), 1)
+        self.assertTrue(names[0].endswith(TranslationCache.CACHE_FILE_EXT_NAME))
+
+
+if __name__ == "__main__":
+    unittest.main()
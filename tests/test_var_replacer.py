@@ -0,0 +1,27 @@
+# coding=utf-8
+
+import unittest
+
+from pyjse.PyJsEngineBase import PyJsEngineBase, parse_var_template, VAR_TEMPLATE_CACHE_MAX_LENGTH
+
+
+class VarReplacerTest(unittest.TestCase):
+    def replace(self, var_dict, v_str):
+        return PyJsEngineBase.var_replacer_raw(var_dict, v_str)
+
+    def test_replace(self):
+        self.assertEqual(self.replace({"a": 1, "b": "x"}, "$%a%$-$%b%$"), "1-x")
+        self.assertEqual(self.replace({}, "$%missing%$"), "$%missing%$")
+
+    def test_plain_strings_not_cached(self):
+        parse_var_template.cache_clear()
+        self.assertEqual(self.replace({"a": 1}, "no markers here"), "no markers here")
+        long_str = "x" * (VAR_TEMPLATE_CACHE_MAX_LENGTH + 1) + "$%a%$"
+        self.assertEqual(self.replace({"a": 1}, long_str), long_str[:-5] + "1")
+        self.assertEqual(parse_var_template.cache_info().currsize, 0)
+        self.replace({"a": 1}, "$%a%$")
+        self.assertEqual(parse_var_template.cache_info().currsize, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
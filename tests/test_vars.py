@@ -0,0 +1,38 @@
+# coding=utf-8
+
+import logging
+import unittest
+
+from pyjse import PyJsEngine
+
+
+logger = logging.getLogger(__name__)
+
+
+class VarsTest(unittest.TestCase):
+    def test_direct_vars_write_visible(self):
+        engine = PyJsEngine(logger=logger)
+        engine.run(temp_script=r"""
+            Set_str({a: "1"});
+            __vars__.zz = "direct";
+            Set_str({b: "$%zz%$-$%a%$"});
+        """)
+        vars = engine.sync_vars()
+        self.assertEqual(vars["b"], "direct-1")
+        self.assertEqual(engine.get_vars_dict()["zz"], "direct")
+
+    def test_vars_mirror_opt_in(self):
+        engine = PyJsEngine(logger=logger, vars_mirror=True)
+        engine.run(temp_script=r"""
+            Set_str({a: "1"});
+            Set_int({n: "2"});
+        """)
+        self.assertEqual(engine.get_vars_dict(), {"a": "1", "n": 2})
+        engine.run(temp_script='__vars__.zz = "direct";')
+        self.assertNotIn("zz", engine.get_vars_dict())
+        self.assertEqual(engine.sync_vars()["zz"], "direct")
+        self.assertEqual(engine.get_vars_dict()["zz"], "direct")
+
+
+if __name__ == "__main__":
+    unittest.main()